@@ -0,0 +1,184 @@
+"""
+Compiled answer key for grading quiz submissions.
+
+The key maps every active question to its points, correct choice and the
+choices that belong to it, so grading a submission is a dict walk with no
+per-question queries. One key is kept per process and rebuilt when the
+question bank version stamp changes (see ``signals.py``).
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+from .models import Question, Choice
+from . import versioning
+
+QuestionKey = namedtuple('QuestionKey', [
+    'id', 'text', 'points', 'correct_choice_id', 'correct_choice_text', 'choices',
+])
+
+GradedSubmission = namedtuple('GradedSubmission', [
+    'score', 'total_points', 'total_questions', 'results',
+])
+
+
+class AnswerKey:
+    def __init__(self, questions, version=None):
+        # question id -> QuestionKey, in question id order
+        self.questions = questions
+        # choice id -> (question id, is_correct), used to normalize stored answers
+        self.choice_lookup = {
+            choice_id: (question.id, is_correct)
+            for question in questions.values()
+            for choice_id, (_, is_correct) in question.choices.items()
+        }
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.questions)
+
+    @staticmethod
+    def _question_rows():
+        return Question.objects.filter(is_active=True).order_by('id').values_list(
+            'id', 'text', 'points'
+        )
+
+    @staticmethod
+    def _choice_rows():
+        return Choice.objects.filter(question__is_active=True).order_by('id').values_list(
+            'id', 'question_id', 'text', 'is_correct'
+        )
+
+    @classmethod
+    def build(cls, version=None):
+        """Load active questions and their choices in two queries"""
+        return cls.compile(cls._question_rows(), cls._choice_rows(), version=version)
+
+    @classmethod
+    async def abuild(cls, version=None):
+        """Async ``build``"""
+        questions = [row async for row in cls._question_rows()]
+        choices = [row async for row in cls._choice_rows()]
+        return cls.compile(questions, choices, version=version)
+
+    @classmethod
+    def compile(cls, questions, choices, version=None):
+        """Build the key from ``(id, text, points)`` and ``(id, question_id, text, is_correct)`` rows"""
+        choices_by_question = {}
+        for choice_id, question_id, text, is_correct in choices:
+            choices_by_question.setdefault(question_id, {})[choice_id] = (text, is_correct)
+
+        compiled = {}
+        for question_id, text, points in questions:
+            question_choices = choices_by_question.get(question_id, {})
+            correct = next(
+                ((cid, ctext) for cid, (ctext, ok) in question_choices.items() if ok),
+                (None, None)
+            )
+            compiled[question_id] = QuestionKey(
+                id=question_id,
+                text=text,
+                points=points,
+                correct_choice_id=correct[0],
+                correct_choice_text=correct[1],
+                choices=question_choices,
+            )
+        return cls(compiled, version=version)
+
+    def grade(self, user_answers, question_ids=None):
+        """Grade a ``{question_id: choice_id}`` mapping against this key"""
+        if question_ids is None:
+            questions = self.questions.values()
+        else:
+            questions = [self.questions[qid] for qid in question_ids if qid in self.questions]
+
+        score = 0
+        total_points = 0
+        results = []
+
+        for question in questions:
+            choice_id = user_answers.get(str(question.id))
+            total_points += question.points
+
+            try:
+                selected_id = int(choice_id) if choice_id else None
+            except (TypeError, ValueError):
+                selected_id = -1
+
+            selected = question.choices.get(selected_id) if selected_id else None
+            if question.correct_choice_id is None or (selected_id and selected is None):
+                results.append({
+                    'question_id': question.id,
+                    'question_text': question.text,
+                    'user_answer_id': None,
+                    'user_answer_text': "No answer",
+                    'correct_answer_id': None,
+                    'correct_answer_text': "Error loading answer",
+                    'is_correct': False,
+                    'points': 0
+                })
+                continue
+
+            is_correct = bool(selected and selected[1])
+            if is_correct:
+                score += question.points
+
+            results.append({
+                'question_id': question.id,
+                'question_text': question.text,
+                'user_answer_id': selected_id,
+                'user_answer_text': selected[0] if selected else "No answer",
+                'correct_answer_id': question.correct_choice_id,
+                'correct_answer_text': question.correct_choice_text,
+                'is_correct': is_correct,
+                'points': question.points if is_correct else 0
+            })
+
+        return GradedSubmission(score, total_points, len(results), results)
+
+
+_lock = threading.Lock()
+_cached_key = None
+
+
+def get_answer_key():
+    """Return the process-wide answer key, rebuilding it if it is stale"""
+    global _cached_key
+    version = versioning.get_version(versioning.QUESTIONS)
+    max_age = getattr(settings, 'ANSWER_KEY_MAX_AGE', 300)
+
+    key = _cached_key
+    if key is not None and key.version == version and time.monotonic() - key.built_at < max_age:
+        return key
+
+    with _lock:
+        key = _cached_key
+        if key is None or key.version != version or time.monotonic() - key.built_at >= max_age:
+            key = AnswerKey.build(version=version)
+            _cached_key = key
+    return key
+
+
+async def aget_answer_key():
+    """Async ``get_answer_key``, sharing the same process-local key"""
+    global _cached_key
+    version = await versioning.aget_version(versioning.QUESTIONS)
+    max_age = getattr(settings, 'ANSWER_KEY_MAX_AGE', 300)
+
+    key = _cached_key
+    if key is not None and key.version == version and time.monotonic() - key.built_at < max_age:
+        return key
+
+    # No lock across the awaits: concurrent misses may each build the key once
+    key = await AnswerKey.abuild(version=version)
+    _cached_key = key
+    return key
+
+
+def clear_answer_key():
+    """Drop the process-local key; the next call rebuilds it"""
+    global _cached_key
+    _cached_key = None
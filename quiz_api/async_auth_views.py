@@ -0,0 +1,179 @@
+"""
+Async versions of the password-hashing auth views, used under ASGI.
+
+These are plain Django async views (DRF has no async support) with the
+same request and response shapes as ``auth_views``. Hashing and password
+checks run on the bounded pool in ``hashing.py``; when it is saturated the
+views answer 429 with ``Retry-After`` instead of queueing. Only bearer
+tokens are accepted for ``change_password``.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .async_requests import AuthenticationFailed, bearer_user, request_data, unauthorized
+from .auth_views import duplicate_user_error
+from .authentication import QuizRefreshToken
+from .hashing import HashingPoolSaturated, run_hashing
+
+
+def _user_payload(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_staff': user.is_staff,
+    }
+
+
+def _issue_tokens(user):
+    # for_user records the outstanding token, which needs the sync ORM
+    refresh = QuizRefreshToken.for_user(user)
+    return {
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+    }
+
+
+def admission_controlled(view):
+    """POST-only, CSRF-exempt like DRF views, and 429 when the hashing pool is full"""
+    @csrf_exempt
+    @require_POST
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        data = request_data(request)
+        if data is None:
+            return JsonResponse({'error': 'Malformed request body'}, status=400)
+        try:
+            return await view(request, data, *args, **kwargs)
+        except HashingPoolSaturated:
+            return JsonResponse({
+                'error': 'Too many authentication requests, please retry shortly'
+            }, status=429, headers={'Retry-After': str(settings.AUTH_HASHING_RETRY_AFTER)})
+    return wrapper
+
+
+@admission_controlled
+async def register(request, data):
+    """Register a new user"""
+    username = data.get('username')
+    email = data.get('email')
+    password = data.get('password')
+    first_name = data.get('first_name', '')
+    last_name = data.get('last_name', '')
+
+    if not username or not email or not password:
+        return JsonResponse({
+            'error': 'Username, email, and password are required'
+        }, status=400)
+
+    hashed_password = await run_hashing(make_password, password)
+
+    def create_user():
+        # Same normalization as UserManager.create_user, with the hash computed off the loop.
+        # The unique username and email indexes reject duplicates; no pre-checks
+        try:
+            with transaction.atomic():
+                user = User(
+                    username=User.normalize_username(username),
+                    email=User.objects.normalize_email(email),
+                    first_name=first_name,
+                    last_name=last_name,
+                    password=hashed_password,
+                )
+                user.save()
+                return user, _issue_tokens(user), None
+        except IntegrityError:
+            return None, None, duplicate_user_error(username)
+
+    try:
+        user, tokens, error = await sync_to_async(create_user)()
+    except Exception as e:
+        return JsonResponse({
+            'error': f'Failed to create user: {str(e)}'
+        }, status=500)
+
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    return JsonResponse({
+        'message': 'User created successfully',
+        'user': _user_payload(user),
+        'tokens': tokens,
+    }, status=201)
+
+
+@admission_controlled
+async def login(request, data):
+    """Login user and return JWT tokens"""
+    username = data.get('username')
+    password = data.get('password')
+
+    if not username or not password:
+        return JsonResponse({
+            'error': 'Username and password are required'
+        }, status=400)
+
+    try:
+        user = await User._default_manager.aget_by_natural_key(username)
+    except User.DoesNotExist:
+        # Hash anyway, like ModelBackend, so timing doesn't reveal unknown usernames
+        await run_hashing(make_password, password)
+        user = None
+
+    # Inactive users are rejected like authenticate() does
+    if user is None or not await run_hashing(user.check_password, password) or not user.is_active:
+        return JsonResponse({
+            'error': 'Invalid credentials'
+        }, status=401)
+
+    return JsonResponse({
+        'message': 'Login successful',
+        'user': _user_payload(user),
+        'tokens': await sync_to_async(_issue_tokens)(user),
+    })
+
+
+@admission_controlled
+async def change_password(request, data):
+    """Change user password"""
+    try:
+        user = await bearer_user(request)
+    except AuthenticationFailed as e:
+        return unauthorized(e.detail)
+    if user is None:
+        return unauthorized('Authentication credentials were not provided.')
+
+    old_password = data.get('old_password')
+    new_password = data.get('new_password')
+
+    if not old_password or not new_password:
+        return JsonResponse({
+            'error': 'Old password and new password are required'
+        }, status=400)
+
+    if not await run_hashing(user.check_password, old_password):
+        return JsonResponse({
+            'error': 'Invalid old password'
+        }, status=400)
+
+    if len(new_password) < 8:
+        return JsonResponse({
+            'error': 'New password must be at least 8 characters long'
+        }, status=400)
+
+    user.password = await run_hashing(make_password, new_password)
+    await user.asave(update_fields=['password'])
+
+    return JsonResponse({
+        'message': 'Password changed successfully'
+    })
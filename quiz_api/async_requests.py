@@ -0,0 +1,77 @@
+"""
+Request helpers for the plain Django async views.
+
+DRF has no async views, so the async endpoints parse bodies and
+authenticate bearer tokens themselves, with the same results (and error
+bodies) as the DRF views they replace.
+"""
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from quiz_project.performance import timed_auth
+
+from .parsers import json_loads
+from .renderers import FastJSONRenderer
+
+
+class AuthenticationFailed(Exception):
+    def __init__(self, detail):
+        super().__init__(detail)
+        # Response body, as rendered by DRF for the same failure
+        self.detail = detail
+
+
+def request_data(request):
+    """The JSON object or form fields in the body, or None if malformed"""
+    if request.content_type == 'application/json':
+        try:
+            data = json_loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST.dict()
+
+
+async def bearer_user(request):
+    """The active user named by the bearer token, or None without one
+
+    Raises AuthenticationFailed for an invalid token or an unknown or
+    inactive user, as JWTAuthentication does.
+    """
+    with timed_auth():
+        return await _bearer_user(request)
+
+
+async def _bearer_user(request):
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        token = authentication.get_validated_token(raw_token)
+    except InvalidToken as e:
+        raise AuthenticationFailed(e.detail)
+    user_id = token.get(jwt_settings.USER_ID_CLAIM)
+    user = await User.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).afirst()
+    if user is None:
+        raise AuthenticationFailed({'detail': 'User not found', 'code': 'user_not_found'})
+    if not user.is_active:
+        raise AuthenticationFailed({'detail': 'User is inactive', 'code': 'user_inactive'})
+    return user
+
+
+def render_response(data, status=200, headers=None):
+    """JSON response rendered exactly like a DRF ``Response``"""
+    return HttpResponse(
+        FastJSONRenderer().render(data), content_type='application/json', status=status, headers=headers
+    )
+
+
+def unauthorized(detail):
+    if not isinstance(detail, dict):
+        detail = {'detail': detail}
+    return render_response(detail, status=401, headers={'WWW-Authenticate': 'Bearer realm="api"'})
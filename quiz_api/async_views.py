@@ -0,0 +1,161 @@
+"""
+Async versions of the hot public quiz endpoints, used under ASGI.
+
+``get_quiz_config``, ``get_quiz_questions`` and ``submit_quiz_answers``
+read through the async ORM and the async cache API, so a worker serves
+them from its event loop without a thread hop per request. Responses are
+rendered like the DRF views in ``views.py``. Django has no async
+transactions, so the write of a submission (attempt counter, attempt,
+answers, stats and leaderboard in one transaction) still runs in a thread
+through ``sync_to_async``. Bearer tokens identify the submitter; session
+logins are not read.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+
+from .models import Question
+from .serializers import QuizConfigSerializer, QuizSubmissionSerializer
+from .answer_key import aget_answer_key
+from .async_requests import AuthenticationFailed, bearer_user, render_response, request_data, unauthorized
+from .attempts import build_attempt, attempt_response
+from .config import aget_config
+from .limits import ANONYMOUS_SESSION, AttemptLimitExceeded
+from .payloads import aget_questions_payload
+from .sampling import (
+    amark_submitted, asample_questions, aserialize_questions, aserve_questions, aserved_question_ids, aserved_quiz,
+    new_session_id,
+)
+from .submissions import record_submission
+
+
+@require_GET
+async def get_quiz_config(request):
+    config = await aget_config()
+    return render_response(QuizConfigSerializer(config).data)
+
+
+@require_GET
+async def get_quiz_questions(request):
+    params = request.GET
+    if any(params.get(name) for name in ('count', 'category', 'difficulty')):
+        return await _get_quiz_question_subset(request)
+
+    payload = await aget_questions_payload()
+    headers = {
+        'ETag': payload.etag,
+        'Cache-Control': settings.QUIZ_QUESTIONS_CACHE_CONTROL,
+    }
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        if '*' in etags or payload.etag in etags:
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return HttpResponse(payload.body, content_type='application/json', headers=headers)
+
+
+async def _get_quiz_question_subset(request):
+    """Random subset of the (filtered) active questions, recorded for grading"""
+    params = request.GET
+    category = params.get('category') or None
+    difficulty = params.get('difficulty') or None
+    session_id = params.get('session_id')
+
+    max_count = settings.QUIZ_MAX_QUESTION_COUNT
+    try:
+        count = int(params.get('count') or max_count)
+    except ValueError:
+        count = 0
+    if not 1 <= count <= max_count:
+        return render_response({
+            'error': f'count must be between 1 and {max_count}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if difficulty and difficulty not in dict(Question._meta.get_field('difficulty').choices):
+        return render_response({'error': 'Invalid difficulty'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if session_id:
+        # Reloads get the stored subset, whatever count or filters they pass
+        served = await aserved_quiz(session_id)
+        if served is None:
+            return render_response({
+                'error': 'Unknown session_id; omit it to start a new quiz'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if served.submitted_at is not None:
+            return render_response({
+                'error': 'This quiz session has already been submitted; omit session_id to start a new quiz'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        question_ids = served.question_ids
+        questions = await aserialize_questions(question_ids)
+    else:
+        session_id = new_session_id()
+        question_ids = await asample_questions(session_id, count, category=category, difficulty=difficulty)
+        if not question_ids:
+            return render_response({
+                'error': 'No active questions match the filters'
+            }, status=status.HTTP_404_NOT_FOUND)
+        questions = await aserve_questions(session_id, question_ids)
+
+    # Per-session response: never store it in shared caches
+    return render_response({
+        'session_id': session_id,
+        'count': len(questions),
+        'questions': questions
+    }, headers={'Cache-Control': 'private, no-store'})
+
+
+@csrf_exempt
+@require_POST
+async def submit_quiz_answers(request):
+    data = request_data(request)
+    if data is None:
+        return render_response({'detail': 'JSON parse error'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        user = await bearer_user(request)
+    except AuthenticationFailed as e:
+        return unauthorized(e.detail)
+
+    serializer = QuizSubmissionSerializer(data=data)
+    if not serializer.is_valid():
+        return render_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    user_answers = serializer.validated_data['answers']
+    time_taken = serializer.validated_data['time_taken']
+    user_session = serializer.validated_data['session_id']
+    username = serializer.validated_data['username']
+
+    # Sessions that were served a random subset are graded on that subset only
+    question_ids = None
+    if user_session != ANONYMOUS_SESSION:
+        question_ids = (await aserved_question_ids([user_session])).get(user_session)
+
+    answer_key = await aget_answer_key()
+    graded = answer_key.grade(user_answers, question_ids=question_ids)
+
+    attempt = build_attempt(
+        graded,
+        user_answers,
+        user=user,
+        username=username,
+        user_session=user_session,
+        time_taken=time_taken
+    )
+
+    config = await aget_config()
+    try:
+        attempt, queued = await sync_to_async(record_submission)(attempt, config.max_attempts)
+    except AttemptLimitExceeded:
+        return render_response({
+            'error': 'Maximum number of attempts reached'
+        }, status=status.HTTP_403_FORBIDDEN)
+    if question_ids is not None:
+        await amark_submitted([user_session])
+
+    if queued:
+        return render_response({**attempt_response(graded, attempt), 'queued': True})
+    return render_response(attempt_response(graded, attempt))
@@ -0,0 +1,81 @@
+"""
+Building and persisting graded quiz attempts.
+
+Every code path that records attempts goes through ``save_attempts`` so
+that the inserts stay batched in one place.
+"""
+from django.db import transaction
+
+from .models import QuizAttempt, AttemptAnswer
+from .answer_key import get_answer_key
+from . import distributions, leaderboard, rollups, stats
+
+
+def build_attempt(graded, user_answers, user=None, username='', user_session='anonymous', time_taken=0):
+    """Return an unsaved QuizAttempt for a graded submission"""
+    percentage = (graded.score / graded.total_points * 100) if graded.total_points > 0 else 0
+    display_username = username or (user.username if user else "Anonymous")
+    return QuizAttempt(
+        user=user,
+        username=display_username,
+        user_session=user_session,
+        score=graded.score,
+        total_questions=graded.total_questions,
+        percentage=percentage,
+        time_taken=time_taken,
+        user_answers=user_answers
+    )
+
+
+def attempt_response(graded, attempt):
+    """Response payload returned to the student for one graded attempt"""
+    return {
+        'score': graded.score,
+        'total_points': graded.total_points,
+        'percentage': round(attempt.percentage, 2),
+        'time_taken': attempt.time_taken,
+        'attempt_id': attempt.id,
+        'username': attempt.username,
+        'results': graded.results
+    }
+
+
+def answer_rows(attempt, choice_lookup):
+    """Normalized AttemptAnswer rows for a saved attempt
+
+    ``choice_lookup`` maps choice id -> (question id, is_correct); answers
+    naming an unknown choice or a choice of another question are skipped.
+    """
+    rows = []
+    for question_id, choice_id in (attempt.user_answers or {}).items():
+        try:
+            question_id = int(question_id)
+            choice_id = int(choice_id) if choice_id else None
+        except (TypeError, ValueError):
+            continue
+        choice = choice_lookup.get(choice_id)
+        if choice is None or choice[0] != question_id:
+            continue
+        rows.append(AttemptAnswer(
+            attempt_id=attempt.id,
+            question_id=question_id,
+            choice_id=choice_id,
+            is_correct=choice[1],
+        ))
+    return rows
+
+
+def save_attempts(attempts):
+    """Insert attempts with bulk_create and update everything derived from them"""
+    if not attempts:
+        return []
+    choice_lookup = get_answer_key().choice_lookup
+    with transaction.atomic():
+        attempts = QuizAttempt.objects.bulk_create(attempts)
+        rows = [row for attempt in attempts for row in answer_rows(attempt, choice_lookup)]
+        AttemptAnswer.objects.bulk_create(rows, batch_size=1000)
+        stats.record_attempts(attempts)
+        rollups.record_attempts(attempts)
+        leaderboard.record_attempts(attempts)
+        distributions.record_attempts(attempts)
+    return attempts
@@ -2,11 +2,19 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from .authentication import QuizRefreshToken
+
+def duplicate_user_error(username):
+    """Error message for a registration rejected by a unique index"""
+    # Only runs after a failed insert, so signups normally cost no lookup
+    if User.objects.filter(username=User.normalize_username(username)).exists():
+        return 'Username already exists'
+    return 'Email already exists'
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -23,16 +31,7 @@ def register(request):
             'error': 'Username, email, and password are required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    if User.objects.filter(username=username).exists():
-        return Response({
-            'error': 'Username already exists'
-        }, status=status.HTTP_400_BAD_REQUEST)
-    
-    if User.objects.filter(email=email).exists():
-        return Response({
-            'error': 'Email already exists'
-        }, status=status.HTTP_400_BAD_REQUEST)
-    
+    # The unique username and email indexes reject duplicates; no pre-checks
     try:
         with transaction.atomic():
             user = User.objects.create_user(
@@ -44,29 +43,32 @@ def register(request):
             )
             
             # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = QuizRefreshToken.for_user(user)
             access_token = refresh.access_token
-            
-            return Response({
-                'message': 'User created successfully',
-                'user': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'is_staff': user.is_staff,
-                },
-                'tokens': {
-                    'access': str(access_token),
-                    'refresh': str(refresh),
-                }
-            }, status=status.HTTP_201_CREATED)
-            
+    except IntegrityError:
+        return Response({
+            'error': duplicate_user_error(username)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'error': f'Failed to create user: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    return Response({
+        'message': 'User created successfully',
+        'user': {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'is_staff': user.is_staff,
+        },
+        'tokens': {
+            'access': str(access_token),
+            'refresh': str(refresh),
+        }
+    }, status=status.HTTP_201_CREATED)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -94,7 +96,7 @@ def login(request):
         }, status=status.HTTP_401_UNAUTHORIZED)
     
     # Generate JWT tokens
-    refresh = RefreshToken.for_user(user)
+    refresh = QuizRefreshToken.for_user(user)
     access_token = refresh.access_token
     
     return Response({
@@ -125,12 +127,37 @@ def refresh_token(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        refresh = RefreshToken(refresh_token)
-        access_token = refresh.access_token
-        
+        refresh = QuizRefreshToken(refresh_token)
+    except Exception:
         return Response({
-            'access': str(access_token),
-        })
+            'error': 'Invalid refresh token'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    # The claims were copied from the user when the token was issued; reload it so
+    # deactivated users cannot refresh and demoted staff lose is_staff
+    user = User.objects.filter(
+        **{jwt_settings.USER_ID_FIELD: refresh.payload.get(jwt_settings.USER_ID_CLAIM)}
+    ).first()
+    if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+        return Response({
+            'error': 'User not found or inactive'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    refresh.set_identity(user)
+    
+    try:
+        data = {'access': str(refresh.access_token)}
+        
+        # Same rotation as simplejwt's TokenRefreshView, driven by SIMPLE_JWT
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        
+        return Response(data)
     except Exception as e:
         return Response({
             'error': 'Invalid refresh token'
@@ -148,7 +175,7 @@ def logout(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        refresh = RefreshToken(refresh_token)
+        refresh = QuizRefreshToken(refresh_token)
         refresh.blacklist()
         
         return Response({
@@ -192,7 +219,14 @@ def update_profile(request):
     if 'email' in request.data:
         user.email = request.data['email']
     
-    user.save()
+    # The unique email index rejects an address another account already uses
+    try:
+        with transaction.atomic():
+            user.save()
+    except IntegrityError:
+        return Response({
+            'error': 'Email already exists'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     return Response({
         'message': 'Profile updated successfully',
@@ -0,0 +1,79 @@
+"""
+Stateless JWT authentication for endpoints that only need identity.
+
+``JWTAuthentication`` loads the ``User`` row on every request. Tokens
+issued by ``login`` and ``register`` also carry ``username`` and
+``is_staff`` claims, so views that only need to know who the caller is and
+whether they are staff can use ``StatelessJWTAuthentication``, which builds
+a ``TokenUser`` from the claims without a query. Views that need the full
+model (profile, password change, attempts linked to a user) keep the
+default classes.
+
+Claims are fixed when an access token is issued. ``refresh_token`` reloads
+the user and stamps the claims afresh, and refuses deleted or inactive
+users, so revoking staff status or deactivating an account takes effect on
+these endpoints once the current access token expires
+(``SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']``).
+
+Both classes report the time they take as the ``auth`` segment of the
+performance middleware's ``Server-Timing`` header.
+"""
+from quiz_project.performance import timed_auth
+from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .token_bloom import blacklist_filter
+
+IDENTITY_CLAIMS = ('username', 'is_staff')
+
+
+class QuizRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry the identity claims
+
+    Blacklist checks go through the in-process Bloom filter first, so only
+    tokens that may be blacklisted cost a query.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_identity(user)
+        return token
+
+    def set_identity(self, user):
+        """Stamp the identity claims from ``user``; access tokens copy them"""
+        self['username'] = user.get_username()
+        self['is_staff'] = user.is_staff
+
+    def check_blacklist(self):
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+
+class TimedAuthenticationMixin:
+    def authenticate(self, request):
+        with timed_auth():
+            return super().authenticate(request)
+
+
+class QuizJWTAuthentication(TimedAuthenticationMixin, JWTAuthentication):
+    pass
+
+
+class StatelessJWTAuthentication(TimedAuthenticationMixin, JWTStatelessUserAuthentication):
+    def get_user(self, validated_token):
+        if all(claim in validated_token for claim in IDENTITY_CLAIMS):
+            return super().get_user(validated_token)
+        # Issued before the identity claims existed; load the user instead
+        return JWTAuthentication.get_user(self, validated_token)
+
+
+# For @authentication_classes on identity-only views; sessions still work for the browsable API
+STATELESS_AUTHENTICATION_CLASSES = [StatelessJWTAuthentication, SessionAuthentication]
@@ -0,0 +1,74 @@
+"""
+Helpers shared by the benchmark management commands.
+
+Benchmarks run against a throwaway test database and a private local-memory
+cache, so they never touch real data or the version stamps of live workers.
+"""
+import math
+import time
+from contextlib import contextmanager
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from .answer_key import clear_answer_key
+
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'quiz-benchmarks',
+    }
+}
+
+
+@contextmanager
+def benchmark_database(verbosity=0, keepdb=False):
+    """Run the block against a scratch test database"""
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, keepdb=keepdb
+    )
+    # In-memory SQLite test databases survive destroy_test_db within a process
+    call_command('flush', verbosity=0, interactive=False)
+    try:
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            clear_answer_key()
+            yield
+    finally:
+        clear_answer_key()
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def percentile(sorted_samples, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(int(math.ceil(q / 100.0 * len(sorted_samples))) - 1, 0)
+    return sorted_samples[rank]
+
+
+def summarize(samples):
+    """Summarize durations in seconds as milliseconds"""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        'count': len(ordered),
+        'mean_ms': round(total / len(ordered) * 1000, 3) if ordered else 0.0,
+        'p50_ms': round(percentile(ordered, 50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 3),
+        'per_second': round(len(ordered) / total, 1) if total else 0.0,
+    }
+
+
+def time_calls(func, iterations, warmup=1):
+    """Call ``func`` repeatedly and return the duration of each call"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
@@ -0,0 +1,96 @@
+"""
+Cached access to the QuizConfig singleton.
+
+The config changes a few times a year but is read on every config request
+(and by submission checks), so each process keeps its own copy. The copy
+is trusted for ``QUIZ_CONFIG_CHECK_INTERVAL`` seconds; after that the
+process compares the copy's version stamp with the cached one (a single
+cache get) and reloads only if the stamp changed. Saving or deleting a
+QuizConfig bumps the stamp (see ``signals.py``); with a shared cache
+backend other workers notice within one check interval. The default
+LocMem cache is per process, so a copy is also reloaded once it is
+``QUIZ_CONFIG_MAX_AGE`` seconds old, whatever its stamp.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+from .models import QuizConfig
+from . import versioning
+
+CachedConfig = namedtuple('CachedConfig', ['version', 'config', 'checked_at', 'loaded_at'])
+
+_lock = threading.Lock()
+_cached = None
+
+
+def load_config():
+    """Fetch the config row from the database, creating it if missing"""
+    config = QuizConfig.objects.order_by('id').first()
+    if config is None:
+        config = QuizConfig.objects.create()
+    return config
+
+
+async def aload_config():
+    """Async ``load_config``"""
+    config = await QuizConfig.objects.order_by('id').afirst()
+    if config is None:
+        config = await QuizConfig.objects.acreate()
+    return config
+
+
+def _is_current(entry, version):
+    max_age = getattr(settings, 'QUIZ_CONFIG_MAX_AGE', 60)
+    return entry is not None and entry.version == version and time.monotonic() - entry.loaded_at < max_age
+
+
+def get_config():
+    """Return the process-wide QuizConfig; callers must treat it as read-only"""
+    global _cached
+    interval = getattr(settings, 'QUIZ_CONFIG_CHECK_INTERVAL', 5)
+
+    entry = _cached
+    if entry is not None and time.monotonic() - entry.checked_at < interval:
+        return entry.config
+
+    version = versioning.get_version(versioning.QUIZ_CONFIG)
+    with _lock:
+        entry = _cached
+        if _is_current(entry, version):
+            _cached = entry._replace(checked_at=time.monotonic())
+            return entry.config
+        # Stamp read before the load: a concurrent bump only causes one extra reload
+        config = load_config()
+        now = time.monotonic()
+        _cached = CachedConfig(version, config, now, now)
+    return config
+
+
+async def aget_config():
+    """Async ``get_config``, sharing the same process-local copy"""
+    global _cached
+    interval = getattr(settings, 'QUIZ_CONFIG_CHECK_INTERVAL', 5)
+
+    entry = _cached
+    if entry is not None and time.monotonic() - entry.checked_at < interval:
+        return entry.config
+
+    version = await versioning.aget_version(versioning.QUIZ_CONFIG)
+    entry = _cached
+    if _is_current(entry, version):
+        _cached = entry._replace(checked_at=time.monotonic())
+        return entry.config
+    # No lock across the await: concurrent misses may each load the row once
+    config = await aload_config()
+    now = time.monotonic()
+    _cached = CachedConfig(version, config, now, now)
+    return config
+
+
+def clear_config():
+    """Drop the process-local copy; the next call reloads it"""
+    global _cached
+    _cached = None
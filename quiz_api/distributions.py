@@ -0,0 +1,267 @@
+"""
+Mergeable sketches of attempt percentages and times, for percentile queries.
+
+Each metric is a fixed-bucket histogram: percentages in 1-point buckets
+centred on whole numbers (0-100), times in logarithmic buckets about 2%
+wide whose midpoint is reported, so any quantile is within 0.5 points or
+1% of the exact value. Two
+sketches merge by adding their bucket counts, which makes them safe to
+accumulate anywhere and combine later.
+
+Every worker adds the attempts it saves (or deletes) to a pending sketch
+once the transaction commits, and a background thread adds those counts to
+the ``DistributionBucket`` rows with ``F()`` updates every
+``QUIZ_DISTRIBUTION_FLUSH_INTERVAL`` seconds, whether or not the worker is
+still receiving submissions. The stored rows are the merge of every
+worker, so percentiles are computed from a few hundred rows and never sort
+``QuizAttempt``. Pending counts are also flushed at exit; a worker that is
+killed loses them until ``rebuild_distributions`` is run.
+"""
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import F
+
+from .models import DistributionBucket, QuizAttempt
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+
+class LinearScale:
+    """Buckets of ``width`` centred on multiples of it, between ``low`` and ``high``"""
+
+    def __init__(self, low, high, width=1):
+        self.low = low
+        self.high = high
+        self.width = width
+
+    def bucket(self, value):
+        value = min(max(value, self.low), self.high)
+        return math.floor(value / self.width + 0.5)
+
+    def value(self, bucket):
+        return bucket * self.width
+
+    def bounds(self, bucket):
+        centre = self.value(bucket)
+        return max(self.low, centre - self.width / 2), min(self.high, centre + self.width / 2)
+
+
+class LogScale:
+    """Buckets whose midpoint is within ``relative_accuracy`` of every value in them"""
+
+    def __init__(self, relative_accuracy=0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+
+    def bucket(self, value):
+        # Bucket k holds (gamma**(k-1), gamma**k]; zero and below get their own bucket
+        if value <= 0:
+            return -1
+        return max(0, math.ceil(math.log(value) / self.log_gamma))
+
+    def value(self, bucket):
+        return 0 if bucket < 0 else 2 * self.gamma ** bucket / (self.gamma + 1)
+
+    def bounds(self, bucket):
+        if bucket < 0:
+            return 0, 0
+        return (self.gamma ** (bucket - 1) if bucket else 0), self.gamma ** bucket
+
+
+METRICS = {
+    'percentage': LinearScale(0, 100),
+    'time_taken': LogScale(0.01),
+}
+
+
+class Sketch:
+    """Counts per bucket of one metric; sketches merge by adding counts"""
+
+    def __init__(self, scale, counts=None):
+        self.scale = scale
+        self.counts = Counter(counts or {})
+
+    @property
+    def count(self):
+        return sum(self.counts.values())
+
+    def add(self, value, weight=1):
+        self.counts[self.scale.bucket(value)] += weight
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+
+    def quantile(self, q):
+        """Value of the bucket holding the q-quantile (nearest rank), or None if empty"""
+        total = self.count
+        if not total:
+            return None
+        target = max(1, math.ceil(q * total))
+        cumulative = 0
+        for bucket in sorted(self.counts):
+            cumulative += self.counts[bucket]
+            if cumulative >= target:
+                return self.scale.value(bucket)
+        return self.scale.value(max(self.counts))
+
+    def histogram(self):
+        """Non-empty buckets in order, with their value range"""
+        rows = []
+        for bucket in sorted(self.counts):
+            if self.counts[bucket] <= 0:
+                continue
+            lower, upper = self.scale.bounds(bucket)
+            rows.append({'lower': round(lower, 2), 'upper': round(upper, 2), 'count': self.counts[bucket]})
+        return rows
+
+
+def empty_sketches():
+    return {metric: Sketch(scale) for metric, scale in METRICS.items()}
+
+
+def attempt_sketches(attempts, sign=1):
+    """Sketches of the given attempts (negative counts with sign=-1)"""
+    sketches = empty_sketches()
+    for attempt in attempts:
+        for metric, sketch in sketches.items():
+            sketch.add(getattr(attempt, metric), sign)
+    return sketches
+
+
+class PendingSketches:
+    """Counts this worker has recorded but not yet written to the database"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sketches = empty_sketches()
+
+    def merge(self, sketches):
+        with self._lock:
+            for metric, sketch in sketches.items():
+                self._sketches[metric].merge(sketch)
+
+    def take(self):
+        """Remove and return the pending sketches"""
+        with self._lock:
+            sketches, self._sketches = self._sketches, empty_sketches()
+            return sketches
+
+
+pending = PendingSketches()
+
+
+def _update_bucket(metric, bucket, delta):
+    return DistributionBucket.objects.filter(metric=metric, bucket=bucket).update(count=F('count') + delta)
+
+
+def write_sketches(sketches):
+    """Add the sketches' counts to the stored buckets, creating missing rows"""
+    # Fixed order so concurrent flushes lock the rows in the same order
+    deltas = sorted(
+        ((metric, bucket), delta)
+        for metric, sketch in sketches.items()
+        for bucket, delta in sketch.counts.items() if delta
+    )
+    if not deltas:
+        return
+    with transaction.atomic():
+        missing = [(key, delta) for key, delta in deltas if not _update_bucket(*key, delta)]
+        if not missing:
+            return
+        DistributionBucket.objects.bulk_create(
+            [DistributionBucket(metric=metric, bucket=bucket) for (metric, bucket), _ in missing],
+            ignore_conflicts=True,
+        )
+        for key, delta in missing:
+            _update_bucket(*key, delta)
+
+
+def flush():
+    """Write this worker's pending counts"""
+    sketches = pending.take()
+    try:
+        write_sketches(sketches)
+    except DatabaseError:
+        # Keep the counts for the next flush rather than dropping them
+        pending.merge(sketches)
+        logger.exception('Could not write the attempt distributions; will retry')
+
+
+atexit.register(flush)
+
+_flusher_lock = threading.Lock()
+_flusher = None
+
+
+def _run_flusher():
+    while True:
+        time.sleep(settings.QUIZ_DISTRIBUTION_FLUSH_INTERVAL)
+        try:
+            close_old_connections()
+            flush()
+        except Exception:
+            logger.exception('Flushing the attempt distributions failed; will retry')
+
+
+def start_flusher():
+    """Start the background flusher for this process if it is not running"""
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_run_flusher, name='attempt-distribution-flusher', daemon=True)
+            _flusher.start()
+
+
+def _queue(sketches):
+    pending.merge(sketches)
+    start_flusher()
+
+
+def record_attempts(attempts):
+    sketches = attempt_sketches(attempts)
+    # Counted only once the attempts are committed
+    transaction.on_commit(lambda: _queue(sketches))
+
+
+def forget_attempts(attempts):
+    sketches = attempt_sketches(attempts, sign=-1)
+    transaction.on_commit(lambda: _queue(sketches))
+
+
+def load_sketches():
+    """Stored sketches, merged from every worker's flushed counts"""
+    sketches = empty_sketches()
+    for metric, bucket, count in DistributionBucket.objects.values_list('metric', 'bucket', 'count'):
+        if metric in sketches and count:
+            sketches[metric].counts[bucket] = count
+    return sketches
+
+
+def compute_sketches(chunk_size=5000):
+    """Recompute every sketch from the attempts table"""
+    sketches = empty_sketches()
+    rows = QuizAttempt.objects.values_list(*METRICS).iterator(chunk_size=chunk_size)
+    for values in rows:
+        for sketch, value in zip(sketches.values(), values):
+            sketch.add(value)
+    return sketches
+
+
+def summary(sketch, digits=2):
+    """Count, percentiles and histogram of a sketch, as returned by the API"""
+    percentiles = {}
+    for percentile in PERCENTILES:
+        value = sketch.quantile(percentile / 100)
+        percentiles[f'p{percentile}'] = None if value is None else round(value, digits)
+    return {'count': sketch.count, 'percentiles': percentiles, 'histogram': sketch.histogram()}
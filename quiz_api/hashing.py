@@ -0,0 +1,63 @@
+"""
+Bounded executor for password hashing in the async auth views.
+
+PBKDF2 is deliberately slow (a few hundred milliseconds of CPU per hash).
+The async views run it on a small dedicated pool, so the event loop and
+the quiz reads it serves stay responsive during a login burst. At most
+``AUTH_HASHING_WORKERS`` hashes run at once and ``AUTH_HASHING_QUEUE`` more
+may wait. Anything beyond that is refused at once with
+``HashingPoolSaturated`` (the views answer 429 with ``Retry-After``),
+rather than queueing behind work the client will have given up on.
+
+Bulk imports (``import_users``) hash on a process pool sized to the
+machine instead, with ``hash_passwords`` as the per-chunk task.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+
+class HashingPoolSaturated(Exception):
+    pass
+
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+def _pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = settings.AUTH_HASHING_WORKERS
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='auth-hashing')
+            _slots = threading.BoundedSemaphore(workers + settings.AUTH_HASHING_QUEUE)
+    return _executor, _slots
+
+
+async def run_hashing(func, *args, **kwargs):
+    """Await ``func(*args, **kwargs)`` on the hashing pool, or raise HashingPoolSaturated"""
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise HashingPoolSaturated()
+    try:
+        return await sync_to_async(func, thread_sensitive=False, executor=executor)(*args, **kwargs)
+    finally:
+        slots.release()
+
+
+def init_hashing_process():
+    """ProcessPoolExecutor initializer: configure Django in a worker process"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quiz_project.settings')
+    django.setup()
+
+
+def hash_passwords(passwords):
+    """``make_password`` for each password; blank ones get an unusable password"""
+    return [make_password(password or None) for password in passwords]
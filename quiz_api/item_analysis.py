@@ -0,0 +1,208 @@
+"""
+Classical item analysis of the active question bank.
+
+Attempts are read in chunks as blocks of an answer matrix (attempts x
+questions, int32 choice ids, 0 where the question was not answered) built
+from the normalized ``AttemptAnswer`` rows. The statistics are accumulated
+with NumPy one block at a time, so memory is bounded by the chunk size
+rather than the number of attempts:
+
+* **p-value**: share of the attempts answering a question that got it right.
+* **point-biserial**: correlation between getting the question right and
+  the attempt's score on its *other* answered questions (the corrected
+  item-total correlation), so the item does not correlate with itself.
+* **per choice**: selection rate among the attempts answering the question,
+  and the same point-biserial for picking that choice. A working distractor
+  is picked by weaker attempts, so its value is negative.
+
+Questions an attempt did not answer (skipped, or not in its random subset)
+are left out of that question's statistics. Attempts that answered only one
+question have no rest score and only count towards p-values and selection
+rates.
+
+The analysis reads every answer row, so it is only run by
+``compute_item_analysis`` (e.g. nightly) and stored in
+``ItemAnalysisReport``; the admin endpoint serves the stored report and
+never computes it.
+"""
+import itertools
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .answer_key import get_answer_key
+from .models import AttemptAnswer, ItemAnalysisReport, Question, QuizAttempt
+
+REPORT_ID = 1
+
+# Rows per block when analyzing a matrix already in memory, which bounds the float temporaries
+BLOCK_ROWS = 50000
+
+
+def iter_answer_blocks(question_ids, chunk_size=5000):
+    """Yield the answer matrix ``chunk_size`` attempts at a time, one column per id in sorted ``question_ids``"""
+    columns = np.asarray(question_ids, dtype=np.int64)
+    last_id = 0
+    while True:
+        attempt_ids = list(
+            QuizAttempt.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size]
+        )
+        if not attempt_ids:
+            return
+        rows = np.asarray(attempt_ids, dtype=np.int64)
+        block = np.zeros((len(rows), len(columns)), dtype=np.int32)
+
+        answers = AttemptAnswer.objects.filter(
+            attempt_id__gte=attempt_ids[0], attempt_id__lte=attempt_ids[-1],
+            question_id__in=question_ids, choice_id__isnull=False,
+        ).values_list('attempt_id', 'question_id', 'choice_id')
+        flat = np.fromiter(itertools.chain.from_iterable(answers), dtype=np.int64)
+        if flat.size:
+            answer_attempts, answer_questions, answer_choices = flat.reshape(-1, 3).T
+            block[np.searchsorted(rows, answer_attempts), np.searchsorted(columns, answer_questions)] = answer_choices
+
+        yield block
+        last_id = attempt_ids[-1]
+
+
+def _point_biserial(count, selected_sum, rest_sum, rest_square_sum, n):
+    """Correlation of a 0/1 indicator with the rest score, from sufficient statistics"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = selected_sum / n
+        rest_mean = rest_sum / n
+        rest_variance = rest_square_sum / n - rest_mean ** 2
+        covariance = count / n - share * rest_mean
+        return covariance / np.sqrt(share * (1 - share) * rest_variance)
+
+
+def analyze_blocks(blocks, questions, correct_ids, choice_ids):
+    """Item and choice statistics accumulated over row blocks of the answer matrix
+
+    Only one block is held at a time. ``questions`` is the number of columns,
+    ``correct_ids`` holds the correct choice id of each column (0 if none)
+    and ``choice_ids`` is the sorted array of every choice id that may
+    appear. Returns a dict of per-column and per-choice arrays, plus the
+    number of attempts.
+    """
+    choices = len(choice_ids)
+    totals = {
+        'answered': np.zeros(questions), 'correct': np.zeros(questions),
+        'rest_n': np.zeros(questions), 'rest_correct': np.zeros(questions),
+        'rest_sum': np.zeros(questions), 'rest_square_sum': np.zeros(questions),
+        'rest_correct_sum': np.zeros(questions),
+        'selected': np.zeros(choices), 'rest_selected': np.zeros(choices),
+        'rest_selected_sum': np.zeros(choices),
+    }
+    attempts = 0
+
+    for block in blocks:
+        attempts += block.shape[0]
+        answered = block != 0
+        correct = (block == correct_ids) & answered
+        answered_count = answered.sum(axis=1)
+        correct_count = correct.sum(axis=1)
+
+        # Rest score: share correct among the attempt's other answered questions
+        has_rest = answered & (answered_count > 1)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rest = (correct_count[:, None] - correct) / (answered_count[:, None] - 1)
+        rest = np.where(has_rest, rest, 0.0)
+
+        totals['answered'] += answered.sum(axis=0)
+        totals['correct'] += correct.sum(axis=0)
+        totals['rest_n'] += has_rest.sum(axis=0)
+        totals['rest_correct'] += (correct & has_rest).sum(axis=0)
+        totals['rest_sum'] += rest.sum(axis=0)
+        totals['rest_square_sum'] += (rest ** 2).sum(axis=0)
+        totals['rest_correct_sum'] += (rest * correct).sum(axis=0)
+
+        choice_index = np.searchsorted(choice_ids, block[answered])
+        totals['selected'] += np.bincount(choice_index, minlength=choices)
+        rest_index = np.searchsorted(choice_ids, block[has_rest])
+        totals['rest_selected'] += np.bincount(rest_index, minlength=choices)
+        totals['rest_selected_sum'] += np.bincount(rest_index, weights=rest[has_rest], minlength=choices)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p_values = totals['correct'] / totals['answered']
+    point_biserial = _point_biserial(
+        totals['rest_correct_sum'], totals['rest_correct'],
+        totals['rest_sum'], totals['rest_square_sum'], totals['rest_n'],
+    )
+    return {**totals, 'attempts': attempts, 'p_value': p_values, 'point_biserial': point_biserial}
+
+
+def analyze_matrix(matrix, correct_ids, choice_ids):
+    """``analyze_blocks`` over an answer matrix already in memory"""
+    blocks = (matrix[start:start + BLOCK_ROWS] for start in range(0, matrix.shape[0], BLOCK_ROWS))
+    return analyze_blocks(blocks, matrix.shape[1], correct_ids, choice_ids)
+
+
+def _number(value, digits=4):
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
+
+
+def compute_report(chunk_size=5000):
+    """Run the analysis over every attempt; returns (attempt_count, per-question list)"""
+    answer_key = get_answer_key()
+    question_keys = sorted(answer_key.questions.values(), key=lambda question: question.id)
+    question_ids = [question.id for question in question_keys]
+    correct_ids = np.array([question.correct_choice_id or 0 for question in question_keys], dtype=np.int32)
+    choice_ids = np.array(sorted(answer_key.choice_lookup), dtype=np.int32)
+    difficulties = dict(Question.objects.filter(id__in=question_ids).values_list('id', 'difficulty'))
+
+    blocks = iter_answer_blocks(question_ids, chunk_size=chunk_size)
+    stats = analyze_blocks(blocks, len(question_ids), correct_ids, choice_ids)
+
+    # Column of each choice's question, for the per-choice point-biserial
+    column_of_choice = np.searchsorted(
+        np.asarray(question_ids), [answer_key.choice_lookup[choice_id][0] for choice_id in choice_ids.tolist()]
+    )
+    choice_point_biserial = _point_biserial(
+        stats['rest_selected_sum'], stats['rest_selected'],
+        stats['rest_sum'][column_of_choice], stats['rest_square_sum'][column_of_choice],
+        stats['rest_n'][column_of_choice],
+    )
+    choice_position = {choice_id: i for i, choice_id in enumerate(choice_ids.tolist())}
+
+    report = []
+    for column, question in enumerate(question_keys):
+        answered = int(stats['answered'][column])
+        choices = []
+        for choice_id, (text, is_correct) in question.choices.items():
+            i = choice_position[choice_id]
+            choices.append({
+                'choice_id': choice_id,
+                'text': text,
+                'is_correct': is_correct,
+                'selected': int(stats['selected'][i]),
+                'selection_rate': _number(stats['selected'][i] / answered) if answered else None,
+                'point_biserial': _number(choice_point_biserial[i]),
+            })
+        report.append({
+            'question_id': question.id,
+            'question_text': question.text,
+            'difficulty': difficulties.get(question.id),
+            'responses': answered,
+            'p_value': _number(stats['p_value'][column]),
+            'point_biserial': _number(stats['point_biserial'][column]),
+            'choices': choices,
+        })
+    return stats['attempts'], report
+
+
+def refresh_report(chunk_size=5000):
+    """Compute the analysis and store it as the current report"""
+    attempt_count, questions = compute_report(chunk_size=chunk_size)
+    with transaction.atomic():
+        report, _ = ItemAnalysisReport.objects.update_or_create(
+            pk=REPORT_ID,
+            defaults={'computed_at': timezone.now(), 'attempt_count': attempt_count, 'questions': questions},
+        )
+    return report
+
+
+def get_report():
+    """The stored report, or None if the analysis has not been run yet"""
+    return ItemAnalysisReport.objects.filter(pk=REPORT_ID).first()
@@ -0,0 +1,175 @@
+"""
+Leaderboard of each participant's best attempt.
+
+``LeaderboardEntry`` holds every participant's best percentage and
+``ScoreBucket`` a histogram of those bests in 0.1% buckets. Both are
+updated in the transaction that saves attempts (see ``save_attempts``). A
+rank is the sum of the bucket counts above the participant's bucket (at
+most ``MAX_BUCKET`` small rows) plus an indexed count of the entries ahead
+of them in their own bucket, so rank lookups never touch ``QuizAttempt``.
+
+Participants are keyed like attempt limits (``limits.participant_key``);
+anonymous attempts without a session id are not ranked. Deleting a user
+nulls ``QuizAttempt.user``, so their attempts are ranked under their
+session ids from then on, as ``rebuild_leaderboard`` would rank them.
+"""
+import math
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .limits import attempt_participant
+from .models import LeaderboardEntry, QuizAttempt, ScoreBucket
+
+BUCKETS_PER_POINT = 10
+MAX_BUCKET = 100 * BUCKETS_PER_POINT
+
+ENTRY_FIELDS = ['username', 'best_percentage', 'best_time_taken', 'bucket', 'achieved_at']
+
+
+def score_bucket(percentage):
+    return max(0, min(MAX_BUCKET, math.floor(percentage * BUCKETS_PER_POINT + 1e-9)))
+
+
+def _beats(attempt, entry):
+    """Whether ``attempt`` is better than the entry's best: higher score, then faster"""
+    if entry.best_percentage is None:
+        return True
+    return (attempt.percentage, -attempt.time_taken) > (entry.best_percentage, -entry.best_time_taken)
+
+
+def _holds_best(attempt, entry):
+    """Whether ``attempt`` is (or ties exactly with) the attempt behind the entry's best"""
+    return (attempt.percentage, attempt.time_taken, attempt.completed_at) == (
+        entry.best_percentage, entry.best_time_taken, entry.achieved_at
+    )
+
+
+def _set_best(entry, attempt):
+    entry.username = attempt.username or ''
+    entry.best_percentage = attempt.percentage
+    entry.best_time_taken = attempt.time_taken
+    entry.bucket = score_bucket(attempt.percentage)
+    entry.achieved_at = attempt.completed_at
+
+
+def _lock_entries(keys):
+    # Fixed lock order so concurrent batches can't deadlock on each other
+    entries = LeaderboardEntry.objects.select_for_update().filter(participant__in=keys).order_by('participant')
+    return {entry.participant: entry for entry in entries}
+
+
+def apply_bucket_deltas(deltas):
+    """Atomically add ``deltas`` ({bucket: change}) to the histogram"""
+    for bucket in sorted(deltas):
+        delta = deltas[bucket]
+        if not delta:
+            continue
+        if ScoreBucket.objects.filter(pk=bucket).update(count=F('count') + delta):
+            continue
+        with transaction.atomic():
+            ScoreBucket.objects.get_or_create(pk=bucket)
+            ScoreBucket.objects.filter(pk=bucket).update(count=F('count') + delta)
+
+
+def record_attempts(attempts):
+    """Raise participants' bests (and the histogram) for newly saved attempts"""
+    best = {}
+    for attempt in attempts:
+        key = attempt_participant(attempt)
+        if key is None:
+            continue
+        current = best.get(key)
+        if current is None or (attempt.percentage, -attempt.time_taken) > (current.percentage, -current.time_taken):
+            best[key] = attempt
+    if not best:
+        return
+
+    with transaction.atomic():
+        entries = _lock_entries(list(best))
+        missing = [key for key in best if key not in entries]
+        if missing:
+            # Placeholders; rows another transaction created meanwhile are kept
+            LeaderboardEntry.objects.bulk_create(
+                [LeaderboardEntry(participant=key) for key in missing], ignore_conflicts=True
+            )
+            entries.update(_lock_entries(missing))
+
+        deltas = Counter()
+        changed = []
+        for key, attempt in best.items():
+            entry = entries[key]
+            if not _beats(attempt, entry):
+                continue
+            if entry.bucket is not None:
+                deltas[entry.bucket] -= 1
+            _set_best(entry, attempt)
+            deltas[entry.bucket] += 1
+            changed.append(entry)
+
+        LeaderboardEntry.objects.bulk_update(changed, ENTRY_FIELDS, batch_size=500)
+        apply_bucket_deltas(deltas)
+
+
+def participant_attempts(attempt):
+    """Every attempt by the participant who made ``attempt``"""
+    if attempt.user_id is not None:
+        return QuizAttempt.objects.filter(user_id=attempt.user_id)
+    return QuizAttempt.objects.filter(user__isnull=True, user_session=attempt.user_session)
+
+
+def forget_attempts(attempts):
+    """Recompute the bests that deleted attempts held"""
+    for attempt in attempts:
+        key = attempt_participant(attempt)
+        if key is None:
+            continue
+        with transaction.atomic():
+            entry = _lock_entries([key]).get(key)
+            # Any other attempt leaves the best, and so the ranks, unchanged
+            if entry is None or not _holds_best(attempt, entry):
+                continue
+            deltas = Counter({entry.bucket: -1})
+            remaining = participant_attempts(attempt).order_by('-percentage', 'time_taken', 'completed_at').first()
+            if remaining is None:
+                entry.delete()
+            else:
+                _set_best(entry, remaining)
+                entry.save(update_fields=ENTRY_FIELDS)
+                deltas[entry.bucket] += 1
+            apply_bucket_deltas(deltas)
+
+
+def forget_participant(key):
+    """Drop a participant's entry, e.g. for a deleted user"""
+    with transaction.atomic():
+        entry = _lock_entries([key]).get(key)
+        if entry is None:
+            return
+        entry.delete()
+        if entry.bucket is not None:
+            apply_bucket_deltas({entry.bucket: -1})
+
+
+def top_entries(limit):
+    """The ``limit`` best participants with competition ranks (ties share a rank)"""
+    entries = list(LeaderboardEntry.objects.order_by('-best_percentage', 'best_time_taken', 'achieved_at')[:limit])
+    ranked = []
+    for position, entry in enumerate(entries, start=1):
+        if ranked and ranked[-1][1].best_percentage == entry.best_percentage:
+            ranked.append((ranked[-1][0], entry))
+        else:
+            ranked.append((position, entry))
+    return ranked
+
+
+def rank_of(entry):
+    """1 + the number of participants with a strictly higher best percentage"""
+    higher = ScoreBucket.objects.filter(bucket__gt=entry.bucket).aggregate(total=Sum('count'))['total'] or 0
+    ahead = LeaderboardEntry.objects.filter(bucket=entry.bucket, best_percentage__gt=entry.best_percentage).count()
+    return higher + ahead + 1
+
+
+def participant_count():
+    return ScoreBucket.objects.aggregate(total=Sum('count'))['total'] or 0
@@ -0,0 +1,66 @@
+"""
+Enforcement of ``QuizConfig.max_attempts``.
+
+Each participant has an ``AttemptCounter`` row. Submitting reserves an
+attempt with a conditional ``UPDATE ... SET count = count + 1 WHERE count <
+max`` on that row, in the same transaction as the attempt insert. The
+database serializes concurrent updates of one row and re-checks the
+condition, so a participant submitting in parallel can never go over the
+limit, and enforcement costs one indexed write instead of a ``COUNT(*)``.
+"""
+from django.db.models import F
+
+from .models import AttemptCounter
+
+ANONYMOUS_SESSION = 'anonymous'
+
+
+class AttemptLimitExceeded(Exception):
+    pass
+
+
+def participant_key(user_id=None, user_session=ANONYMOUS_SESSION):
+    """Counter key for a submission, or None if the submitter can't be told apart"""
+    if user_id is not None:
+        return f'user:{user_id}'
+    if user_session and user_session != ANONYMOUS_SESSION:
+        return f'session:{user_session}'
+    return None
+
+
+def attempt_participant(attempt):
+    return participant_key(attempt.user_id, attempt.user_session)
+
+
+def reserve_attempt(attempt, max_attempts):
+    """Count ``attempt`` against its participant's limit (0 means unlimited)
+
+    Must run inside the transaction that saves the attempt so the
+    reservation is rolled back with it; spooled attempts are reserved first
+    and given back if the spool write fails. Raises AttemptLimitExceeded
+    when the participant has already used ``max_attempts``.
+    """
+    key = attempt_participant(attempt)
+    if key is None:
+        return
+    counters = AttemptCounter.objects.filter(participant=key)
+    if max_attempts:
+        counters = counters.filter(count__lt=max_attempts)
+    if counters.update(count=F('count') + 1):
+        return
+
+    # Either the participant's first attempt or the limit is reached
+    AttemptCounter.objects.get_or_create(participant=key)
+    if counters.update(count=F('count') + 1):
+        return
+    raise AttemptLimitExceeded(key)
+
+
+def release_attempts(attempts):
+    """Give back the reservations of deleted attempts"""
+    for attempt in attempts:
+        key = attempt_participant(attempt)
+        if key is not None:
+            AttemptCounter.objects.filter(participant=key, count__gt=0).update(
+                count=F('count') - 1
+            )
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from quiz_api.models import Choice, QuizAttempt, AttemptAnswer
+from quiz_api.attempts import answer_rows
+
+
+class Command(BaseCommand):
+    help = 'Fill the normalized AttemptAnswer table from existing QuizAttempt.user_answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Attempts processed per transaction',
+        )
+        parser.add_argument(
+            '--start-id',
+            type=int,
+            default=0,
+            help='Resume after this attempt id',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id = options['start_id']
+
+        # Include inactive questions so historical answers are kept
+        choice_lookup = {
+            choice_id: (question_id, is_correct)
+            for choice_id, question_id, is_correct
+            in Choice.objects.values_list('id', 'question_id', 'is_correct')
+        }
+
+        processed = 0
+        created = 0
+        while True:
+            attempts = list(
+                QuizAttempt.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'user_answers')[:chunk_size]
+            )
+            if not attempts:
+                break
+
+            rows = [row for attempt in attempts for row in answer_rows(attempt, choice_lookup)]
+            with transaction.atomic():
+                # Re-running is safe: existing (attempt, question) rows are left alone
+                AttemptAnswer.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+            processed += len(attempts)
+            created += len(rows)
+            last_id = attempts[-1].id
+            self.stdout.write(f'Processed {processed} attempts (last id {last_id})')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {created} answers from {processed} attempts'
+        ))
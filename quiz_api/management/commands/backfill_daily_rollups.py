@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from django.utils.dateparse import parse_date
+from quiz_api.models import DailyAttemptRollup
+from quiz_api.rollups import ROLLUP_FIELDS, compute_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the daily attempt rollups from QuizAttempt, or repair drifted days. '
+        'Run flush_outbox first when write-behind is enabled, or spooled attempts are not counted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='First day to recompute (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', help='Last day to recompute (YYYY-MM-DD)')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing the recomputed rollups',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = self.parse_day(options['start'], '--from')
+        end = self.parse_day(options['end'], '--to')
+
+        with transaction.atomic():
+            # Lock the rows first so submissions committing meanwhile are applied on top of the rebuild
+            stored_rows = DailyAttemptRollup.objects.select_for_update()
+            if start:
+                stored_rows = stored_rows.filter(day__gte=start)
+            if end:
+                stored_rows = stored_rows.filter(day__lte=end)
+            stored = {row.day: row for row in stored_rows}
+            expected = compute_rollups(start, end)
+
+            changed = []
+            for day, row in stored.items():
+                totals = expected.get(day, dict.fromkeys(ROLLUP_FIELDS, 0))
+                if any(abs(getattr(row, field) - totals[field]) > 1e-6 for field in ROLLUP_FIELDS):
+                    for field in ROLLUP_FIELDS:
+                        setattr(row, field, totals[field])
+                    changed.append(row)
+            missing = {day: totals for day, totals in expected.items() if day not in stored}
+
+            if not (changed or missing):
+                self.stdout.write(self.style.SUCCESS(f'Daily rollups are consistent ({len(stored)} days)'))
+                return
+
+            self.stdout.write(self.style.WARNING(f'{len(changed)} days drifted, {len(missing)} missing'))
+            if options['dry_run']:
+                self.stdout.write('Dry run: rollups left unchanged')
+                return
+
+            DailyAttemptRollup.objects.bulk_update(changed, ROLLUP_FIELDS, batch_size=options['batch_size'])
+            # A submission may create a missing day's row before this insert; keep
+            # that row and add the recomputed totals to it instead of failing
+            DailyAttemptRollup.objects.bulk_create(
+                [DailyAttemptRollup(day=day) for day in sorted(missing)],
+                batch_size=options['batch_size'],
+                ignore_conflicts=True,
+            )
+            for day in sorted(missing):
+                DailyAttemptRollup.objects.filter(day=day).update(
+                    **{field: F(field) + value for field, value in missing[day].items()}
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'Daily rollups rebuilt ({len(changed) + len(missing)} days written)'))
+
+    def parse_day(self, value, option):
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise CommandError(f'{option} must be a date (YYYY-MM-DD)')
+        return day
@@ -0,0 +1,94 @@
+from collections import Counter
+from importlib import reload
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import clear_url_caches
+from quiz_api.benchmarking import benchmark_database, summarize
+import asyncio
+import time
+
+READ_PATH = '/api/quiz/config/'
+PASSWORD = 'storm-password-1'
+
+
+def reload_urls():
+    import quiz_api.urls
+    import quiz_project.urls
+    reload(quiz_api.urls)
+    reload(quiz_project.urls)
+    clear_url_caches()
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire a burst of concurrent logins through the ASGI handler and measure how read latency '
+        'holds up, with the sync auth views and with the async views on the bounded hashing pool'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=60, help='Concurrent login requests in the storm')
+        parser.add_argument('--reads', type=int, default=100, help='Baseline reads before the storm')
+        parser.add_argument(
+            '--mode',
+            choices=['sync', 'async', 'both'],
+            default='both',
+            help='Which auth views to benchmark',
+        )
+
+    def handle(self, *args, **options):
+        modes = ['sync', 'async'] if options['mode'] == 'both' else [options['mode']]
+        with benchmark_database():
+            users = [f'storm{i}' for i in range(options['logins'])]
+            hashed = make_password(PASSWORD)
+            User.objects.bulk_create([User(username=username, password=hashed) for username in users])
+
+            try:
+                for mode in modes:
+                    with override_settings(ASYNC_AUTH_VIEWS=mode == 'async'):
+                        reload_urls()
+                        result = asyncio.run(self.storm(users, options['reads']))
+                    self.report(mode, result)
+            finally:
+                reload_urls()
+
+    async def storm(self, users, reads):
+        client = AsyncClient()
+
+        async def timed_read():
+            start = time.perf_counter()
+            response = await client.get(READ_PATH)
+            assert response.status_code == 200, response.status_code
+            return time.perf_counter() - start
+
+        baseline = [await timed_read() for _ in range(reads)]
+
+        statuses = Counter()
+
+        async def login(username):
+            response = await client.post(
+                '/api/auth/login/', {'username': username, 'password': PASSWORD}, content_type='application/json'
+            )
+            statuses[response.status_code] += 1
+
+        started = time.perf_counter()
+        logins = asyncio.gather(*(login(username) for username in users))
+        during = []
+        # Keep reading (one request at a time) until every login has answered
+        while not logins.done() or not during:
+            during.append(await timed_read())
+            await asyncio.sleep(0)
+        await logins
+        return baseline, during, statuses, time.perf_counter() - started
+
+    def report(self, mode, result):
+        baseline, during, statuses, elapsed = result
+        before = summarize(baseline)
+        storm = summarize(during)
+        self.stdout.write(f'{mode} auth views: {sum(statuses.values())} logins in {elapsed:.1f}s, status {dict(statuses)}')
+        self.stdout.write(f"  reads before storm  p50 {before['p50_ms']:>9} ms  p95 {before['p95_ms']:>9} ms")
+        self.stdout.write(
+            f"  reads during storm  p50 {storm['p50_ms']:>9} ms  p95 {storm['p95_ms']:>9} ms  ({storm['count']} reads)"
+        )
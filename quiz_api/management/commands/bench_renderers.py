@@ -0,0 +1,116 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from quiz_api.benchmarking import benchmark_database
+from quiz_api.config import load_config
+from quiz_api.models import Question
+from quiz_api.parsers import FastJSONParser
+from quiz_api.renderers import FastJSONRenderer, orjson
+from quiz_api.seeding import answer_sheet, create_attempts, create_question_bank
+from quiz_api.serializers import QuestionSerializer
+import io
+import itertools
+import json
+import random
+import time
+
+
+def cpu_per_call(func, iterations):
+    """Mean CPU time of ``func`` in microseconds"""
+    func()
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the CPU spent rendering and parsing JSON on the largest responses, '
+        "with DRF's stdlib JSONRenderer/JSONParser and the orjson-backed FastJSONRenderer/FastJSONParser"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=200, help='Size of the question bank')
+        parser.add_argument('--attempts', type=int, default=2000, help='Attempts seeded for the listing')
+        parser.add_argument('--page-size', type=int, default=1000, help='limit= for the attempts listing')
+        parser.add_argument('--iterations', type=int, default=200, help='Renders (and requests) timed per case')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; both variants use the stdlib'))
+        iterations = options['iterations']
+
+        with benchmark_database():
+            rng = random.Random(options['seed'])
+            create_question_bank(options['questions'], rng=rng)
+            create_attempts(options['attempts'], rng=rng)
+            # Every submission comes from the same user; lift the limit so none is rejected
+            quiz_config = load_config()
+            quiz_config.max_attempts = 0
+            quiz_config.save()
+            staff = User.objects.create_user('benchmark', password='unused', is_staff=True)
+            client = APIClient()
+            client.force_authenticate(staff)
+            answers = {str(question_id): choice_id for question_id, choice_id in answer_sheet(0.7, rng=rng).items()}
+            submissions = itertools.count()
+
+            def submit():
+                body = {'answers': answers, 'session_id': f'bench-{next(submissions)}'}
+                response = client.post('/api/quiz/submit/', body, format='json')
+                if response.status_code != 200:
+                    raise CommandError(f'submit returned {response.status_code}')
+                return response
+
+            cases = [
+                # The full list is rendered once per question bank version, not per request
+                ('questions (full list, per bank version)', None, None),
+                (
+                    'questions ?count=',
+                    None,
+                    lambda: client.get('/api/quiz/', {'count': options['questions']}),
+                ),
+                ('submit results', json.dumps({'answers': answers, 'session_id': 'bench'}).encode(), submit),
+                (
+                    'attempts listing',
+                    None,
+                    lambda: client.get('/api/admin/attempts/', {'limit': options['page_size']}),
+                ),
+            ]
+
+            self.stdout.write(
+                f"{'case':<40} {'body KB':>8} {'stdlib µs':>10} {'orjson µs':>10} "
+                f"{'saved µs':>9} {'request µs':>11} {'saved':>6}"
+            )
+            for name, request_body, request in cases:
+                if request is None:
+                    questions = Question.objects.filter(is_active=True).order_by('id').prefetch_related('choices')
+                    data = QuestionSerializer(questions, many=True).data
+                    request_cpu = None
+                else:
+                    response = request()
+                    if response.status_code >= 400:
+                        raise CommandError(f'{name} returned {response.status_code}')
+                    data = response.data
+                    request_cpu = cpu_per_call(request, max(1, iterations // 10))
+
+                stdlib = cpu_per_call(lambda: JSONRenderer().render(data), iterations)
+                fast = cpu_per_call(lambda: FastJSONRenderer().render(data), iterations)
+                if request_body is not None:
+                    # Submissions also parse a body with one answer per question
+                    stdlib += cpu_per_call(lambda: JSONParser().parse(io.BytesIO(request_body)), iterations)
+                    fast += cpu_per_call(lambda: FastJSONParser().parse(io.BytesIO(request_body)), iterations)
+
+                size = len(JSONRenderer().render(data)) / 1024
+                saved = stdlib - fast
+                if request_cpu is None:
+                    request_columns = f"{'-':>11} {'-':>6}"
+                else:
+                    # Share of the request's CPU with the stdlib renderer
+                    request_columns = f'{request_cpu:>11.0f} {saved / (request_cpu + saved):>6.1%}'
+                self.stdout.write(
+                    f'{name:<40} {size:>8.1f} {stdlib:>10.0f} {fast:>10.0f} {saved:>9.0f} {request_columns}'
+                )
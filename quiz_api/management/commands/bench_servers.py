@@ -0,0 +1,186 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from quiz_api.benchmarking import summarize
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ENDPOINTS = {
+    'config': ('GET', '/api/quiz/config/'),
+    'questions': ('GET', '/api/quiz/'),
+    'submit': ('POST', '/api/quiz/submit/'),
+}
+
+SERVERS = {
+    # WSGI with the sync DRF views
+    'gunicorn': lambda workers, port: [
+        '-m', 'gunicorn', 'quiz_project.wsgi:application',
+        '--workers', str(workers), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+    ],
+    # ASGI; asgi.py switches on the async views
+    'uvicorn': lambda workers, port: [
+        '-m', 'uvicorn', 'quiz_project.asgi:application',
+        '--workers', str(workers), '--host', '127.0.0.1', '--port', str(port),
+        '--log-level', 'warning', '--no-access-log',
+    ],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests per second and latency of the quiz endpoints under gunicorn (WSGI, sync '
+        'views) and uvicorn (ASGI, async views), with the same worker count and client concurrency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Server worker processes')
+        parser.add_argument('--connections', type=int, default=16, help='Concurrent client connections')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per endpoint')
+        parser.add_argument('--servers', default='gunicorn,uvicorn', help='Comma-separated servers to run')
+        parser.add_argument(
+            '--endpoints',
+            default='config,questions,submit',
+            help=f"Comma-separated endpoints ({', '.join(ENDPOINTS)})",
+        )
+        parser.add_argument('--port', type=int, default=8765, help='Port the servers listen on')
+        parser.add_argument(
+            '--database-url',
+            help='Migrated and seeded database to serve (submissions are written to it); '
+                 'default is a scratch SQLite file',
+        )
+
+    def handle(self, *args, **options):
+        servers = [name.strip() for name in options['servers'].split(',') if name.strip()]
+        endpoints = [name.strip() for name in options['endpoints'].split(',') if name.strip()]
+        for name in servers:
+            if name not in SERVERS:
+                raise CommandError(f'Unknown server {name!r}')
+            if importlib.util.find_spec(name) is None:
+                raise CommandError(f'{name} is not installed (pip install -r requirements.txt)')
+        for name in endpoints:
+            if name not in ENDPOINTS:
+                raise CommandError(f'Unknown endpoint {name!r}')
+
+        with tempfile.TemporaryDirectory(prefix='bench-servers-') as scratch:
+            env = os.environ.copy()
+            # Each server decides sync vs async views for itself
+            env.pop('QUIZ_ASGI', None)
+            env.update({'DEBUG': 'False', 'PERFORMANCE_INSTRUMENTATION': 'False', 'QUIZ_WRITE_BEHIND': 'False'})
+            if options['database_url']:
+                env['DATABASE_URL'] = options['database_url']
+            else:
+                env['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch, 'bench.sqlite3')}"
+                self.stdout.write('Seeding a scratch SQLite database...')
+                for command in (['migrate', '-v', '0'], ['populate_mock_data', '--attempts', '200']):
+                    self.manage(command, env)
+
+            self.stdout.write(
+                f"{options['workers']} workers, {options['connections']} connections, "
+                f"{options['duration']:.0f}s per endpoint"
+            )
+            for server in servers:
+                process = subprocess.Popen(
+                    [sys.executable, *SERVERS[server](options['workers'], options['port'])],
+                    cwd=settings.BASE_DIR, env=env,
+                )
+                try:
+                    self.wait_until_ready(options['port'], process)
+                    answers = self.answer_sheet(options['port'])
+                    for endpoint in endpoints:
+                        result = self.load(options['port'], endpoint, answers, options['connections'], options['duration'])
+                        self.report(server, endpoint, result)
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+
+    def manage(self, command, env):
+        subprocess.run(
+            [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), *command],
+            env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+
+    def request(self, connection, method, path, body=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        return response.status, response.read()
+
+    def wait_until_ready(self, port, process, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'Server exited with status {process.returncode}')
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+                status, _ = self.request(connection, 'GET', ENDPOINTS['config'][1])
+                connection.close()
+                if status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise CommandError(f'Server did not answer on port {port} within {timeout}s')
+
+    def answer_sheet(self, port):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        status, body = self.request(connection, 'GET', ENDPOINTS['questions'][1])
+        connection.close()
+        if status != 200:
+            raise CommandError(f'GET /api/quiz/ returned {status}')
+        return {
+            str(question['id']): question['choices'][0]['id']
+            for question in json.loads(body) if question['choices']
+        }
+
+    def load(self, port, endpoint, answers, connections, duration):
+        method, path = ENDPOINTS[endpoint]
+        body = json.dumps({'answers': answers, 'time_taken': 60}) if method == 'POST' else None
+
+        def client(deadline):
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            samples, statuses = [], Counter()
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    status, _ = self.request(connection, method, path, body)
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    statuses['error'] += 1
+                    continue
+                statuses[status] += 1
+                if status == 200:
+                    samples.append(time.perf_counter() - start)
+            connection.close()
+            return samples, statuses
+
+        # Short warm-up so process-local caches are filled in every worker
+        with ThreadPoolExecutor(connections) as pool:
+            list(pool.map(client, [time.monotonic() + 1] * connections))
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(connections) as pool:
+            results = list(pool.map(client, [started + duration] * connections))
+        elapsed = time.monotonic() - started
+
+        samples = [sample for client_samples, _ in results for sample in client_samples]
+        statuses = sum((client_statuses for _, client_statuses in results), Counter())
+        return samples, statuses, elapsed
+
+    def report(self, server, endpoint, result):
+        samples, statuses, elapsed = result
+        stats = summarize(samples)
+        failures = {status: count for status, count in statuses.items() if status != 200}
+        line = (
+            f"{server:<9} {endpoint:<10} {len(samples) / elapsed:>8.1f} req/s  "
+            f"p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms"
+        )
+        if failures:
+            line += f'  failures {failures}'
+        self.stdout.write(line)
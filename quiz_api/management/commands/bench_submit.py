@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from quiz_api.models import Question, Choice, QuizAttempt
+from quiz_api.answer_key import get_answer_key
+from quiz_api.benchmarking import benchmark_database, summarize, time_calls
+from quiz_api.seeding import create_question_bank, answer_sheet
+import random
+
+
+def legacy_grade(user_answers):
+    """Per-question grading loop used by submit_quiz_answers before the answer key"""
+    score = 0
+    total_points = 0
+    results = []
+    questions = Question.objects.filter(is_active=True)
+
+    for question in questions:
+        choice_id = user_answers.get(str(question.id))
+        total_points += question.points
+
+        try:
+            selected_choice = Choice.objects.get(id=choice_id) if choice_id else None
+            correct_choice = Choice.objects.get(question=question, is_correct=True)
+
+            is_correct = selected_choice and selected_choice.is_correct
+            if is_correct:
+                score += question.points
+
+            results.append({
+                'question_id': question.id,
+                'is_correct': is_correct,
+                'correct_answer_id': correct_choice.id,
+            })
+        except (Choice.DoesNotExist, ValueError):
+            results.append({'question_id': question.id, 'is_correct': False})
+
+    return score, total_points, len(questions)
+
+
+def answer_key_grade(user_answers):
+    graded = get_answer_key().grade(user_answers)
+    return graded.score, graded.total_points, graded.total_questions
+
+
+class Command(BaseCommand):
+    help = 'Compare submissions per second for legacy grading and the compiled answer key'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=200, help='Size of the question bank')
+        parser.add_argument('--iterations', type=int, default=50, help='Submissions timed per variant')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            rng = random.Random(options['seed'])
+            create_question_bank(options['questions'], rng=rng)
+            user_answers = answer_sheet(0.7, rng=rng)
+
+            for label, grade in [('legacy', legacy_grade), ('answer key', answer_key_grade)]:
+                def submit():
+                    score, total_points, total_questions = grade(user_answers)
+                    QuizAttempt.objects.create(
+                        user_session='bench',
+                        score=score,
+                        total_questions=total_questions,
+                        percentage=(score / total_points * 100) if total_points else 0,
+                        user_answers=user_answers,
+                    )
+
+                stats = summarize(time_calls(submit, options['iterations']))
+                with CaptureQueriesContext(connection) as queries:
+                    submit()
+                self.stdout.write(
+                    f"{label:>10}: {stats['per_second']:>8} submissions/s  "
+                    f"p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  "
+                    f"{len(queries)} queries/submission"
+                )
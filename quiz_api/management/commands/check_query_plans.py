@@ -0,0 +1,125 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from quiz_api.answer_key import get_answer_key
+from quiz_api.benchmarking import benchmark_database
+from quiz_api.seeding import create_question_bank, create_attempts
+import random
+import re
+
+# Endpoint requests whose queries are explained: (label, method, path, params)
+ENDPOINTS = [
+    ('quiz config', 'get', '/api/quiz/config/', None),
+    ('quiz questions', 'get', '/api/quiz/', None),
+    ('quiz question subset', 'get', '/api/quiz/', {'count': 10, 'difficulty': 'hard'}),
+    ('submit', 'post', '/api/quiz/submit/', 'answers'),
+    ('leaderboard', 'get', '/api/leaderboard/', None),
+    # The staff user ranks through the attempt submitted above
+    ('my rank', 'get', '/api/leaderboard/me/', None),
+    ('attempts page', 'get', '/api/admin/attempts/', {'limit': 50}),
+    ('attempts next page', 'get', '/api/admin/attempts/', 'cursor'),
+    ('quiz stats', 'get', '/api/admin/stats/', None),
+    ('stats timeseries', 'get', '/api/admin/stats/timeseries/', {'bucket': 'week'}),
+    ('question stats', 'get', '/api/admin/question-stats/', None),
+]
+
+POSTGRES_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+SQLITE_SEQ_SCAN = re.compile(r'^SCAN (\w+)(?:\s+AS\s+\w+)?$')
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN every query issued by the API endpoints and fail on sequential scans of large tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=100, help='Questions to seed')
+        parser.add_argument('--attempts', type=int, default=5000, help='Attempts to seed')
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Tables with at least this many rows count as large',
+        )
+        parser.add_argument(
+            '--allow',
+            action='append',
+            default=[],
+            help='Table allowed to be scanned sequentially (repeatable)',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'Query plan checks are not implemented for {connection.vendor}')
+
+        with benchmark_database():
+            rng = random.Random(options['seed'])
+            create_question_bank(options['questions'], rng=rng)
+            create_attempts(options['attempts'], rng=rng)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            large_tables = self.large_tables(options['min_rows'])
+            self.stdout.write(f"Large tables: {', '.join(sorted(large_tables)) or 'none'}")
+
+            violations = []
+            for label, queries in self.capture_endpoint_queries():
+                for sql in queries:
+                    for table in self.sequential_scans(sql):
+                        if table in large_tables and table not in options['allow']:
+                            violations.append((label, table, sql))
+                self.stdout.write(f'{label}: {len(queries)} queries checked')
+
+        if violations:
+            for label, table, sql in violations:
+                self.stdout.write(self.style.ERROR(f'{label}: sequential scan on {table}\n    {sql}'))
+            raise CommandError(f'{len(violations)} sequential scans on large tables')
+
+        self.stdout.write(self.style.SUCCESS('No sequential scans on large tables'))
+
+    def large_tables(self, min_rows):
+        tables = []
+        with connection.cursor() as cursor:
+            for table in connection.introspection.table_names(cursor):
+                cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                if cursor.fetchone()[0] >= min_rows:
+                    tables.append(table)
+        return set(tables)
+
+    def capture_endpoint_queries(self):
+        staff = User.objects.create_user('plan_check', password='unused', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(staff)
+
+        answer_key = get_answer_key()
+        answers = {
+            str(question.id): question.correct_choice_id for question in answer_key.questions.values()
+        }
+        next_cursor = None
+
+        for label, method, path, params in ENDPOINTS:
+            if params == 'answers':
+                params = {'answers': answers, 'session_id': 'plan_check'}
+            elif params == 'cursor':
+                params = {'limit': 50, 'cursor': next_cursor}
+
+            with CaptureQueriesContext(connection) as captured:
+                response = getattr(client, method)(path, params, format='json' if method == 'post' else None)
+            if response.status_code >= 400:
+                raise CommandError(f'{label}: {method.upper()} {path} returned {response.status_code}')
+            if label == 'attempts page':
+                next_cursor = response.json()['next_cursor']
+
+            yield label, [
+                query['sql'] for query in captured.captured_queries
+                if query['sql'].lstrip().upper().startswith('SELECT')
+            ]
+
+    def sequential_scans(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN {sql}')
+                return [m.group(1) for (line,) in cursor.fetchall() for m in [POSTGRES_SEQ_SCAN.search(line)] if m]
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [m.group(1) for row in cursor.fetchall() for m in [SQLITE_SEQ_SCAN.match(row[-1])] if m]
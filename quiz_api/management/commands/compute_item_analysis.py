@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from quiz_api.item_analysis import refresh_report
+
+
+class Command(BaseCommand):
+    help = (
+        'Compute difficulty, point-biserial and distractor statistics for every active question '
+        'and store them for GET /api/admin/item-analysis/. Run periodically, e.g. nightly.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Attempts per answer-matrix block; only one block is held in memory',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        report = refresh_report(chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+
+        flagged = [
+            question['question_id'] for question in report.questions
+            if question['point_biserial'] is not None and question['point_biserial'] < 0.2
+        ]
+        self.stdout.write(self.style.SUCCESS(
+            f'Analyzed {len(report.questions)} questions over {report.attempt_count} attempts in {elapsed:.1f}s'
+        ))
+        if flagged:
+            self.stdout.write(self.style.WARNING(
+                f"Point-biserial below 0.2 (weak discrimination): questions {', '.join(map(str, flagged))}"
+            ))
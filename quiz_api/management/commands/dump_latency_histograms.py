@@ -0,0 +1,52 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from quiz_project.performance import BUCKET_BOUNDS_MS, delete_snapshots, load_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Merge and print the per-endpoint latency histograms written by every worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age',
+            type=float,
+            default=None,
+            help='Ignore worker snapshots older than this many seconds',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print raw merged histograms as JSON',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Delete the latency-*.json snapshots after printing them',
+        )
+
+    def handle(self, *args, **options):
+        directory = settings.PERFORMANCE_HISTOGRAM_DIR
+        histograms = load_snapshots(directory, max_age=options['max_age'])
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'bucket_bounds_ms': [str(bound) for bound in BUCKET_BOUNDS_MS],
+                'endpoints': {endpoint: h.to_dict() for endpoint, h in histograms.items()},
+            }, indent=2))
+        elif not histograms:
+            self.stdout.write(f'No latency snapshots in {directory}')
+        else:
+            self.stdout.write(f"{'endpoint':<45} {'count':>8} {'mean ms':>9} {'p50 ≤':>7} {'p95 ≤':>7} {'p99 ≤':>7}")
+            for endpoint, histogram in sorted(histograms.items(), key=lambda item: -item[1].count):
+                mean = histogram.total_ms / histogram.count if histogram.count else 0
+                self.stdout.write(
+                    f'{endpoint:<45} {histogram.count:>8} {mean:>9.2f} '
+                    f'{histogram.quantile(0.5):>7} {histogram.quantile(0.95):>7} {histogram.quantile(0.99):>7}'
+                )
+
+        if options['reset']:
+            # Only the latency-<pid>.json files; the directory may hold other files
+            self.stdout.write(f'{delete_snapshots(directory)} snapshots deleted')
@@ -0,0 +1,133 @@
+import csv
+import gzip
+import json
+import sys
+import time
+from datetime import datetime, time as dt_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from quiz_api.models import AttemptAnswer, Question, QuizAttempt
+
+ATTEMPT_COLUMNS = [
+    'id', 'user_id', 'username', 'user_session', 'score', 'total_questions',
+    'percentage', 'time_taken', 'completed_at',
+]
+
+
+class Command(BaseCommand):
+    help = 'Stream quiz attempts, with answers flattened per question, to CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            default='csv',
+            help='Output format',
+        )
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Output file path, or - for stdout',
+        )
+        parser.add_argument(
+            '--since',
+            help='Only export attempts completed at or after this ISO date/datetime',
+        )
+        parser.add_argument(
+            '--after-id',
+            type=int,
+            help='Only export attempts with a greater id (the last id reported by the previous run)',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Gzip-compress the output',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Rows fetched per round trip from the server-side cursor',
+        )
+
+    def handle(self, *args, **options):
+        attempts = QuizAttempt.objects.order_by('id')
+        since = self.parse_since(options['since'])
+        if since:
+            attempts = attempts.filter(completed_at__gte=since)
+        if options['after_id'] is not None:
+            attempts = attempts.filter(id__gt=options['after_id'])
+
+        rows = attempts.values_list(*ATTEMPT_COLUMNS, 'user_answers').iterator(
+            chunk_size=options['chunk_size']
+        )
+
+        stream = self.open_output(options['output'], options['gzip'])
+        started = time.perf_counter()
+        count = 0
+        last_id = None
+        try:
+            if options['format'] == 'csv':
+                question_ids = self.answer_columns(attempts)
+                writer = csv.writer(stream)
+                writer.writerow(ATTEMPT_COLUMNS + [f'q_{question_id}' for question_id in question_ids])
+                for row in rows:
+                    answers = row[-1] or {}
+                    writer.writerow(
+                        list(row[:8]) + [row[8].isoformat()]
+                        + [answers.get(str(question_id), '') for question_id in question_ids]
+                    )
+                    last_id = row[0]
+                    count += 1
+            else:
+                for row in rows:
+                    record = dict(zip(ATTEMPT_COLUMNS, row[:-1]))
+                    record['completed_at'] = record['completed_at'].isoformat()
+                    for question_id, choice_id in (row[-1] or {}).items():
+                        record[f'q_{question_id}'] = choice_id
+                    stream.write(json.dumps(record) + '\n')
+                    last_id = row[0]
+                    count += 1
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else 0
+        self.stderr.write(f'Exported {count} attempts in {elapsed:.1f}s ({rate:,.0f} rows/s)')
+        if last_id is not None:
+            self.stderr.write(f'Last id: {last_id} (use as --after-id next time)')
+
+    def answer_columns(self, attempts):
+        """Ids of the active questions and of the retired ones these attempts answered"""
+        # Not every question ever created, so rows don't grow with the bank's history
+        answered = AttemptAnswer.objects.filter(question=OuterRef('pk'), attempt__in=attempts.values('id'))
+        return list(
+            Question.objects.filter(Q(is_active=True) | Exists(answered)).order_by('id').values_list('id', flat=True)
+        )
+
+    def parse_since(self, value):
+        if not value:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f'Invalid --since value: {value}')
+            since = datetime.combine(day, dt_time.min)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def open_output(self, path, compress):
+        if path == '-':
+            if compress:
+                return gzip.open(sys.stdout.buffer, 'wt', newline='')
+            return sys.stdout
+        if compress:
+            return gzip.open(path, 'wt', newline='')
+        return open(path, 'w', newline='')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from quiz_api import outbox
+
+
+class Command(BaseCommand):
+    help = 'Drain the write-behind attempt outbox into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Attempts inserted per batch (defaults to QUIZ_OUTBOX_BATCH_SIZE)',
+        )
+
+    def handle(self, *args, **options):
+        pending = outbox.pending_count()
+        self.stdout.write(f'{pending} attempts waiting in the outbox')
+
+        dead_before = outbox.dead_letter_count()
+        inserted = outbox.flush(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Inserted {inserted} attempts; {outbox.pending_count()} remaining'
+        ))
+        dead = outbox.dead_letter_count() - dead_before
+        if dead:
+            self.stdout.write(self.style.WARNING(
+                f'{dead} attempts could not be inserted and were moved to attempt_outbox_dead'
+            ))
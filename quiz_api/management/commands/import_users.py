@@ -0,0 +1,162 @@
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from quiz_api.hashing import hash_passwords, init_hashing_process
+import csv
+import os
+import sys
+import time
+
+COLUMNS = ('username', 'email', 'password', 'first_name', 'last_name')
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-create users from a CSV file with a header row (username, and optionally email, '
+        'password, first_name, last_name). Passwords are hashed on a process pool; a blank password '
+        'gives an unusable one. Existing usernames and emails are skipped, so re-running is safe.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='CSV file to import (- for stdin)')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Hashing processes (default: one per CPU)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Users hashed and inserted per transaction',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file and report what would be imported',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = {'created': 0, 'existing': 0, 'duplicate': 0, 'invalid': 0}
+        self.seen_usernames = set()
+        self.seen_emails = set()
+
+        source = self.open_csv(options['csv_file'])
+        try:
+            reader = csv.DictReader(source)
+            if not reader.fieldnames or 'username' not in reader.fieldnames:
+                raise CommandError('The CSV file needs a header row with a username column')
+            unknown = set(reader.fieldnames) - set(COLUMNS)
+            if unknown:
+                raise CommandError(f"Unknown columns: {', '.join(sorted(unknown))}")
+
+            pool = None if options['dry_run'] else ProcessPoolExecutor(
+                max_workers=options['workers'], initializer=init_hashing_process
+            )
+            try:
+                batch = []
+                for line, row in enumerate(reader, start=2):
+                    user = self.build_user(row, line, counts)
+                    if user is not None:
+                        batch.append(user)
+                    if len(batch) >= options['batch_size']:
+                        self.import_batch(batch, pool, options, counts)
+                        batch = []
+                self.import_batch(batch, pool, options, counts)
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        elapsed = time.perf_counter() - started
+        verb = 'Would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {counts['created']} users in {elapsed:.1f}s "
+            f"(skipped {counts['existing']} existing, {counts['duplicate']} repeated in the file, "
+            f"{counts['invalid']} invalid)"
+        ))
+
+    def open_csv(self, path):
+        if path == '-':
+            return sys.stdin
+        try:
+            return open(path, newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+
+    def build_user(self, row, line, counts):
+        """Normalized unsaved User for a CSV row, or None if the row is skipped"""
+        # Same normalization as UserManager.create_user
+        username = User.normalize_username((row.get('username') or '').strip())
+        email = User.objects.normalize_email((row.get('email') or '').strip())
+        problem = None
+        if not username:
+            problem = 'missing username'
+        elif len(username) > User._meta.get_field('username').max_length:
+            problem = 'username too long'
+        elif len(email) > User._meta.get_field('email').max_length:
+            problem = 'email too long'
+        if problem:
+            counts['invalid'] += 1
+            self.stderr.write(f'Line {line}: {problem}, skipped')
+            return None
+
+        if username in self.seen_usernames or (email and email in self.seen_emails):
+            counts['duplicate'] += 1
+            return None
+        self.seen_usernames.add(username)
+        if email:
+            self.seen_emails.add(email)
+
+        user = User(
+            username=username,
+            email=email,
+            first_name=(row.get('first_name') or '').strip(),
+            last_name=(row.get('last_name') or '').strip(),
+        )
+        # Plain text until the batch is hashed
+        user.password = row.get('password') or ''
+        return user
+
+    def import_batch(self, users, pool, options, counts):
+        if not users:
+            return
+        # One lookup per batch for users that already exist, so they are not hashed
+        existing_usernames = set(
+            User.objects.filter(username__in=[user.username for user in users]).values_list('username', flat=True)
+        )
+        existing_emails = set(
+            User.objects.filter(email__in=[user.email for user in users if user.email]).values_list('email', flat=True)
+        )
+        new_users = [
+            user for user in users
+            if user.username not in existing_usernames and user.email not in existing_emails
+        ]
+        counts['existing'] += len(users) - len(new_users)
+        if options['dry_run'] or not new_users:
+            counts['created'] += len(new_users)
+            return
+
+        # A few chunks per worker keeps every process busy without one task per password
+        chunk_size = max(1, len(new_users) // (options['workers'] * 4))
+        passwords = [user.password for user in new_users]
+        chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+        hashed = [password for chunk in pool.map(hash_passwords, chunks) for password in chunk]
+        for user, password in zip(new_users, hashed):
+            user.password = password
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(new_users)
+        except IntegrityError as e:
+            # Someone registered one of these names or emails since the lookup
+            raise CommandError(
+                f'Batch rejected by a unique index ({e}); {counts["created"]} users were imported, '
+                'run the command again to continue'
+            )
+        counts['created'] += len(new_users)
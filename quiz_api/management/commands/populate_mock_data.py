@@ -1,11 +1,16 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from quiz_api.models import QuizConfig, Question, Choice, QuizAttempt
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from quiz_api.models import QuizConfig, Question, Choice, QuizAttempt, AttemptAnswer, QuizStats, AttemptCounter, ServedQuiz, LeaderboardEntry, ScoreBucket, DailyAttemptRollup, ItemAnalysisReport, DistributionBucket
+from quiz_api.seeding import create_question_bank, create_users, create_attempts
+from quiz_api import versioning
+from datetime import datetime, time as dt_time
 import random
-from datetime import datetime, timedelta
+import time
 
 class Command(BaseCommand):
-    help = 'Populate the database with mock data for frontend testing'
+    help = 'Populate the database with mock data for frontend testing and load testing'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -13,20 +18,81 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing data before populating',
         )
+        parser.add_argument(
+            '--questions',
+            type=int,
+            default=None,
+            help='Generate a synthetic bank of N questions instead of the built-in 30',
+        )
+        parser.add_argument(
+            '--attempts',
+            type=int,
+            default=10,
+            help='Number of quiz attempts to generate',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=0,
+            help='Create U student accounts and spread attempts over them (0 = anonymous sessions)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed; the same seed and end date produce the same data',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows per bulk insert',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Spread attempts over this many days before --end-date',
+        )
+        parser.add_argument(
+            '--end-date',
+            help='Latest attempt date (YYYY-MM-DD, default today)',
+        )
 
     def handle(self, *args, **options):
         if options['clear']:
             self.stdout.write('Clearing existing data...')
-            QuizAttempt.objects.all().delete()
+            AttemptAnswer.objects.all().delete()
+            # A plain DELETE skips the per-row signals QuizAttempt.delete() would send;
+            # the running totals are reset below instead
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(QuizAttempt._meta.db_table)}')
+            QuizStats.objects.all().delete()
+            AttemptCounter.objects.all().delete()
+            ServedQuiz.objects.all().delete()
+            LeaderboardEntry.objects.all().delete()
+            ScoreBucket.objects.all().delete()
+            DailyAttemptRollup.objects.all().delete()
+            ItemAnalysisReport.objects.all().delete()
+            DistributionBucket.objects.all().delete()
             Choice.objects.all().delete()
             Question.objects.all().delete()
             QuizConfig.objects.all().delete()
+            versioning.bump_version(versioning.QUESTIONS)
             self.stdout.write(self.style.SUCCESS('Existing data cleared.'))
 
+        rng = random.Random(options['seed'])
+
         with transaction.atomic():
             self.create_quiz_config()
-            self.create_questions_and_choices()
-            self.create_quiz_attempts()
+            if options['questions']:
+                create_question_bank(options['questions'], rng=rng, batch_size=options['batch_size'])
+                self.stdout.write(f"Created {options['questions']} synthetic questions")
+            else:
+                self.create_questions_and_choices()
+
+        # Attempts are committed batch by batch so large runs do not hold one huge transaction
+        self.create_quiz_attempts(rng, options)
             
         self.stdout.write(
             self.style.SUCCESS('Successfully populated database with mock data!')
@@ -424,98 +490,66 @@ class Command(BaseCommand):
 
         all_questions = programming_questions + general_questions + science_questions
 
-        for question_data in all_questions:
-            question, created = Question.objects.get_or_create(
+        existing = set(Question.objects.filter(
+            text__in=[question_data['text'] for question_data in all_questions]
+        ).values_list('text', flat=True))
+        new_questions = [question_data for question_data in all_questions if question_data['text'] not in existing]
+
+        questions = Question.objects.bulk_create([
+            Question(
                 text=question_data['text'],
-                defaults={
-                    'category': question_data['category'],
-                    'difficulty': question_data['difficulty'],
-                    'points': question_data['points'],
-                    'is_active': True,
-                }
+                category=question_data['category'],
+                difficulty=question_data['difficulty'],
+                points=question_data['points'],
+                is_active=True,
             )
-            
-            if created:
-                # Create choices for the question
-                for choice_text, is_correct in question_data['choices']:
-                    Choice.objects.create(
-                        question=question,
-                        text=choice_text,
-                        is_correct=is_correct
-                    )
-                self.stdout.write(f'Created question: {question.text[:50]}...')
-            else:
-                self.stdout.write(f'Question already exists: {question.text[:50]}...')
+            for question_data in new_questions
+        ])
+        Choice.objects.bulk_create([
+            Choice(question=question, text=choice_text, is_correct=is_correct)
+            for question, question_data in zip(questions, new_questions)
+            for choice_text, is_correct in question_data['choices']
+        ])
+        versioning.bump_version(versioning.QUESTIONS)
 
-    def create_quiz_attempts(self):
-        """Create sample quiz attempts for testing"""
-        
-        # Get all questions for creating realistic attempts
-        questions = list(Question.objects.filter(is_active=True))
-        if not questions:
+        self.stdout.write(f'Created {len(questions)} questions ({len(existing)} already existed)')
+
+    def create_quiz_attempts(self, rng, options):
+        """Create quiz attempts with realistic score distributions"""
+        count = options['attempts']
+        if not count:
+            return
+        if not Question.objects.filter(is_active=True).exists():
             self.stdout.write('No questions found. Skipping quiz attempts creation.')
             return
 
-        # Sample user sessions with usernames
-        user_data = [
-            ('user_001', 'john_doe'),
-            ('user_002', 'jane_smith'),
-            ('user_003', 'mike_wilson'),
-            ('user_004', 'sarah_jones'),
-            ('user_005', 'alex_brown'),
-            ('test_user_1', 'test_user_1'),
-            ('test_user_2', 'test_user_2'),
-            ('demo_user', 'demo_user'),
-            ('guest_001', 'Guest User 1'),
-            ('guest_002', 'Guest User 2')
-        ]
+        end = timezone.now()
+        if options['end_date']:
+            day = parse_date(options['end_date'])
+            if day is None:
+                raise CommandError(f"Invalid --end-date: {options['end_date']}")
+            end = timezone.make_aware(datetime.combine(day, dt_time.max))
 
-        # Create various quiz attempts with different scores
-        for i, (session, username) in enumerate(user_data):
-            # Create user answers (simulate different performance levels)
-            user_answers = {}
-            score = 0
-            total_points = 0
-            
-            for question in questions:
-                total_points += question.points
-                choices = question.choices.all()
-                
-                # Simulate different accuracy levels
-                if i < 2:  # High performers
-                    accuracy = 0.9
-                elif i < 5:  # Medium performers
-                    accuracy = 0.7
-                else:  # Lower performers
-                    accuracy = 0.4
-                
-                # Randomly select correct or incorrect answer based on accuracy
-                if random.random() < accuracy:
-                    # Select correct answer
-                    correct_choice = choices.filter(is_correct=True).first()
-                    if correct_choice:
-                        user_answers[str(question.id)] = correct_choice.id
-                        score += question.points
-                else:
-                    # Select incorrect answer
-                    incorrect_choices = list(choices.filter(is_correct=False))
-                    if incorrect_choices:
-                        selected_choice = random.choice(incorrect_choices)
-                        user_answers[str(question.id)] = selected_choice.id
+        users = None
+        if options['users']:
+            users = create_users(options['users'], batch_size=options['batch_size'])
+            self.stdout.write(f'Prepared {len(users)} student accounts')
 
-            percentage = (score / total_points * 100) if total_points > 0 else 0
-            time_taken = random.randint(300, 900)  # 5-15 minutes in seconds
+        started = time.perf_counter()
+        report_every = max(count // 10, options['batch_size'])
 
-            # Create quiz attempt
-            QuizAttempt.objects.create(
-                username=username,
-                user_session=session,
-                score=score,
-                total_questions=len(questions),
-                percentage=round(percentage, 2),
-                time_taken=time_taken,
-                user_answers=user_answers,
-                completed_at=datetime.now() - timedelta(days=random.randint(0, 30))
-            )
+        def progress(created):
+            if created % report_every < options['batch_size'] or created == count:
+                rate = created / (time.perf_counter() - started)
+                self.stdout.write(f'  {created}/{count} attempts ({rate:,.0f}/s)')
 
-        self.stdout.write(f'Created {len(user_data)} quiz attempts')
+        create_attempts(
+            count,
+            rng=rng,
+            batch_size=options['batch_size'],
+            days=options['days'],
+            users=users,
+            end=end,
+            progress=progress,
+        )
+        self.stdout.write(f'Created {count} quiz attempts')
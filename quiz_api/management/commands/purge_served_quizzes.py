@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from quiz_api.models import ServedQuiz
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete recorded question subsets served more than --days ago, in small batches. '
+        'A session whose subset was purged is graded against the full bank if it still submits.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.QUIZ_SERVED_QUIZ_RETENTION_DAYS,
+            help='Keep subsets served within this many days',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per statement',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        started = time.perf_counter()
+        deleted = 0
+        while True:
+            ids = list(
+                ServedQuiz.objects.filter(served_at__lt=cutoff)
+                .order_by('id').values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            count, _ = ServedQuiz.objects.filter(id__in=ids).delete()
+            deleted += count
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {deleted} served quizzes older than {options["days"]} days in {elapsed:.1f}s'
+        ))
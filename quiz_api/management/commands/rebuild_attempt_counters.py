@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from quiz_api.limits import ANONYMOUS_SESSION, participant_key
+from quiz_api.models import AttemptCounter, QuizAttempt
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the per-participant attempt counters used for max_attempts from QuizAttempt. '
+        'Run flush_outbox first when write-behind is enabled, or spooled attempts are not counted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing the recomputed counters',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        expected = {}
+        by_user = QuizAttempt.objects.filter(user__isnull=False).values('user_id').annotate(n=Count('id'))
+        for row in by_user.iterator():
+            expected[participant_key(row['user_id'])] = row['n']
+        by_session = (
+            QuizAttempt.objects.filter(user__isnull=True).exclude(user_session=ANONYMOUS_SESSION)
+            .values('user_session').annotate(n=Count('id'))
+        )
+        for row in by_session.iterator():
+            key = participant_key(user_session=row['user_session'])
+            if key is not None:
+                expected[key] = row['n']
+
+        with transaction.atomic():
+            # Lock the counters so submissions committing meanwhile wait for the rebuild
+            stored = {
+                counter.participant: counter
+                for counter in AttemptCounter.objects.select_for_update().iterator()
+            }
+            changed = [
+                counter for key, counter in stored.items()
+                if key in expected and counter.count != expected[key]
+            ]
+            missing = [key for key in expected if key not in stored]
+            stale = [key for key in stored if key not in expected]
+
+            if not (changed or missing or stale):
+                self.stdout.write(self.style.SUCCESS('Attempt counters are consistent'))
+                return
+
+            self.stdout.write(self.style.WARNING(
+                f'{len(changed)} counters drifted, {len(missing)} missing, {len(stale)} without attempts'
+            ))
+            if options['dry_run']:
+                self.stdout.write('Dry run: counters left unchanged')
+                return
+
+            for counter in changed:
+                counter.count = expected[counter.participant]
+            AttemptCounter.objects.bulk_update(changed, ['count'], batch_size=options['batch_size'])
+            AttemptCounter.objects.bulk_create(
+                [AttemptCounter(participant=key, count=expected[key]) for key in missing],
+                batch_size=options['batch_size'],
+            )
+            AttemptCounter.objects.filter(participant__in=stale).delete()
+
+        self.stdout.write(self.style.SUCCESS('Attempt counters rebuilt'))
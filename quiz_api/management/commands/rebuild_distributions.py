@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from quiz_api.distributions import compute_sketches, load_sketches
+from quiz_api.models import DistributionBucket
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the percentage and time sketches from QuizAttempt and report any drift. '
+        'Run while submissions are paused; counts still pending in running workers would be added twice.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing the recomputed sketches',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Attempts fetched per round trip and buckets inserted per batch',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Lock the rows first so flushes from other workers wait for the rebuild
+            list(DistributionBucket.objects.select_for_update().values_list('id', flat=True))
+            stored = load_sketches()
+            expected = compute_sketches(chunk_size=options['chunk_size'])
+
+            drifted = False
+            for metric, sketch in expected.items():
+                stored_counts = +stored[metric].counts
+                if stored_counts == +sketch.counts:
+                    continue
+                drifted = True
+                buckets = sum(
+                    1 for bucket in stored_counts.keys() | sketch.counts.keys()
+                    if stored_counts[bucket] != sketch.counts[bucket]
+                )
+                self.stdout.write(self.style.WARNING(
+                    f'{metric}: {buckets} buckets differ (stored {stored[metric].count} attempts, '
+                    f'actual {sketch.count})'
+                ))
+
+            if not drifted:
+                self.stdout.write(self.style.SUCCESS('Attempt distributions are consistent'))
+                return
+
+            if options['dry_run']:
+                self.stdout.write('Dry run: distributions left unchanged')
+                return
+
+            DistributionBucket.objects.all().delete()
+            DistributionBucket.objects.bulk_create(
+                [
+                    DistributionBucket(metric=metric, bucket=bucket, count=count)
+                    for metric, sketch in expected.items()
+                    for bucket, count in sorted(sketch.counts.items()) if count
+                ],
+                batch_size=options['chunk_size'],
+            )
+
+        self.stdout.write(self.style.SUCCESS('Attempt distributions rebuilt'))
@@ -0,0 +1,74 @@
+from collections import Counter
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from quiz_api.leaderboard import MAX_BUCKET, score_bucket
+from quiz_api.limits import participant_key
+from quiz_api.models import LeaderboardEntry, QuizAttempt, ScoreBucket
+
+BEST_FIRST = ['-percentage', 'time_taken', 'completed_at']
+COLUMNS = ['user_id', 'user_session', 'username', 'percentage', 'time_taken', 'completed_at']
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the leaderboard and its score histogram from QuizAttempt. '
+        'Run while submissions are paused; attempts committed during the rebuild may be missed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Attempts fetched per round trip and entries inserted per batch',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        # Sorted by participant with each participant's best attempt first, so
+        # only the first row of every group is kept and memory stays flat
+        groups = [
+            QuizAttempt.objects.filter(user__isnull=False).order_by('user_id', *BEST_FIRST),
+            QuizAttempt.objects.filter(user__isnull=True).order_by('user_session', *BEST_FIRST),
+        ]
+
+        histogram = Counter()
+        entries = 0
+        with transaction.atomic():
+            LeaderboardEntry.objects.all().delete()
+            batch = []
+            previous = None
+            for attempts in groups:
+                for user_id, session, username, percentage, time_taken, completed_at in (
+                    attempts.values_list(*COLUMNS).iterator(chunk_size=chunk_size)
+                ):
+                    key = participant_key(user_id, session)
+                    if key is None or key == previous:
+                        continue
+                    previous = key
+                    bucket = score_bucket(percentage)
+                    histogram[bucket] += 1
+                    batch.append(LeaderboardEntry(
+                        participant=key,
+                        username=username or '',
+                        best_percentage=percentage,
+                        best_time_taken=time_taken,
+                        bucket=bucket,
+                        achieved_at=completed_at,
+                    ))
+                    if len(batch) >= chunk_size:
+                        LeaderboardEntry.objects.bulk_create(batch)
+                        entries += len(batch)
+                        batch = []
+            LeaderboardEntry.objects.bulk_create(batch)
+            entries += len(batch)
+
+            ScoreBucket.objects.all().delete()
+            ScoreBucket.objects.bulk_create([
+                ScoreBucket(bucket=bucket, count=histogram[bucket])
+                for bucket in range(MAX_BUCKET + 1) if histogram[bucket]
+            ])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Leaderboard rebuilt: {entries} participants in {len(histogram)} score buckets'
+        ))
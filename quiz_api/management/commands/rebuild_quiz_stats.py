@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from quiz_api.models import QuizStats
+from quiz_api.stats import STATS_ID, TOTAL_FIELDS, compute_totals
+
+
+class Command(BaseCommand):
+    help = 'Recompute the running quiz statistics from QuizAttempt and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing the recomputed totals',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Lock the row first so submissions committing meanwhile are applied on top of the rebuild
+            QuizStats.objects.get_or_create(pk=STATS_ID)
+            current = QuizStats.objects.select_for_update().get(pk=STATS_ID)
+            expected = compute_totals()
+
+            drift = {}
+            for field in TOTAL_FIELDS:
+                stored = getattr(current, field)
+                if abs(stored - expected[field]) > 1e-6:
+                    drift[field] = (stored, expected[field])
+
+            if not drift:
+                self.stdout.write(self.style.SUCCESS('Quiz stats are consistent'))
+                return
+
+            for field, (stored, actual) in drift.items():
+                self.stdout.write(self.style.WARNING(f'{field}: stored {stored}, actual {actual}'))
+
+            if options['dry_run']:
+                self.stdout.write('Dry run: stats left unchanged')
+                return
+
+            QuizStats.objects.filter(pk=STATS_ID).update(**expected)
+
+        self.stdout.write(self.style.SUCCESS('Quiz stats rebuilt'))
@@ -0,0 +1,195 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from quiz_api.answer_key import get_answer_key
+from quiz_api.benchmarking import benchmark_database, summarize, time_calls
+from quiz_api.config import load_config
+from quiz_api.seeding import create_question_bank, create_attempts
+import json
+import os
+import platform
+import random
+import time
+
+ENDPOINTS = [
+    ('submit_quiz_answers', 'post', '/api/quiz/submit/'),
+    ('get_quiz_questions', 'get', '/api/quiz/'),
+    ('get_quiz_stats', 'get', '/api/admin/stats/'),
+    ('get_question_stats', 'get', '/api/admin/question-stats/'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the quiz endpoints at several data scales and compare against a JSON baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            default='10,1000,100000',
+            help='Comma-separated numbers of attempts (and questions, up to --max-questions) to seed',
+        )
+        parser.add_argument(
+            '--max-questions',
+            type=int,
+            default=50,
+            help='Cap on the question bank size at any scale',
+        )
+        parser.add_argument(
+            '--large-bank',
+            type=int,
+            default=2000,
+            help='Questions in an extra large-bank case, which the capped scales never reach (0 to skip)',
+        )
+        parser.add_argument(
+            '--large-bank-attempts',
+            type=int,
+            default=1000,
+            help='Attempts seeded for the large-bank case',
+        )
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per endpoint')
+        parser.add_argument(
+            '--baseline',
+            default='benchmark_baseline.json',
+            help='Baseline file to compare against (or write with --update-baseline)',
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Write the results as the new baseline instead of comparing',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed relative p95 slowdown before failing (0.25 = 25%%)',
+        )
+        parser.add_argument(
+            '--min-delta-ms',
+            type=float,
+            default=2.0,
+            help='Ignore p95 slowdowns smaller than this many milliseconds',
+        )
+        parser.add_argument('--output', help='Also write the results to this file')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        scales = [int(scale) for scale in options['scales'].split(',') if scale.strip()]
+        # (name, questions, attempts); attempts grow with the scale while the bank is capped,
+        # so the large-bank case is what shows costs that grow with the number of questions
+        cases = [(str(scale), min(scale, options['max_questions']), scale) for scale in scales]
+        if options['large_bank']:
+            cases.append(('large-bank', options['large_bank'], options['large_bank_attempts']))
+        results = {
+            'meta': {
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'iterations': options['iterations'],
+                'max_questions': options['max_questions'],
+                'cases': {case: {'questions': questions, 'attempts': attempts} for case, questions, attempts in cases},
+                'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            },
+            'scales': {},
+        }
+
+        for case, questions, attempts in cases:
+            self.stdout.write(f'Seeding {case} ({questions} questions, {attempts} attempts)...')
+            with benchmark_database():
+                rng = random.Random(options['seed'])
+                create_question_bank(questions, rng=rng)
+                create_attempts(attempts, rng=rng)
+                results['scales'][case] = self.measure(options['iterations'])
+
+            for name, stats in results['scales'][case].items():
+                self.stdout.write(
+                    f"  {name:<22} p50 {stats['p50_ms']:>9} ms  p95 {stats['p95_ms']:>9} ms  "
+                    f"{stats['queries']} queries"
+                )
+
+        if options['output']:
+            self.write_json(options['output'], results)
+
+        if options['update_baseline']:
+            self.write_json(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        if not os.path.exists(options['baseline']):
+            self.stdout.write(self.style.WARNING(
+                f"No baseline at {options['baseline']}; run with --update-baseline to create one"
+            ))
+            return
+
+        with open(options['baseline']) as f:
+            baseline = json.load(f)
+        regressions = self.compare(baseline, results, options['tolerance'], options['min_delta_ms'])
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(regression))
+            raise CommandError(f'{len(regressions)} benchmark regressions')
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def measure(self, iterations):
+        # Every timed submission comes from the same user; lift the attempt limit so
+        # they are all graded and saved rather than rejected with 403
+        quiz_config = load_config()
+        quiz_config.max_attempts = 0
+        quiz_config.save()
+
+        staff = User.objects.create_user('benchmark', password='unused', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(staff)
+        answer_key = get_answer_key()
+        rng = random.Random(1)
+        answers = {
+            str(question.id): rng.choice(list(question.choices))
+            for question in answer_key.questions.values() if question.choices
+        }
+
+        measured = {}
+        for name, method, path in ENDPOINTS:
+            if method == 'post':
+                def request():
+                    return client.post(path, {'answers': answers, 'session_id': 'benchmark'}, format='json')
+            else:
+                def request():
+                    return client.get(path)
+
+            samples = time_calls(request, iterations)
+            with CaptureQueriesContext(connection) as captured:
+                response = request()
+            if response.status_code >= 400:
+                raise CommandError(f'{name} returned {response.status_code}')
+
+            stats = summarize(samples)
+            measured[name] = {
+                'p50_ms': stats['p50_ms'],
+                'p95_ms': stats['p95_ms'],
+                'mean_ms': stats['mean_ms'],
+                'queries': len(captured),
+            }
+        return measured
+
+    def compare(self, baseline, results, tolerance, min_delta_ms):
+        regressions = []
+        for scale, endpoints in results['scales'].items():
+            for name, current in endpoints.items():
+                previous = baseline.get('scales', {}).get(scale, {}).get(name)
+                if not previous:
+                    continue
+                slowdown = current['p95_ms'] - previous['p95_ms']
+                if slowdown > min_delta_ms and current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+                    regressions.append(
+                        f"{name} @ {scale}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms"
+                    )
+                if current['queries'] > previous['queries']:
+                    regressions.append(
+                        f"{name} @ {scale}: queries {previous['queries']} -> {current['queries']}"
+                    )
+        return regressions
+
+    def write_json(self, path, data):
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write('\n')
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_api', '0003_quizattempt_outbox_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_correct', models.BooleanField(default=False)),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='quiz_api.quizattempt')),
+                ('choice', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='quiz_api.choice')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_answers', to='quiz_api.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['question', 'is_correct'], name='attemptanswer_question_correct')],
+                'constraints': [models.UniqueConstraint(fields=('attempt', 'question'), name='unique_attempt_answer')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_api', '0004_attemptanswer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_count', models.BigIntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0)),
+                ('time_taken_sum', models.BigIntegerField(default=0)),
+                ('excellent_count', models.BigIntegerField(default=0)),
+                ('good_count', models.BigIntegerField(default=0)),
+                ('average_count', models.BigIntegerField(default=0)),
+                ('poor_count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'quiz stats',
+            },
+        ),
+    ]
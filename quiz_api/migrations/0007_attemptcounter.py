@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_api', '0006_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('participant', models.CharField(max_length=120, unique=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
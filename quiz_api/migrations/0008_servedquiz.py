@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_api', '0007_attemptcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServedQuiz',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_id', models.CharField(max_length=100, unique=True)),
+                ('question_ids', models.JSONField(default=list)),
+                ('served_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
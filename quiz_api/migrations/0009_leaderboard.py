@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_api', '0008_servedquiz'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreBucket',
+            fields=[
+                ('bucket', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('participant', models.CharField(max_length=120, unique=True)),
+                ('username', models.CharField(blank=True, max_length=150)),
+                ('best_percentage', models.FloatField(null=True)),
+                ('best_time_taken', models.PositiveIntegerField(default=0)),
+                ('bucket', models.PositiveSmallIntegerField(null=True)),
+                ('achieved_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-best_percentage', 'best_time_taken', 'achieved_at'], name='leaderboard_rank_idx'), models.Index(fields=['bucket', 'best_percentage'], name='leaderboard_bucket_idx')],
+            },
+        ),
+    ]
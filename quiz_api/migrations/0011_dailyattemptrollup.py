@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_api', '0010_user_email_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttemptRollup',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('attempt_count', models.BigIntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0)),
+                ('time_taken_sum', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_api', '0011_dailyattemptrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemAnalysisReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computed_at', models.DateTimeField()),
+                ('attempt_count', models.PositiveIntegerField(default=0)),
+                ('questions', models.JSONField(default=list)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_api', '0012_itemanalysisreport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DistributionBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=20)),
+                ('bucket', models.IntegerField()),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('metric', 'bucket'), name='unique_distribution_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_api', '0013_distributionbucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servedquiz',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='servedquiz',
+            name='served_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# QuizStats was created empty, so databases that already had attempts
+# reported only the attempts saved since. Recompute the row from the
+# attempts; same aggregates as stats.compute_totals.
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+STATS_ID = 1
+
+
+def seed_quiz_stats(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    QuizAttempt = apps.get_model('quiz_api', 'QuizAttempt')
+    QuizStats = apps.get_model('quiz_api', 'QuizStats')
+    totals = QuizAttempt.objects.using(alias).aggregate(
+        attempt_count=Count('id'),
+        percentage_sum=Sum('percentage'),
+        time_taken_sum=Sum('time_taken'),
+        excellent_count=Count('id', filter=Q(percentage__gte=90)),
+        good_count=Count('id', filter=Q(percentage__gte=70, percentage__lt=90)),
+        average_count=Count('id', filter=Q(percentage__gte=50, percentage__lt=70)),
+        poor_count=Count('id', filter=Q(percentage__lt=50)),
+    )
+    QuizStats.objects.using(alias).update_or_create(
+        pk=STATS_ID, defaults={field: value or 0 for field, value in totals.items()}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_api', '0014_servedquiz_submitted_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_quiz_stats, migrations.RunPython.noop),
+    ]
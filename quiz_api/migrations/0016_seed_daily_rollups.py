@@ -0,0 +1,44 @@
+# DailyAttemptRollup was created empty, so the time series showed nothing
+# before the migration. Recompute every day from the attempts; same
+# aggregates as rollups.compute_rollups.
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def seed_daily_rollups(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    QuizAttempt = apps.get_model('quiz_api', 'QuizAttempt')
+    DailyAttemptRollup = apps.get_model('quiz_api', 'DailyAttemptRollup')
+    rows = (
+        QuizAttempt.objects.using(alias)
+        .annotate(day=TruncDate('completed_at'))
+        .values('day')
+        .annotate(attempt_count=Count('id'), percentage_sum=Sum('percentage'), time_taken_sum=Sum('time_taken'))
+        .order_by('day')
+    )
+    DailyAttemptRollup.objects.using(alias).all().delete()
+    DailyAttemptRollup.objects.using(alias).bulk_create(
+        [
+            DailyAttemptRollup(
+                day=row['day'],
+                attempt_count=row['attempt_count'],
+                percentage_sum=row['percentage_sum'] or 0,
+                time_taken_sum=row['time_taken_sum'] or 0,
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_api', '0015_seed_quizstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_daily_rollups, migrations.RunPython.noop),
+    ]
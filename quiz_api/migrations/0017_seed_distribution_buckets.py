@@ -0,0 +1,41 @@
+# DistributionBucket was created empty, so percentiles covered only the
+# attempts saved since. Recompute the sketches from the attempts, as
+# rebuild_distributions does. The bucket scales are the live ones, since
+# stored buckets must match the ones workers add to.
+
+from collections import Counter
+
+from django.db import migrations
+
+from quiz_api.distributions import METRICS
+
+
+def seed_distribution_buckets(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    QuizAttempt = apps.get_model('quiz_api', 'QuizAttempt')
+    DistributionBucket = apps.get_model('quiz_api', 'DistributionBucket')
+    counts = {metric: Counter() for metric in METRICS}
+    for values in QuizAttempt.objects.using(alias).values_list(*METRICS).iterator(chunk_size=5000):
+        for (metric, scale), value in zip(METRICS.items(), values):
+            counts[metric][scale.bucket(value)] += 1
+
+    DistributionBucket.objects.using(alias).all().delete()
+    DistributionBucket.objects.using(alias).bulk_create(
+        [
+            DistributionBucket(metric=metric, bucket=bucket, count=count)
+            for metric, buckets in counts.items()
+            for bucket, count in sorted(buckets.items())
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_api', '0016_seed_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_distribution_buckets, migrations.RunPython.noop),
+    ]
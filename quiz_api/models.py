@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class QuizConfig(models.Model):
     timer_duration = models.PositiveIntegerField(default=10)
@@ -24,6 +25,17 @@ class Question(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Only active questions are ever served or graded
+            models.Index(fields=['id'], condition=models.Q(is_active=True), name='question_active_idx'),
+            models.Index(
+                fields=['category', 'difficulty'],
+                condition=models.Q(is_active=True),
+                name='question_active_cat_diff_idx',
+            ),
+        ]
+    
     def __str__(self):
         return self.text
 
@@ -43,9 +55,144 @@ class QuizAttempt(models.Model):
     total_questions = models.PositiveIntegerField(default=0)
     percentage = models.FloatField(default=0)
     time_taken = models.PositiveIntegerField(default=0)
-    completed_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(default=timezone.now, editable=False)
     user_answers = models.JSONField(default=dict)
+    # Set when the attempt was written through the outbox, so replays are idempotent
+    outbox_token = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+    
+    class Meta:
+        indexes = [
+            # Keyset pagination of the admin listing and --since exports
+            models.Index(fields=['-completed_at', '-id'], name='attempt_completed_idx'),
+            models.Index(fields=['user', '-completed_at'], name='attempt_user_completed_idx'),
+            models.Index(fields=['user_session'], name='attempt_session_idx'),
+            models.Index(fields=['percentage'], name='attempt_percentage_idx'),
+        ]
     
     def __str__(self):
         username_display = self.username or self.user.username if self.user else "Anonymous"
-        return f"{username_display} - Score: {self.score}/{self.total_questions}"
\ No newline at end of file
+        return f"{username_display} - Score: {self.score}/{self.total_questions}"
+
+class AttemptAnswer(models.Model):
+    """One answered question of a QuizAttempt, normalized for per-question aggregates"""
+    attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name='answers')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='attempt_answers')
+    choice = models.ForeignKey(Choice, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    is_correct = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['attempt', 'question'], name='unique_attempt_answer'),
+        ]
+        indexes = [
+            models.Index(fields=['question', 'is_correct'], name='attemptanswer_question_correct'),
+        ]
+
+    def __str__(self):
+        return f"Attempt {self.attempt_id} - Question {self.question_id}"
+
+
+class QuizStats(models.Model):
+    """Running totals over all quiz attempts, kept in a single row"""
+    attempt_count = models.BigIntegerField(default=0)
+    percentage_sum = models.FloatField(default=0)
+    time_taken_sum = models.BigIntegerField(default=0)
+    excellent_count = models.BigIntegerField(default=0)
+    good_count = models.BigIntegerField(default=0)
+    average_count = models.BigIntegerField(default=0)
+    poor_count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'quiz stats'
+
+    def __str__(self):
+        return f"Quiz Stats ({self.attempt_count} attempts)"
+
+
+class AttemptCounter(models.Model):
+    """Attempts submitted per participant, used to enforce QuizConfig.max_attempts"""
+    # "user:<id>" for authenticated users, "session:<session id>" otherwise
+    participant = models.CharField(max_length=120, unique=True)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.participant}: {self.count} attempts"
+
+
+class ServedQuiz(models.Model):
+    """The question subset served to a server-issued session, so it is graded on its own"""
+    session_id = models.CharField(max_length=100, unique=True)
+    question_ids = models.JSONField(default=list)
+    served_at = models.DateTimeField(auto_now=True, db_index=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.session_id}: {len(self.question_ids)} questions"
+
+
+class LeaderboardEntry(models.Model):
+    """Best attempt of each participant, ranked by percentage"""
+    # Same keys as AttemptCounter: "user:<id>" or "session:<session id>"
+    participant = models.CharField(max_length=120, unique=True)
+    username = models.CharField(max_length=150, blank=True)
+    # Null only while the row is being created inside save_attempts
+    best_percentage = models.FloatField(null=True)
+    best_time_taken = models.PositiveIntegerField(default=0)
+    bucket = models.PositiveSmallIntegerField(null=True)
+    achieved_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-best_percentage', 'best_time_taken', 'achieved_at'], name='leaderboard_rank_idx'),
+            models.Index(fields=['bucket', 'best_percentage'], name='leaderboard_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.username or self.participant}: {self.best_percentage}%"
+
+
+class ScoreBucket(models.Model):
+    """Number of leaderboard participants whose best percentage falls in each bucket"""
+    bucket = models.PositiveSmallIntegerField(primary_key=True)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Bucket {self.bucket}: {self.count}"
+
+
+class DailyAttemptRollup(models.Model):
+    """Attempts completed on one day (in TIME_ZONE), for time-series charts"""
+    day = models.DateField(primary_key=True)
+    attempt_count = models.BigIntegerField(default=0)
+    percentage_sum = models.FloatField(default=0)
+    time_taken_sum = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.attempt_count} attempts"
+
+
+class ItemAnalysisReport(models.Model):
+    """Latest psychometric item analysis of the question bank, kept in a single row"""
+    computed_at = models.DateTimeField()
+    attempt_count = models.PositiveIntegerField(default=0)
+    # Per-question statistics as returned by GET /api/admin/item-analysis/
+    questions = models.JSONField(default=list)
+
+    def __str__(self):
+        return f"Item analysis of {self.attempt_count} attempts at {self.computed_at}"
+
+
+class DistributionBucket(models.Model):
+    """Attempts counted in one bucket of a percentage or time sketch (see distributions.py)"""
+    metric = models.CharField(max_length=20)
+    bucket = models.IntegerField()
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'bucket'], name='unique_distribution_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} bucket {self.bucket}: {self.count}"
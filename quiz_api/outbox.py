@@ -0,0 +1,234 @@
+"""
+Write-behind outbox for quiz attempts.
+
+When ``QUIZ_WRITE_BEHIND`` is enabled, graded attempts are appended to a
+local SQLite spool and the response returns immediately. A background
+flusher drains the spool into ``QuizAttempt`` with batched inserts.
+
+Rows leave the spool only after the database commit succeeds, so a crash
+loses nothing. Each row carries a token stored in
+``QuizAttempt.outbox_token``, so a batch committed just before a crash is
+skipped, not inserted twice, when it is replayed.
+
+A row that can never be inserted (it does not decode, or the database
+rejects it, e.g. because its user was deleted) is moved to the
+``attempt_outbox_dead`` table with the error, and its attempt reservation
+is given back, so it does not block the rows behind it.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, close_old_connections
+
+from .models import QuizAttempt
+from .attempts import save_attempts
+from .limits import release_attempts
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempt_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    token TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    queued_at REAL NOT NULL
+)
+"""
+
+DEAD_LETTER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempt_outbox_dead (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    token TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    error TEXT NOT NULL,
+    queued_at REAL NOT NULL,
+    failed_at REAL NOT NULL
+)
+"""
+
+# Errors caused by the row itself; anything else (e.g. the database being
+# unreachable) fails the batch so it is retried
+ROW_ERRORS = (ValueError, TypeError, KeyError, ValidationError, IntegrityError, DataError)
+
+ATTEMPT_FIELDS = [
+    'user_id', 'username', 'user_session', 'score', 'total_questions',
+    'percentage', 'time_taken', 'user_answers',
+]
+
+
+class OutboxFull(Exception):
+    """The spool already holds QUIZ_OUTBOX_MAX_SIZE attempts"""
+
+
+_local = threading.local()
+
+
+def _connect():
+    conn = getattr(_local, 'conn', None)
+    path = str(settings.QUIZ_OUTBOX_PATH)
+    if conn is None or getattr(_local, 'path', None) != path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=FULL')
+        conn.execute(SCHEMA)
+        conn.execute(DEAD_LETTER_SCHEMA)
+        _local.conn = conn
+        _local.path = path
+    return conn
+
+
+def _encode(attempt, token):
+    payload = {field: getattr(attempt, field) for field in ATTEMPT_FIELDS}
+    payload['completed_at'] = attempt.completed_at.isoformat()
+    payload['outbox_token'] = token
+    return json.dumps(payload)
+
+
+def _decode(payload):
+    data = json.loads(payload)
+    data['completed_at'] = datetime.fromisoformat(data['completed_at'])
+    data['outbox_token'] = uuid.UUID(data['outbox_token'])
+    return QuizAttempt(**data)
+
+
+def enqueue(attempt):
+    """Append an unsaved attempt to the spool; raises OutboxFull when the spool is at capacity"""
+    token = uuid.uuid4().hex
+    conn = _connect()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        (size,) = conn.execute('SELECT COUNT(*) FROM attempt_outbox').fetchone()
+        if size >= settings.QUIZ_OUTBOX_MAX_SIZE:
+            raise OutboxFull()
+        conn.execute(
+            'INSERT INTO attempt_outbox (token, payload, queued_at) VALUES (?, ?, ?)',
+            (token, _encode(attempt, token), time.time())
+        )
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    start_flusher()
+    return token
+
+
+def pending_count():
+    (size,) = _connect().execute('SELECT COUNT(*) FROM attempt_outbox').fetchone()
+    return size
+
+
+def dead_letter_count():
+    (size,) = _connect().execute('SELECT COUNT(*) FROM attempt_outbox_dead').fetchone()
+    return size
+
+
+def _dead_letter(conn, row, error):
+    row_id, token, payload, queued_at = row
+    logger.error('Moving spooled attempt %s to the dead-letter table: %r', token, error)
+    conn.execute(
+        'INSERT INTO attempt_outbox_dead (token, payload, error, queued_at, failed_at) VALUES (?, ?, ?, ?, ?)',
+        (token, payload, repr(error), queued_at, time.time())
+    )
+
+
+def _save_rows(conn, rows):
+    """Insert the rows' attempts, dead-lettering rows that can't be; returns the number inserted"""
+    decoded = []
+    for row in rows:
+        try:
+            decoded.append((row, _decode(row[2])))
+        except ROW_ERRORS as e:
+            _dead_letter(conn, row, e)
+
+    already_saved = set(QuizAttempt.objects.filter(
+        outbox_token__in=[attempt.outbox_token for _, attempt in decoded]
+    ).values_list('outbox_token', flat=True))
+    decoded = [(row, attempt) for row, attempt in decoded if attempt.outbox_token not in already_saved]
+
+    try:
+        save_attempts([attempt for _, attempt in decoded])
+        return len(decoded)
+    except ROW_ERRORS:
+        pass
+
+    # Something in the batch was rejected; find it by inserting one by one
+    inserted = 0
+    for row, attempt in decoded:
+        attempt.pk = None
+        try:
+            save_attempts([attempt])
+        except ROW_ERRORS as e:
+            _dead_letter(conn, row, e)
+            release_attempts([attempt])
+            continue
+        inserted += 1
+    return inserted
+
+
+def flush(batch_size=None, max_batches=None):
+    """Move spooled attempts into the database; returns the number inserted"""
+    batch_size = batch_size or settings.QUIZ_OUTBOX_BATCH_SIZE
+    conn = _connect()
+    inserted = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        # The spool write lock is held until the database commit, so two
+        # flushers never replay the same rows concurrently
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                'SELECT id, token, payload, queued_at FROM attempt_outbox ORDER BY id LIMIT ?', (batch_size,)
+            ).fetchall()
+            if not rows:
+                conn.execute('COMMIT')
+                break
+
+            saved = _save_rows(conn, rows)
+
+            conn.execute('DELETE FROM attempt_outbox WHERE id <= ?', (rows[-1][0],))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+        inserted += saved
+        batches += 1
+
+    return inserted
+
+
+_flusher_lock = threading.Lock()
+_flusher = None
+
+
+def _run_flusher():
+    while True:
+        time.sleep(settings.QUIZ_OUTBOX_FLUSH_INTERVAL)
+        try:
+            close_old_connections()
+            flush()
+        except Exception:
+            logger.exception('Flushing the attempt outbox failed; will retry')
+
+
+def start_flusher():
+    """Start the background flusher for this process if it is not running"""
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_run_flusher, name='attempt-outbox-flusher', daemon=True)
+            _flusher.start()
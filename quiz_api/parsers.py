@@ -0,0 +1,33 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import json
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser using orjson when it is installed
+
+    orjson reads UTF-8 only and always rejects NaN and infinity, so other
+    charsets, ``STRICT_JSON = False`` and installs without orjson use the
+    stdlib parser.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower() not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+def json_loads(body):
+    """Decode a JSON request body like FastJSONParser, for views outside DRF"""
+    if orjson is None:
+        return json.loads(body, parse_constant=json.strict_constant)
+    return orjson.loads(body)
@@ -0,0 +1,102 @@
+"""
+Pre-rendered response bodies for read-mostly endpoints.
+
+Bodies are rendered once per question bank version and shared through the
+Django cache, with a process-local copy of the latest one. The ETag is a
+hash of the body, so every worker computes the same strong validator.
+
+A body is re-rendered once it is ``QUIZ_QUESTIONS_MAX_AGE`` seconds old
+even if the version stamp has not changed, which bounds how long a worker
+serves a stale list when the stamps are not in a shared cache.
+"""
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .models import Question, Choice
+from .renderers import FastJSONRenderer
+from .serializers import QuestionSerializer
+from . import versioning
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# rendered_at is wall-clock time, so copies shared through the cache age the same in every worker
+RenderedPayload = namedtuple('RenderedPayload', ['version', 'etag', 'body', 'rendered_at'], defaults=[0])
+
+_lock = threading.Lock()
+_questions_payload = None
+
+
+def render_etag(body):
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:40]
+
+
+def _active_questions():
+    return Question.objects.filter(is_active=True).order_by('id').prefetch_related(
+        Prefetch('choices', queryset=Choice.objects.order_by('id'))
+    )
+
+
+def _render_questions(version, questions=None):
+    if questions is None:
+        questions = _active_questions()
+    body = FastJSONRenderer().render(QuestionSerializer(questions, many=True).data)
+    return RenderedPayload(version, render_etag(body), body, time.time())
+
+
+def _is_current(payload, version):
+    max_age = getattr(settings, 'QUIZ_QUESTIONS_MAX_AGE', 300)
+    return payload is not None and payload.version == version and time.time() - payload.rendered_at < max_age
+
+
+def get_questions_payload():
+    """Return the rendered active question list for the current bank version"""
+    global _questions_payload
+    version = versioning.get_version(versioning.QUESTIONS)
+
+    payload = _questions_payload
+    if _is_current(payload, version):
+        return payload
+
+    cache_key = f'quiz:payload:questions:{version}'
+    payload = cache.get(cache_key)
+    if _is_current(payload, version):
+        _questions_payload = payload
+        return payload
+
+    with _lock:
+        # Threads that queued on the lock use the body the first one rendered
+        payload = _questions_payload
+        if not _is_current(payload, version):
+            payload = cache.get(cache_key)
+        if not _is_current(payload, version):
+            payload = _render_questions(version)
+            cache.set(cache_key, payload, CACHE_TIMEOUT)
+        _questions_payload = payload
+    return payload
+
+
+async def aget_questions_payload():
+    """Async ``get_questions_payload``, sharing the same process-local copy"""
+    global _questions_payload
+    version = await versioning.aget_version(versioning.QUESTIONS)
+
+    payload = _questions_payload
+    if _is_current(payload, version):
+        return payload
+
+    cache_key = f'quiz:payload:questions:{version}'
+    payload = await cache.aget(cache_key)
+    if not _is_current(payload, version):
+        # Choices are prefetched while iterating, so rendering needs no queries
+        questions = [question async for question in _active_questions()]
+        payload = _render_questions(version, questions)
+        await cache.aset(cache_key, payload, CACHE_TIMEOUT)
+
+    _questions_payload = payload
+    return payload
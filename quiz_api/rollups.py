@@ -0,0 +1,113 @@
+"""
+Per-day totals behind the time-series analytics endpoint.
+
+``DailyAttemptRollup`` has one row per day (in ``TIME_ZONE``) holding the
+number of attempts completed that day and the sums of their percentages
+and times. Like ``QuizStats``, the rows are adjusted with ``F()`` updates
+in the transaction that inserts or deletes the attempts, so a chart over
+a date range reads one row per day and never touches ``QuizAttempt``.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyAttemptRollup, QuizAttempt
+
+ROLLUP_FIELDS = ['attempt_count', 'percentage_sum', 'time_taken_sum']
+
+BUCKETS = ('day', 'week')
+
+
+def attempt_day(attempt):
+    return timezone.localdate(attempt.completed_at)
+
+
+def daily_deltas(attempts, sign=1):
+    """Changes to each day's totals caused by adding (or removing, sign=-1) attempts"""
+    deltas = {}
+    for attempt in attempts:
+        day = deltas.setdefault(attempt_day(attempt), dict.fromkeys(ROLLUP_FIELDS, 0))
+        day['attempt_count'] += sign
+        day['percentage_sum'] += sign * attempt.percentage
+        day['time_taken_sum'] += sign * attempt.time_taken
+    return deltas
+
+
+def _update_day(day, deltas):
+    changes = {field: F(field) + value for field, value in deltas.items() if value}
+    return not changes or DailyAttemptRollup.objects.filter(day=day).update(**changes)
+
+
+def apply_deltas(deltas_by_day):
+    """Add the deltas to each day's row, creating missing rows"""
+    # Days in order, so concurrent batches lock the rows in the same order
+    missing = [day for day in sorted(deltas_by_day) if not _update_day(day, deltas_by_day[day])]
+    if not missing:
+        return
+    with transaction.atomic():
+        DailyAttemptRollup.objects.bulk_create(
+            [DailyAttemptRollup(day=day) for day in missing], ignore_conflicts=True
+        )
+        for day in missing:
+            _update_day(day, deltas_by_day[day])
+
+
+def record_attempts(attempts):
+    apply_deltas(daily_deltas(attempts))
+
+
+def forget_attempts(attempts):
+    apply_deltas(daily_deltas(attempts, sign=-1))
+
+
+def compute_rollups(start=None, end=None):
+    """Recompute the totals of every day in [start, end] from the attempts table"""
+    attempts = QuizAttempt.objects.annotate(day=TruncDate('completed_at'))
+    if start:
+        attempts = attempts.filter(day__gte=start)
+    if end:
+        attempts = attempts.filter(day__lte=end)
+    rows = attempts.values('day').annotate(
+        attempt_count=Count('id'),
+        percentage_sum=Sum('percentage'),
+        time_taken_sum=Sum('time_taken'),
+    ).order_by('day')
+    return {
+        row['day']: {field: row[field] or 0 for field in ROLLUP_FIELDS}
+        for row in rows
+    }
+
+
+def bucket_start(day, bucket):
+    # Weeks start on Monday, as in ISO 8601
+    return day - timedelta(days=day.weekday()) if bucket == 'week' else day
+
+
+def timeseries(start, end, bucket='day'):
+    """Totals per day or week between two dates (inclusive), with empty buckets filled in"""
+    totals = {}
+    day = start
+    while day <= end:
+        totals.setdefault(bucket_start(day, bucket), dict.fromkeys(ROLLUP_FIELDS, 0))
+        day += timedelta(days=1)
+
+    rows = DailyAttemptRollup.objects.filter(day__gte=start, day__lte=end).values_list('day', *ROLLUP_FIELDS)
+    for day, *values in rows:
+        bucket_totals = totals[bucket_start(day, bucket)]
+        for field, value in zip(ROLLUP_FIELDS, values):
+            bucket_totals[field] += value
+
+    series = []
+    for bucket_day, bucket_totals in totals.items():
+        count = bucket_totals['attempt_count']
+        series.append({
+            'start': bucket_day.isoformat(),
+            'attempts': count,
+            # No attempts means no average, rather than an average of 0
+            'average_score': round(bucket_totals['percentage_sum'] / count, 2) if count else None,
+            'average_time_taken': round(bucket_totals['time_taken_sum'] / count, 2) if count else None,
+        })
+    return series
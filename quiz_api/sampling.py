@@ -0,0 +1,217 @@
+"""
+Random question subsets drawn from large banks.
+
+The ids of the active questions matching a category/difficulty filter are
+loaded once per question bank version into a sorted tuple (shared through
+the Django cache, with a process-local copy), and subsets are sampled from
+it in Python. Each subset belongs to a session id issued by the server and
+is stored in ``ServedQuiz``: reloading the quiz with that id returns the
+stored questions whatever ``count`` or filters are passed, and the
+submission is graded against exactly that subset. Once the session has
+submitted, its subset is no longer served. Old rows are removed by
+``purge_served_quizzes``.
+
+Like the rendered question list, a pool is reloaded once it is
+``QUIZ_QUESTIONS_MAX_AGE`` seconds old even if the version stamp has not
+changed, in case the stamps are not in a shared cache.
+"""
+import hashlib
+import random
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import Question, Choice, ServedQuiz
+from .serializers import QuestionSerializer
+from . import versioning
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# loaded_at is wall-clock time, so pools shared through the cache age the same in every worker
+QuestionPool = namedtuple('QuestionPool', ['ids', 'loaded_at'])
+
+_lock = threading.Lock()
+# (category, difficulty) -> QuestionPool; emptied whenever the version changes
+_pools = {}
+_pools_version = None
+
+
+def _pool_queryset(category, difficulty):
+    questions = Question.objects.filter(is_active=True)
+    if category:
+        questions = questions.filter(category=category)
+    if difficulty:
+        questions = questions.filter(difficulty=difficulty)
+    return questions.order_by('id').values_list('id', flat=True)
+
+
+def _is_fresh(pool):
+    max_age = getattr(settings, 'QUIZ_QUESTIONS_MAX_AGE', 300)
+    return isinstance(pool, QuestionPool) and time.time() - pool.loaded_at < max_age
+
+
+def _local_pool(key, version):
+    global _pools, _pools_version
+    with _lock:
+        if _pools_version != version:
+            _pools, _pools_version = {}, version
+        pool = _pools.get(key)
+    return pool.ids if _is_fresh(pool) else None
+
+
+def _pool_cache_key(key, version):
+    # Categories are free text; hash them so the key is safe for memcached
+    filters = hashlib.sha256('\0'.join(key).encode()).hexdigest()[:32]
+    return f'quiz:pool:{version}:{filters}'
+
+
+def _remember_pool(key, version, pool):
+    with _lock:
+        if _pools_version == version:
+            _pools[key] = pool
+
+
+def question_pool(category=None, difficulty=None, version=None):
+    """Sorted ids of the active questions matching the filter"""
+    if version is None:
+        version = versioning.get_version(versioning.QUESTIONS)
+    key = (category or '', difficulty or '')
+    ids = _local_pool(key, version)
+    if ids is not None:
+        return ids
+
+    cache_key = _pool_cache_key(key, version)
+    pool = cache.get(cache_key)
+    if not _is_fresh(pool):
+        ids = tuple(_pool_queryset(category, difficulty))
+        if not ids:
+            # Filters come from the query string; don't keep entries for unknown categories
+            return ids
+        pool = QuestionPool(ids, time.time())
+        cache.set(cache_key, pool, CACHE_TIMEOUT)
+
+    _remember_pool(key, version, pool)
+    return pool.ids
+
+
+async def aquestion_pool(category=None, difficulty=None, version=None):
+    """Async ``question_pool``, sharing the same process-local pools"""
+    if version is None:
+        version = await versioning.aget_version(versioning.QUESTIONS)
+    key = (category or '', difficulty or '')
+    ids = _local_pool(key, version)
+    if ids is not None:
+        return ids
+
+    cache_key = _pool_cache_key(key, version)
+    pool = await cache.aget(cache_key)
+    if not _is_fresh(pool):
+        ids = tuple([question_id async for question_id in _pool_queryset(category, difficulty)])
+        if not ids:
+            return ids
+        pool = QuestionPool(ids, time.time())
+        await cache.aset(cache_key, pool, CACHE_TIMEOUT)
+
+    _remember_pool(key, version, pool)
+    return pool.ids
+
+
+def _sample(pool, session_id, version, count, category, difficulty):
+    rng = random.Random(f'{session_id}:{version}:{category or ""}:{difficulty or ""}:{count}')
+    return rng.sample(pool, min(count, len(pool)))
+
+
+def sample_questions(session_id, count, category=None, difficulty=None):
+    """Pick ``count`` question ids for a session, the same ones on every call"""
+    version = versioning.get_version(versioning.QUESTIONS)
+    pool = question_pool(category, difficulty, version)
+    return _sample(pool, session_id, version, count, category, difficulty)
+
+
+async def asample_questions(session_id, count, category=None, difficulty=None):
+    """Async ``sample_questions``"""
+    version = await versioning.aget_version(versioning.QUESTIONS)
+    pool = await aquestion_pool(category, difficulty, version)
+    return _sample(pool, session_id, version, count, category, difficulty)
+
+
+def _served_questions(question_ids):
+    return Question.objects.filter(pk__in=question_ids).prefetch_related(
+        Prefetch('choices', queryset=Choice.objects.order_by('id'))
+    )
+
+
+def _serialize_in_order(questions, question_ids):
+    return QuestionSerializer([questions[qid] for qid in question_ids if qid in questions], many=True).data
+
+
+def new_session_id():
+    """Id of a new quiz session; issued by the server so clients cannot pick one"""
+    return uuid.uuid4().hex
+
+
+def serve_questions(session_id, question_ids):
+    """Record the subset sampled for a new session and return the serialized questions in order"""
+    ServedQuiz.objects.create(session_id=session_id, question_ids=question_ids)
+    return serialize_questions(question_ids)
+
+
+async def aserve_questions(session_id, question_ids):
+    """Async ``serve_questions``"""
+    await ServedQuiz.objects.acreate(session_id=session_id, question_ids=question_ids)
+    return await aserialize_questions(question_ids)
+
+
+def serialize_questions(question_ids):
+    """Serialized questions in the given order"""
+    return _serialize_in_order(_served_questions(question_ids).in_bulk(), question_ids)
+
+
+async def aserialize_questions(question_ids):
+    """Async ``serialize_questions``"""
+    questions = {question.pk: question async for question in _served_questions(question_ids)}
+    return _serialize_in_order(questions, question_ids)
+
+
+def served_quiz(session_id):
+    """The subset recorded for a session, or None if the id was never issued (or was purged)"""
+    return ServedQuiz.objects.filter(session_id=session_id).first()
+
+
+async def aserved_quiz(session_id):
+    """Async ``served_quiz``"""
+    return await ServedQuiz.objects.filter(session_id=session_id).afirst()
+
+
+def mark_submitted(session_ids):
+    """Record that these sessions submitted; their subset can no longer be served"""
+    ServedQuiz.objects.filter(session_id__in=session_ids, submitted_at__isnull=True).update(
+        submitted_at=timezone.now()
+    )
+
+
+async def amark_submitted(session_ids):
+    """Async ``mark_submitted``"""
+    await ServedQuiz.objects.filter(session_id__in=session_ids, submitted_at__isnull=True).aupdate(
+        submitted_at=timezone.now()
+    )
+
+
+def _served_rows(session_ids):
+    return ServedQuiz.objects.filter(session_id__in=session_ids).values_list('session_id', 'question_ids')
+
+
+def served_question_ids(session_ids):
+    """Map each session id to the question ids served to it"""
+    return dict(_served_rows(session_ids))
+
+
+async def aserved_question_ids(session_ids):
+    """Async ``served_question_ids``"""
+    return {session_id: question_ids async for session_id, question_ids in _served_rows(session_ids)}
@@ -0,0 +1,151 @@
+"""
+Synthetic data generators for benchmarks and load testing.
+
+Everything is written with ``bulk_create``, which skips model signals, so
+the question bank version stamp is bumped explicitly afterwards.
+"""
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .models import Question, Choice, QuizAttempt
+from .answer_key import get_answer_key
+from .attempts import save_attempts
+from . import versioning
+
+DIFFICULTIES = ['easy', 'medium', 'hard']
+POINTS_BY_DIFFICULTY = {'easy': 10, 'medium': 15, 'hard': 20}
+CATEGORIES = ['Programming', 'General Knowledge', 'Science', 'History', 'Mathematics']
+# Rasch-model difficulty (in logits) used when simulating answers
+DIFFICULTY_LOGITS = {'easy': -1.0, 'medium': 0.0, 'hard': 1.0}
+
+
+def create_question_bank(count, choices_per_question=4, rng=None, batch_size=1000):
+    """Create ``count`` active questions with one correct choice each"""
+    rng = rng or random.Random(0)
+    questions = []
+    for i in range(count):
+        difficulty = rng.choice(DIFFICULTIES)
+        questions.append(Question(
+            text=f'Synthetic question {i + 1}',
+            category=rng.choice(CATEGORIES),
+            difficulty=difficulty,
+            points=POINTS_BY_DIFFICULTY[difficulty],
+            is_active=True,
+        ))
+    questions = Question.objects.bulk_create(questions, batch_size=batch_size)
+
+    choices = []
+    for question in questions:
+        correct_index = rng.randrange(choices_per_question)
+        for j in range(choices_per_question):
+            choices.append(Choice(
+                question_id=question.id,
+                text=f'Option {j + 1}',
+                is_correct=(j == correct_index),
+            ))
+    Choice.objects.bulk_create(choices, batch_size=batch_size)
+
+    versioning.bump_version(versioning.QUESTIONS)
+    return questions
+
+
+def answer_sheet(accuracy, rng=None):
+    """Return ``{question_id: choice_id}`` answering each active question correctly with ``accuracy``"""
+    rng = rng or random.Random(0)
+    by_question = {}
+    for choice_id, question_id, is_correct in Choice.objects.filter(
+        question__is_active=True
+    ).values_list('id', 'question_id', 'is_correct'):
+        by_question.setdefault(question_id, ([], []))[0 if is_correct else 1].append(choice_id)
+
+    answers = {}
+    for question_id, (correct, wrong) in by_question.items():
+        if correct and (not wrong or rng.random() < accuracy):
+            answers[str(question_id)] = correct[0]
+        elif wrong:
+            answers[str(question_id)] = rng.choice(wrong)
+    return answers
+
+
+def create_users(count, prefix='student', batch_size=1000):
+    """Create ``count`` students without usable passwords; returns (id, username) pairs"""
+    password = make_password(None)
+    users = [
+        User(username=f'{prefix}_{i + 1:07d}', email=f'{prefix}_{i + 1:07d}@example.com', password=password)
+        for i in range(count)
+    ]
+    User.objects.bulk_create(users, batch_size=batch_size, ignore_conflicts=True)
+    return list(
+        User.objects.filter(username__startswith=f'{prefix}_').order_by('username').values_list('id', 'username')[:count]
+    )
+
+
+def create_attempts(count, rng=None, batch_size=1000, days=30, sessions=None, users=None, end=None, progress=None):
+    """Save ``count`` synthetic attempts against the current answer key
+
+    Each participant (one of ``users`` or an anonymous session) gets a fixed
+    ability, and every answer is correct with a Rasch-model probability that
+    depends on that ability and the question's difficulty. This gives
+    realistic, skewed score distributions. Output depends only on ``rng``
+    and ``end``.
+    """
+    rng = rng or random.Random(0)
+    end = end or timezone.now()
+    answer_key = get_answer_key()
+    difficulties = dict(Question.objects.filter(is_active=True).values_list('id', 'difficulty'))
+
+    questions = []
+    for question in answer_key.questions.values():
+        if question.correct_choice_id is None:
+            continue
+        wrong = [choice_id for choice_id in question.choices if choice_id != question.correct_choice_id]
+        logit = DIFFICULTY_LOGITS.get(difficulties.get(question.id), 0.0)
+        questions.append((str(question.id), question.correct_choice_id, wrong, logit, question.points))
+    total_points = sum(question[4] for question in questions)
+
+    if users:
+        participants = [(user_id, username, f'user_{user_id}') for user_id, username in users]
+    else:
+        participants = [
+            (None, f'session_{i}', f'session_{i}') for i in range(sessions or max(count // 3, 1))
+        ]
+    abilities = [rng.gauss(0.8, 1.0) for _ in participants]
+
+    created = 0
+    while created < count:
+        batch = []
+        for _ in range(min(batch_size, count - created)):
+            index = rng.randrange(len(participants))
+            user_id, username, session = participants[index]
+            ability = abilities[index]
+
+            answers = {}
+            score = 0
+            for question_id, correct_id, wrong, logit, points in questions:
+                if rng.random() < 1 / (1 + math.exp(logit - ability)) or not wrong:
+                    answers[question_id] = correct_id
+                    score += points
+                else:
+                    answers[question_id] = rng.choice(wrong)
+
+            batch.append(QuizAttempt(
+                user_id=user_id,
+                username=username,
+                user_session=session,
+                score=score,
+                total_questions=len(questions),
+                percentage=(score / total_points * 100) if total_points else 0,
+                time_taken=min(int(rng.lognormvariate(6.2, 0.4)), 3600),
+                completed_at=end - timedelta(seconds=rng.randrange(days * 86400)),
+                user_answers=answers,
+            ))
+        save_attempts(batch)
+        created += len(batch)
+        if progress:
+            progress(created)
+    return created
@@ -23,7 +23,14 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = QuizAttempt
-        fields = '__all__'
+        exclude = ['outbox_token']
     
     def get_username_display(self, obj):
-        return obj.username or (obj.user.username if obj.user else "Anonymous")
\ No newline at end of file
+        return obj.username or (obj.user.username if obj.user else "Anonymous")
+
+class QuizSubmissionSerializer(serializers.Serializer):
+    """One submission inside a batch upload"""
+    answers = serializers.DictField(child=serializers.IntegerField(allow_null=True), default=dict)
+    time_taken = serializers.IntegerField(min_value=0, default=0)
+    session_id = serializers.CharField(max_length=100, default='anonymous')
+    username = serializers.CharField(max_length=150, allow_blank=True, default='')
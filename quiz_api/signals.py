@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import QuizConfig, Question, Choice, QuizAttempt
+from . import config, distributions, leaderboard, limits, rollups, versioning, stats
+
+
+def _bump_questions_version():
+    # Wait for the commit so other workers never rebuild from the old rows
+    transaction.on_commit(lambda: versioning.bump_version(versioning.QUESTIONS))
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def question_bank_changed(sender, **kwargs):
+    _bump_questions_version()
+
+
+def _quiz_config_committed():
+    versioning.bump_version(versioning.QUIZ_CONFIG)
+    # This worker sees its own change at once instead of after the check interval
+    config.clear_config()
+
+
+@receiver(post_save, sender=QuizConfig)
+@receiver(post_delete, sender=QuizConfig)
+def quiz_config_changed(sender, **kwargs):
+    transaction.on_commit(_quiz_config_committed)
+
+
+@receiver(post_save, sender=QuizAttempt)
+def quiz_attempt_saved(sender, instance, created, **kwargs):
+    # save_attempts uses bulk_create and records its own totals; this covers
+    # attempts created one by one (admin, shell, fixtures)
+    if created:
+        stats.record_attempts([instance])
+        rollups.record_attempts([instance])
+        leaderboard.record_attempts([instance])
+        distributions.record_attempts([instance])
+
+
+@receiver(post_delete, sender=QuizAttempt)
+def quiz_attempt_deleted(sender, instance, **kwargs):
+    # Runs inside the delete transaction, so the totals never drift on rollback
+    stats.forget_attempts([instance])
+    rollups.forget_attempts([instance])
+    # Deleting an attempt gives the participant that attempt back
+    limits.release_attempts([instance])
+    leaderboard.forget_attempts([instance])
+    distributions.forget_attempts([instance])
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # Their attempts lose the user (SET_NULL) without signals; note which they are
+    instance._quiz_attempt_ids = list(QuizAttempt.objects.filter(user=instance).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # The attempts now belong to their sessions; rank them there instead
+    leaderboard.forget_participant(limits.participant_key(instance.pk))
+    attempt_ids = getattr(instance, '_quiz_attempt_ids', [])
+    if attempt_ids:
+        leaderboard.record_attempts(QuizAttempt.objects.filter(pk__in=attempt_ids))
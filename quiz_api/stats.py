@@ -0,0 +1,78 @@
+"""
+Running totals behind the quiz statistics endpoint.
+
+``QuizStats`` holds a single row that is adjusted with ``F()`` updates in
+the same transaction that inserts or deletes attempts, so reading the
+dashboard numbers is one primary-key lookup.
+"""
+from django.db import transaction
+from django.db.models import F, Count, Sum, Q
+
+from .models import QuizAttempt, QuizStats
+
+STATS_ID = 1
+
+TOTAL_FIELDS = [
+    'attempt_count', 'percentage_sum', 'time_taken_sum',
+    'excellent_count', 'good_count', 'average_count', 'poor_count',
+]
+
+
+def score_band(percentage):
+    if percentage >= 90:
+        return 'excellent'
+    if percentage >= 70:
+        return 'good'
+    if percentage >= 50:
+        return 'average'
+    return 'poor'
+
+
+def attempt_deltas(attempts, sign=1):
+    """Changes to the running totals caused by adding (or removing, sign=-1) attempts"""
+    deltas = dict.fromkeys(TOTAL_FIELDS, 0)
+    for attempt in attempts:
+        deltas['attempt_count'] += sign
+        deltas['percentage_sum'] += sign * attempt.percentage
+        deltas['time_taken_sum'] += sign * attempt.time_taken
+        deltas[f'{score_band(attempt.percentage)}_count'] += sign
+    return deltas
+
+
+def apply_deltas(deltas):
+    """Atomically add ``deltas`` to the stats row, creating it on first use"""
+    changes = {field: F(field) + value for field, value in deltas.items() if value}
+    if not changes:
+        return
+    if QuizStats.objects.filter(pk=STATS_ID).update(**changes):
+        return
+    with transaction.atomic():
+        QuizStats.objects.get_or_create(pk=STATS_ID)
+        QuizStats.objects.filter(pk=STATS_ID).update(**changes)
+
+
+def record_attempts(attempts):
+    apply_deltas(attempt_deltas(attempts))
+
+
+def forget_attempts(attempts):
+    apply_deltas(attempt_deltas(attempts, sign=-1))
+
+
+def get_stats():
+    """Current running totals; an unsaved zero row if nothing was recorded yet"""
+    return QuizStats.objects.filter(pk=STATS_ID).first() or QuizStats(pk=STATS_ID)
+
+
+def compute_totals():
+    """Recompute every running total from the attempts table"""
+    totals = QuizAttempt.objects.aggregate(
+        attempt_count=Count('id'),
+        percentage_sum=Sum('percentage'),
+        time_taken_sum=Sum('time_taken'),
+        excellent_count=Count('id', filter=Q(percentage__gte=90)),
+        good_count=Count('id', filter=Q(percentage__gte=70, percentage__lt=90)),
+        average_count=Count('id', filter=Q(percentage__gte=50, percentage__lt=70)),
+        poor_count=Count('id', filter=Q(percentage__lt=50)),
+    )
+    return {field: value or 0 for field, value in totals.items()}
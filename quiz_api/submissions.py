@@ -0,0 +1,40 @@
+"""
+The write path of a single quiz submission, shared by the sync and async
+submit views.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .attempts import save_attempts
+from .limits import release_attempts, reserve_attempt
+from . import outbox
+
+
+def record_submission(attempt, max_attempts):
+    """Reserve an attempt and save (or spool) it; returns ``(attempt, queued)``
+
+    Raises AttemptLimitExceeded when the participant is at ``max_attempts``.
+    """
+    # The spool is a separate SQLite database that commits on its own, so it is
+    # written only after the reservation has committed. Inside a caller's
+    # transaction that could still roll back, the attempt is inserted directly.
+    if settings.QUIZ_WRITE_BEHIND and not transaction.get_connection().in_atomic_block:
+        with transaction.atomic():
+            reserve_attempt(attempt, max_attempts)
+        try:
+            try:
+                outbox.enqueue(attempt)
+                return attempt, True
+            except outbox.OutboxFull:
+                # Spool is at capacity; insert synchronously against the reservation
+                return save_attempts([attempt])[0], False
+        except BaseException:
+            # Nothing was stored, so give the reservation back
+            release_attempts([attempt])
+            raise
+
+    # The attempt counter and the insert commit together
+    with transaction.atomic():
+        reserve_attempt(attempt, max_attempts)
+        attempt = save_attempts([attempt])[0]
+    return attempt, False
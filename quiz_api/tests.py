@@ -1,3 +1,1292 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from quiz_project.middleware import PerformanceMiddleware
+
+from . import async_auth_views, async_views, distributions, hashing, leaderboard, outbox, payloads
+from .answer_key import clear_answer_key, get_answer_key
+from .attempts import build_attempt
+from .authentication import QuizRefreshToken
+from .benchmarking import percentile, summarize
+from .config import clear_config, get_config
+from .item_analysis import compute_report
+from .limits import ANONYMOUS_SESSION, AttemptLimitExceeded
+from .management.commands.run_benchmarks import Command as RunBenchmarks
+from .models import (
+    AttemptAnswer, AttemptCounter, DailyAttemptRollup, DistributionBucket, LeaderboardEntry, Question, QuizAttempt,
+    QuizConfig, QuizStats, ScoreBucket, ServedQuiz,
+)
+from .payloads import get_questions_payload
+from .renderers import FastJSONRenderer
+from .rollups import ROLLUP_FIELDS, compute_rollups
+from .sampling import question_pool
+from .seeding import answer_sheet, create_question_bank
+from .stats import STATS_ID, TOTAL_FIELDS as STATS_FIELDS, compute_totals, get_stats
+from .submissions import record_submission
+from .token_bloom import TokenBlacklistFilter
+
+
+class QuizTestMixin:
+    """Fresh question bank and process-local caches for every test"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        clear_answer_key()
+        clear_config()
+        create_question_bank(5, rng=random.Random(0))
+        self.client = APIClient()
+
+    def answers(self, accuracy=1.0):
+        return {str(question_id): choice_id for question_id, choice_id in answer_sheet(accuracy).items()}
+
+    def submit(self, **body):
+        body.setdefault('answers', self.answers())
+        return self.client.post('/api/quiz/submit/', body, format='json')
+
+    def attempt(self, **fields):
+        """Unsaved graded attempt, as built by the submit view"""
+        answers = self.answers()
+        return build_attempt(get_answer_key().grade(answers), answers, **fields)
+
+
+class WriteBehindTestCase(QuizTestMixin, TransactionTestCase):
+    """Write-behind needs real commits: the spool is only written outside a transaction"""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(
+            QUIZ_WRITE_BEHIND=True,
+            QUIZ_OUTBOX_PATH=f'{directory}/outbox.sqlite3',
+            # Tests flush by hand; keep the background flushers asleep
+            QUIZ_OUTBOX_FLUSH_INTERVAL=3600,
+            QUIZ_DISTRIBUTION_FLUSH_INTERVAL=3600,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class SubmissionValidationTests(WriteBehindTestCase):
+    def test_invalid_time_taken_is_rejected_before_spooling(self):
+        response = self.submit(session_id='s1', time_taken='abc')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('time_taken', response.json())
+        self.assertEqual(outbox.pending_count(), 0)
+        self.assertFalse(AttemptCounter.objects.exists())
+
+    def test_invalid_answers_are_rejected(self):
+        response = self.submit(session_id='s1', answers=['not', 'a', 'mapping'])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('answers', response.json())
+
+    def test_valid_submission_is_queued_and_flushed(self):
+        response = self.submit(session_id='s1', time_taken=30)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['queued'])
+        self.assertEqual(outbox.flush(), 1)
+        self.assertEqual(QuizAttempt.objects.get().time_taken, 30)
+
+
+class OutboxFlushTests(WriteBehindTestCase):
+    def test_rows_that_cannot_be_saved_are_dead_lettered(self):
+        user = User.objects.create_user('leaver', password='unused')
+        outbox.enqueue(self.attempt(user_session='good-1'))
+        outbox.enqueue(self.attempt(user_session='bad-time', time_taken='abc'))
+        outbox.enqueue(self.attempt(user=user, user_session='deleted-user'))
+        outbox.enqueue(self.attempt(user_session='good-2'))
+        user.delete()
+
+        with self.assertLogs('quiz_api.outbox', 'ERROR'):
+            self.assertEqual(outbox.flush(), 2)
+
+        self.assertEqual(outbox.pending_count(), 0)
+        self.assertEqual(outbox.dead_letter_count(), 2)
+        self.assertEqual(
+            sorted(QuizAttempt.objects.values_list('user_session', flat=True)), ['good-1', 'good-2']
+        )
+
+    def test_undecodable_row_does_not_block_later_rows(self):
+        outbox.enqueue(self.attempt(user_session='good'))
+        outbox._connect().execute(
+            "INSERT INTO attempt_outbox (token, payload, queued_at) VALUES ('broken', '{', 0)"
+        )
+        outbox.enqueue(self.attempt(user_session='after'))
+
+        with self.assertLogs('quiz_api.outbox', 'ERROR'):
+            self.assertEqual(outbox.flush(), 2)
+        self.assertEqual(outbox.dead_letter_count(), 1)
+
+    def test_dead_lettered_attempt_gives_its_reservation_back(self):
+        attempt = self.attempt(user_session='bad-time', time_taken='abc')
+        record_submission(attempt, max_attempts=1)
+        self.assertEqual(AttemptCounter.objects.get().count, 1)
+
+        with self.assertLogs('quiz_api.outbox', 'ERROR'):
+            outbox.flush()
+
+        self.assertEqual(AttemptCounter.objects.get().count, 0)
+
+
+class RecordSubmissionTests(WriteBehindTestCase):
+    def test_rejected_reservation_spools_nothing(self):
+        record_submission(self.attempt(user_session='s1'), max_attempts=1)
+
+        with self.assertRaises(AttemptLimitExceeded):
+            record_submission(self.attempt(user_session='s1'), max_attempts=1)
+
+        self.assertEqual(outbox.pending_count(), 1)
+        self.assertEqual(AttemptCounter.objects.get().count, 1)
+
+    def test_rolled_back_caller_leaves_nothing_spooled(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                _, queued = record_submission(self.attempt(user_session='s1'), max_attempts=1)
+                raise RuntimeError('rollback')
+
+        self.assertFalse(queued)
+        self.assertEqual(outbox.pending_count(), 0)
+        self.assertFalse(QuizAttempt.objects.exists())
+        self.assertFalse(AttemptCounter.objects.exists())
+
+
+class QuestionsPayloadTests(QuizTestMixin, TestCase):
+    def test_payload_is_rebuilt_after_max_age_without_a_version_bump(self):
+        first = get_questions_payload()
+        # No signals fire: like a change bumped only in another worker's local cache
+        Question.objects.update(text='Renamed')
+        self.assertEqual(get_questions_payload().body, first.body)
+
+        with mock.patch('quiz_api.payloads.time.time', return_value=first.rendered_at + 301):
+            payload = get_questions_payload()
+
+        self.assertIn(b'Renamed', payload.body)
+        self.assertNotEqual(payload.etag, first.etag)
+
+    def test_threads_waiting_on_the_lock_reuse_the_first_render(self):
+        first = get_questions_payload()
+        cache.delete(f'quiz:payload:questions:{first.version}')
+        payloads._questions_payload = None
+
+        class RenderedWhileWaiting:
+            # Another thread held the lock and finished rendering meanwhile
+            def __enter__(self):
+                payloads._questions_payload = first
+
+            def __exit__(self, *exc_info):
+                return False
+
+        with mock.patch.object(payloads, '_lock', RenderedWhileWaiting()), \
+                mock.patch.object(payloads, '_render_questions') as render:
+            self.assertIs(get_questions_payload(), first)
+
+        render.assert_not_called()
+
+
+class ExportAttemptsTests(QuizTestMixin, TestCase):
+    def run_export(self, **options):
+        output, log = io.StringIO(), io.StringIO()
+        with mock.patch('sys.stdout', output):
+            call_command('export_attempts', stderr=log, **options)
+        return output.getvalue(), log.getvalue()
+
+    def export(self, **options):
+        output, log = self.run_export(format='ndjson', **options)
+        return [json.loads(line)['id'] for line in output.splitlines()], log
+
+    def test_csv_has_columns_for_active_and_answered_questions_only(self):
+        QuizConfig.objects.create(max_attempts=0)
+        answers = self.answers()
+        attempt_id = self.submit(session_id='s1', answers=answers, time_taken=15).json()['attempt_id']
+        retired = Question.objects.order_by('id').first()
+        retired.is_active = False
+        retired.save()
+        Question.objects.create(text='Never asked', is_active=False)
+
+        output, _ = self.run_export(format='csv')
+
+        header, row = list(csv.reader(io.StringIO(output)))
+        question_ids = sorted(int(question_id) for question_id in answers)
+        self.assertEqual(header[9:], [f'q_{question_id}' for question_id in question_ids])
+        self.assertEqual(header[:2], ['id', 'user_id'])
+        self.assertEqual((int(row[0]), row[3], row[7]), (attempt_id, 's1', '15'))
+        self.assertEqual(row[9:], [str(answers[str(question_id)]) for question_id in question_ids])
+
+    def test_ndjson_has_one_key_per_answer(self):
+        attempt = self.attempt(user_session='s1', time_taken=15)
+        attempt.save()
+
+        output, _ = self.run_export(format='ndjson')
+
+        (record,) = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual((record['id'], record['user_session'], record['time_taken']), (attempt.id, 's1', 15))
+        self.assertEqual(record['completed_at'], attempt.completed_at.isoformat())
+        self.assertEqual(
+            {key: value for key, value in record.items() if key.startswith('q_')},
+            {f'q_{question_id}': choice_id for question_id, choice_id in attempt.user_answers.items()},
+        )
+
+    def test_after_id_exports_each_attempt_once(self):
+        first = self.attempt(user_session='first')
+        first.save()
+        exported, log = self.export()
+        self.assertEqual(exported, [first.id])
+        self.assertIn(f'Last id: {first.id}', log)
+
+        # Saved later (e.g. flushed from the outbox) but completed before the first export
+        late = self.attempt(user_session='late')
+        late.completed_at = first.completed_at
+        late.save()
+        exported, _ = self.export(after_id=first.id)
+
+        self.assertEqual(exported, [late.id])
+
+
+class PopulateMockDataTests(QuizTestMixin, TestCase):
+    def test_clear_removes_attempts_and_served_quizzes(self):
+        session_id = self.client.get('/api/quiz/', {'count': 3}).json()['session_id']
+        self.assertEqual(self.submit(session_id=session_id).status_code, 200)
+        self.assertTrue(ServedQuiz.objects.exists())
+
+        call_command('populate_mock_data', clear=True, attempts=0, stdout=io.StringIO())
+
+        self.assertFalse(QuizAttempt.objects.exists())
+        self.assertFalse(AttemptAnswer.objects.exists())
+        self.assertFalse(ServedQuiz.objects.exists())
+        self.assertFalse(QuizStats.objects.exists())
+        self.assertEqual(Question.objects.count(), 30)
+
+
+class ConfigCacheTests(QuizTestMixin, TestCase):
+    def test_config_is_reloaded_after_max_age_without_a_version_bump(self):
+        self.assertEqual(get_config().max_attempts, 1)
+        QuizConfig.objects.update(max_attempts=3)
+        now = time.monotonic()
+
+        with mock.patch('quiz_api.config.time.monotonic', return_value=now + 30):
+            self.assertEqual(get_config().max_attempts, 1)
+        with mock.patch('quiz_api.config.time.monotonic', return_value=now + 61):
+            self.assertEqual(get_config().max_attempts, 3)
+
+
+class AttemptLimitTests(QuizTestMixin, TestCase):
+    def set_max_attempts(self, max_attempts):
+        QuizConfig.objects.all().delete()
+        QuizConfig.objects.create(max_attempts=max_attempts)
+
+    def test_submissions_beyond_max_attempts_are_rejected(self):
+        self.set_max_attempts(2)
+        self.assertEqual(self.submit(session_id='s1').status_code, 200)
+        self.assertEqual(self.submit(session_id='s1').status_code, 200)
+
+        self.assertEqual(self.submit(session_id='s1').status_code, 403)
+        self.assertEqual(QuizAttempt.objects.filter(user_session='s1').count(), 2)
+        # Other participants have their own allowance
+        self.assertEqual(self.submit(session_id='s2').status_code, 200)
+
+    def test_limit_follows_the_user_across_sessions(self):
+        self.set_max_attempts(1)
+        self.client.force_authenticate(User.objects.create_user('student', password='unused'))
+
+        self.assertEqual(self.submit(session_id='s1').status_code, 200)
+        self.assertEqual(self.submit(session_id='s2').status_code, 403)
+
+    def test_zero_means_unlimited(self):
+        self.set_max_attempts(0)
+        for _ in range(3):
+            self.assertEqual(self.submit(session_id='s1').status_code, 200)
+        self.assertEqual(AttemptCounter.objects.get().count, 3)
+
+
+class QuestionPoolTests(QuizTestMixin, TestCase):
+    def test_pool_is_reloaded_after_max_age_without_a_version_bump(self):
+        pool = question_pool()
+        self.assertEqual(len(pool), 5)
+        Question.objects.filter(pk=pool[0]).update(is_active=False)
+        self.assertEqual(question_pool(), pool)
+
+        with mock.patch('quiz_api.sampling.time.time', return_value=time.time() + 301):
+            self.assertEqual(question_pool(), pool[1:])
+
+
+class TokenRefreshTests(QuizTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('teacher', password='unused', is_staff=True)
+        self.refresh = str(QuizRefreshToken.for_user(self.user))
+
+    def refresh_access(self):
+        response = self.client.post('/api/auth/refresh/', {'refresh': self.refresh}, format='json')
+        if response.status_code == 200:
+            # Rotation blacklists the token just used
+            self.refresh = response.json()['refresh']
+        return response
+
+    def get_stats(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return self.client.get('/api/admin/stats/')
+
+    def test_refresh_after_demotion_drops_staff_access(self):
+        self.assertEqual(self.get_stats(self.refresh_access().json()['access']).status_code, 200)
+
+        User.objects.filter(pk=self.user.pk).update(is_staff=False, username='former-teacher')
+        response = self.refresh_access()
+
+        self.assertEqual(response.status_code, 200)
+        access = response.json()['access']
+        # staff_member_required redirects non-staff callers to the admin login
+        self.assertEqual(self.get_stats(access).status_code, 302)
+        rotated = QuizRefreshToken(self.refresh)
+        self.assertFalse(rotated['is_staff'])
+        self.assertEqual(rotated['username'], 'former-teacher')
+
+    def test_inactive_user_cannot_refresh(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.refresh_access().status_code, 401)
+
+    def test_deleted_user_cannot_refresh(self):
+        self.user.delete()
+
+        self.assertEqual(self.refresh_access().status_code, 401)
+
+
+def outstanding_token(jti, expires_in=timedelta(days=1), **fields):
+    return OutstandingToken.objects.create(jti=jti, token=jti, expires_at=timezone.now() + expires_in, **fields)
+
+
+class PurgeExpiredTokensTests(TestCase):
+    def test_expired_tokens_and_their_blacklist_rows_are_deleted(self):
+        expired = [outstanding_token(f'expired-{i}', expires_in=-timedelta(hours=1)) for i in range(3)]
+        BlacklistedToken.objects.create(token=expired[0])
+        live = outstanding_token('live')
+        BlacklistedToken.objects.create(token=live)
+        output = io.StringIO()
+
+        call_command('purge_expired_tokens', batch_size=2, sleep=0, stdout=output)
+
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertEqual(BlacklistedToken.objects.get().token, live)
+        self.assertIn('Purged 3 expired tokens (1 blacklisted) in 2 batches', output.getvalue())
+
+
+@override_settings(TOKEN_BLOOM_SYNC_INTERVAL=5, TOKEN_BLOOM_SYNC_LOOKBACK=60, TOKEN_BLOOM_REBUILD_INTERVAL=3600)
+class TokenBlacklistFilterTests(TestCase):
+    def setUp(self):
+        self.filter = TokenBlacklistFilter()
+        self.now = time.monotonic()
+
+    def might_contain(self, jti, seconds):
+        with mock.patch('quiz_api.token_bloom.time.monotonic', return_value=self.now + seconds):
+            return self.filter.might_contain(jti)
+
+    def blacklist(self, jti, id):
+        BlacklistedToken.objects.create(id=id, token=outstanding_token(jti))
+
+    def test_sync_picks_up_rows_that_commit_below_the_watermark(self):
+        self.assertFalse(self.might_contain('late', 0))
+        self.blacklist('early', id=1000)
+        self.assertTrue(self.might_contain('early', 5))
+
+        # Id allocated before 1000 but committed after the sync that saw 1000
+        self.blacklist('late', id=500)
+
+        self.assertTrue(self.might_contain('late', 10))
+
+    def test_resynced_rows_do_not_inflate_the_count(self):
+        self.might_contain('anything', 0)
+        self.blacklist('early', id=1000)
+        for seconds in range(5, 60, 5):
+            self.might_contain('anything', seconds)
+
+        self.assertEqual(self.filter._filter.count, 1)
+
+
+class UpdateProfileTests(TestCase):
+    def setUp(self):
+        User.objects.create_user('taken', email='taken@example.com', password='unused')
+        self.user = User.objects.create_user('student', email='student@example.com', password='unused')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def update(self, **fields):
+        return self.client.post('/api/auth/profile/update/', fields, format='json')
+
+    def test_duplicate_email_is_rejected(self):
+        response = self.update(email='taken@example.com', first_name='Changed')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Email already exists'})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, 'student@example.com')
+        self.assertEqual(self.user.first_name, '')
+
+    def test_profile_is_updated(self):
+        response = self.update(email='new@example.com', first_name='Ada')
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.email, self.user.first_name), ('new@example.com', 'Ada'))
+
+
+class ItemAnalysisTests(QuizTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        QuizConfig.objects.create(max_attempts=0)
+        for i, accuracy in enumerate([1.0, 1.0, 0.6, 0.4, 0.0]):
+            self.submit(session_id=f's{i}', answers=self.answers(accuracy))
+        self.client.force_authenticate(User.objects.create_user('teacher', password='unused', is_staff=True))
+
+    def test_blocks_give_the_same_report_as_one_chunk(self):
+        attempts, report = compute_report(chunk_size=2)
+
+        self.assertEqual(attempts, 5)
+        self.assertEqual(compute_report(chunk_size=1000), (attempts, report))
+        self.assertTrue(all(question['responses'] == 5 for question in report))
+
+    def test_endpoint_serves_the_stored_report_only(self):
+        self.assertEqual(self.client.get('/api/admin/item-analysis/').status_code, 404)
+
+        call_command('compute_item_analysis', stdout=io.StringIO())
+        response = self.client.get('/api/admin/item-analysis/', {'refresh': 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['attempt_count'], 5)
+        self.assertEqual(len(response.json()['questions']), 5)
+
+
+class StopFlusher(Exception):
+    pass
+
+
+class DistributionFlushTests(QuizTestMixin, TestCase):
+    def test_background_flusher_writes_pending_counts_without_new_attempts(self):
+        distributions.pending.take()
+        with mock.patch.object(distributions, 'start_flusher') as start, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.submit(session_id='s1', time_taken=42).status_code, 200)
+        start.assert_called_once_with()
+        self.assertFalse(DistributionBucket.objects.exists())
+
+        # One pass of the flusher loop, as it runs in an idle worker
+        with mock.patch.object(distributions.time, 'sleep', side_effect=[None, StopFlusher]), \
+                mock.patch.object(distributions, 'close_old_connections'), self.assertRaises(StopFlusher):
+            distributions._run_flusher()
+
+        sketches = distributions.load_sketches()
+        self.assertEqual(sketches['percentage'].count, 1)
+        # Times are bucketed to within 1%
+        self.assertAlmostEqual(sketches['time_taken'].quantile(0.5), 42, delta=0.42)
+
+
+class QuizEndpointTests(QuizTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        QuizConfig.objects.create(max_attempts=0)
+        self.staff = APIClient()
+        self.staff.force_authenticate(User.objects.create_user('teacher', password='unused', is_staff=True))
+
+    def test_questions_revalidate_with_the_etag_without_queries(self):
+        response = self.client.get('/api/quiz/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/quiz/', HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(captured), 0)
+
+    def test_submission_is_graded_and_counted_in_the_stats(self):
+        perfect = self.submit(session_id='s1', time_taken=20).json()
+        self.assertEqual(perfect['score'], perfect['total_points'])
+        self.assertEqual(perfect['percentage'], 100)
+        self.assertEqual(self.submit(session_id='s2', answers=self.answers(0.0), time_taken=40).json()['score'], 0)
+
+        stats = self.staff.get('/api/admin/stats/').json()
+
+        self.assertEqual(stats['total_attempts'], 2)
+        self.assertEqual(stats['average_score'], 50)
+        self.assertEqual(stats['average_time_taken'], 30)
+        self.assertEqual(stats['score_distribution'], {'excellent': 1, 'good': 0, 'average': 0, 'poor': 1})
+
+    def test_question_stats_count_correct_answers(self):
+        self.submit(session_id='s1')
+        self.submit(session_id='s2', answers=self.answers(0.0))
+
+        question_stats = self.staff.get('/api/admin/question-stats/').json()
+
+        self.assertEqual(len(question_stats), 5)
+        for question in question_stats:
+            self.assertEqual((question['total_attempts'], question['correct_attempts']), (2, 1))
+
+    def test_submit_queries_do_not_grow_with_the_bank(self):
+        self.submit(session_id='warm-up')
+        with CaptureQueriesContext(connection) as small:
+            self.submit(session_id='small')
+
+        create_question_bank(50, rng=random.Random(1))
+        self.submit(session_id='warm-up-2')
+        with CaptureQueriesContext(connection) as large:
+            self.submit(session_id='large')
+
+        self.assertEqual(len(large), len(small))
+
+
+class BenchmarkTests(TestCase):
+    def test_percentiles_use_nearest_rank(self):
+        samples = [0.001 * i for i in range(1, 101)]
+
+        self.assertEqual(percentile(samples, 50), samples[49])
+        self.assertEqual(percentile(samples, 95), samples[94])
+        self.assertEqual(summarize(samples)['p95_ms'], 95.0)
+
+    def test_compare_flags_slowdowns_and_extra_queries_beyond_tolerance(self):
+        baseline = {'scales': {'10': {
+            'fast': {'p95_ms': 10.0, 'queries': 3},
+            'slow': {'p95_ms': 10.0, 'queries': 3},
+            'tiny': {'p95_ms': 1.0, 'queries': 3},
+        }}}
+        results = {'scales': {'10': {
+            'fast': {'p95_ms': 12.0, 'queries': 3},
+            'slow': {'p95_ms': 20.0, 'queries': 4},
+            # Doubled, but below --min-delta-ms
+            'tiny': {'p95_ms': 2.0, 'queries': 3},
+        }}}
+
+        regressions = RunBenchmarks().compare(baseline, results, tolerance=0.25, min_delta_ms=2.0)
+
+        self.assertEqual(regressions, ['slow @ 10: p95 10.0 -> 20.0 ms', 'slow @ 10: queries 3 -> 4'])
+
+
+class RendererTests(TestCase):
+    def test_fast_renderer_matches_the_stdlib_renderer(self):
+        data = {
+            'text': 'caf\u00e9 \u2028 line',
+            'amount': Decimal('1.50'),
+            'at': datetime(2025, 6, 1, 2, 0, 0, 123456, tzinfo=dt_timezone.utc),
+            'nested': [1, 2.5, None, True],
+        }
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class DistributionSketchTests(TestCase):
+    def test_quantiles_are_within_the_bucket_accuracy(self):
+        times = list(range(1, 1001))
+        sketch = distributions.Sketch(distributions.METRICS['time_taken'])
+        for value in times:
+            sketch.add(value)
+
+        for q in (0.1, 0.5, 0.9, 0.99):
+            exact = times[math.ceil(q * len(times)) - 1]
+            self.assertAlmostEqual(sketch.quantile(q), exact, delta=exact * 0.01)
+
+    def test_merged_sketches_match_one_sketch_of_everything(self):
+        scale = distributions.METRICS['percentage']
+        left, right, both = (distributions.Sketch(scale) for _ in range(3))
+        for value in range(0, 101, 3):
+            (left if value % 2 else right).add(value)
+            both.add(value)
+
+        left.merge(right)
+
+        self.assertEqual(left.counts, both.counts)
+        self.assertEqual(left.quantile(0.5), both.quantile(0.5))
+
+
+class QuestionSubsetTests(QuizTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        QuizConfig.objects.create(max_attempts=0)
+
+    def serve(self, **params):
+        return self.client.get('/api/quiz/', params)
+
+    def test_session_id_is_issued_by_the_server(self):
+        response = self.serve(count=3, session_id='chosen-by-client')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ServedQuiz.objects.exists())
+
+    def test_reload_returns_the_stored_subset_whatever_the_count(self):
+        served = self.serve(count=3).json()
+        question_ids = [question['id'] for question in served['questions']]
+
+        reloaded = self.serve(count=1, difficulty='easy', session_id=served['session_id'])
+
+        self.assertEqual(reloaded.status_code, 200)
+        self.assertEqual([question['id'] for question in reloaded.json()['questions']], question_ids)
+        self.assertEqual(ServedQuiz.objects.get().question_ids, question_ids)
+
+    def test_submission_is_graded_on_the_served_subset_only(self):
+        served = self.serve(count=3).json()
+        question_ids = [question['id'] for question in served['questions']]
+        # Right on the served questions, wrong on every other one
+        answers = {
+            question_id: choice_id for question_id, choice_id in self.answers(0.0).items()
+            if int(question_id) not in question_ids
+        }
+        answers.update({str(question_id): self.answers()[str(question_id)] for question_id in question_ids})
+
+        result = self.submit(session_id=served['session_id'], answers=answers).json()
+
+        self.assertEqual(result['percentage'], 100)
+        self.assertEqual([row['question_id'] for row in result['results']], question_ids)
+
+    def test_submitted_session_is_not_served_again(self):
+        session_id = self.serve(count=3).json()['session_id']
+        self.submit(session_id=session_id)
+
+        self.assertEqual(self.serve(count=1, session_id=session_id).status_code, 400)
+        self.assertIsNotNone(ServedQuiz.objects.get().submitted_at)
+
+    def test_empty_pool_is_not_recorded(self):
+        response = self.serve(count=3, category='No such category')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(ServedQuiz.objects.exists())
+
+    def test_purge_deletes_old_subsets(self):
+        self.serve(count=3)
+        recent = self.serve(count=3).json()['session_id']
+        ServedQuiz.objects.exclude(session_id=recent).update(served_at=timezone.now() - timedelta(days=8))
+        output = io.StringIO()
+
+        call_command('purge_served_quizzes', days=7, stdout=output)
+
+        self.assertEqual(list(ServedQuiz.objects.values_list('session_id', flat=True)), [recent])
+        self.assertIn('Purged 1 served quizzes', output.getvalue())
+
+
+class LatencyHistogramTests(TestCase):
+    def test_reset_deletes_only_the_snapshot_files(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for name in ('latency-1.json', 'latency-2.json'):
+            with open(os.path.join(directory, name), 'w') as f:
+                json.dump({'pid': 1, 'written_at': time.time(), 'endpoints': {}}, f)
+        with open(os.path.join(directory, 'notes.txt'), 'w') as f:
+            f.write('kept')
+
+        with override_settings(PERFORMANCE_HISTOGRAM_DIR=directory):
+            call_command('dump_latency_histograms', reset=True, stdout=io.StringIO())
+
+        self.assertEqual(os.listdir(directory), ['notes.txt'])
+
+
+class PerformanceMiddlewareTests(QuizTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        QuizConfig.objects.create(max_attempts=0)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(PERFORMANCE_INSTRUMENTATION=True, PERFORMANCE_HISTOGRAM_DIR=directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        user = User.objects.create_user('timed', password='unused')
+        self.access = str(QuizRefreshToken.for_user(user).access_token)
+
+    def server_timing(self, response):
+        segments = {}
+        for segment in response['Server-Timing'].split(', '):
+            name, *params = segment.split(';')
+            segments[name] = dict(param.split('=', 1) for param in params)
+        return segments
+
+    def test_server_timing_covers_db_auth_view_and_render(self):
+        # A new client, so the handler loads its middleware with instrumentation on
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+        with self.assertLogs('quiz_project.performance') as logs:
+            response = client.get('/api/auth/profile/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(logs.records[0].getMessage())['endpoint'], 'GET /api/auth/profile/')
+        timing = self.server_timing(response)
+        self.assertEqual(list(timing), ['db', 'auth', 'view', 'render', 'total'])
+        self.assertRegex(timing['db']['desc'], r'^"[1-9]\d* queries"$')
+        self.assertGreater(float(timing['auth']['dur']), 0)
+        self.assertGreater(float(timing['view']['dur']), 0)
+
+    def test_async_view_queries_are_counted(self):
+        middleware = PerformanceMiddleware(async_views.submit_quiz_answers)
+        request = RequestFactory().post(
+            '/api/quiz/submit/', {'answers': self.answers(), 'session_id': 'async'},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {self.access}',
+        )
+
+        with self.assertLogs('quiz_project.performance'), CaptureQueriesContext(connection) as captured:
+            response = async_to_sync(middleware)(request)
+
+        self.assertEqual(response.status_code, 200)
+        timing = self.server_timing(response)
+        self.assertEqual(timing['db']['desc'], f'"{len(captured)} queries"')
+        self.assertGreater(len(captured), 0)
+        self.assertGreater(float(timing['auth']['dur']), 0)
+
+
+class LeaderboardTests(QuizTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        QuizConfig.objects.create(max_attempts=0)
+
+    def ranked(self, session, percentage, time_taken=60, **fields):
+        return QuizAttempt.objects.create(user_session=session, percentage=percentage, time_taken=time_taken, **fields)
+
+    def standings(self):
+        return {entry.participant: leaderboard.rank_of(entry) for entry in LeaderboardEntry.objects.all()}
+
+    def leaderboard_rows(self):
+        return (
+            set(LeaderboardEntry.objects.values_list('participant', 'best_percentage', 'best_time_taken', 'bucket')),
+            set(ScoreBucket.objects.filter(count__gt=0).values_list('bucket', 'count')),
+        )
+
+    def assertMatchesRebuild(self):
+        maintained = self.leaderboard_rows()
+        call_command('rebuild_leaderboard', stdout=io.StringIO())
+        self.assertEqual(self.leaderboard_rows(), maintained)
+
+    def test_ties_share_a_rank(self):
+        self.ranked('slow', 80, time_taken=90)
+        self.ranked('fast', 80, time_taken=30)
+        self.ranked('third', 60)
+
+        top = [(rank, entry.participant) for rank, entry in leaderboard.top_entries(10)]
+
+        self.assertEqual(top, [(1, 'session:fast'), (1, 'session:slow'), (3, 'session:third')])
+        self.assertEqual(self.standings(), {'session:fast': 1, 'session:slow': 1, 'session:third': 3})
+        self.assertEqual(leaderboard.participant_count(), 3)
+
+    def test_record_attempts_keeps_each_participants_best(self):
+        leaderboard.record_attempts([
+            QuizAttempt(user_session='a', percentage=40, time_taken=10),
+            QuizAttempt(user_session='a', percentage=70, time_taken=50),
+            QuizAttempt(user_session='a', percentage=70, time_taken=20),
+            QuizAttempt(user_session=ANONYMOUS_SESSION, percentage=100),
+        ])
+
+        entry = LeaderboardEntry.objects.get()
+        self.assertEqual((entry.participant, entry.best_percentage, entry.best_time_taken), ('session:a', 70, 20))
+        self.assertEqual(leaderboard.participant_count(), 1)
+
+    def test_deleting_the_best_attempt_falls_back_to_the_next_best(self):
+        best = self.ranked('a', 90)
+        self.ranked('a', 50)
+        self.ranked('b', 70)
+        self.assertEqual(self.standings(), {'session:a': 1, 'session:b': 2})
+
+        best.delete()
+
+        self.assertEqual(LeaderboardEntry.objects.get(participant='session:a').best_percentage, 50)
+        self.assertEqual(self.standings(), {'session:a': 2, 'session:b': 1})
+        self.assertMatchesRebuild()
+
+    def test_deleting_another_attempt_leaves_the_entry_alone(self):
+        self.ranked('a', 90)
+        worse = self.ranked('a', 50)
+
+        with CaptureQueriesContext(connection) as captured:
+            leaderboard.forget_attempts([worse])
+
+        self.assertFalse([query for query in captured if 'quiz_api_quizattempt' in query['sql']])
+        self.assertEqual(LeaderboardEntry.objects.get().best_percentage, 90)
+
+    def test_deleting_the_last_attempt_drops_the_participant(self):
+        only = self.ranked('a', 90)
+        self.ranked('b', 70)
+
+        only.delete()
+
+        self.assertEqual(self.standings(), {'session:b': 1})
+        self.assertEqual(leaderboard.participant_count(), 1)
+
+    def test_deleted_users_are_ranked_by_session(self):
+        user = User.objects.create_user('leaving', password='unused')
+        self.ranked('their-session', 90, user=user)
+        self.ranked('other', 70)
+
+        user.delete()
+
+        self.assertEqual(self.standings(), {'session:their-session': 1, 'session:other': 2})
+        self.assertEqual(leaderboard.participant_count(), 2)
+        self.assertMatchesRebuild()
+
+    def test_entry_created_concurrently_is_updated_not_duplicated(self):
+        self.ranked('a', 50)
+        real_lock_entries = leaderboard._lock_entries
+        calls = []
+
+        def lock_entries(keys):
+            # The first lookup misses the row, as if another transaction inserted it meanwhile
+            calls.append(keys)
+            return {} if len(calls) == 1 else real_lock_entries(keys)
+
+        with mock.patch.object(leaderboard, '_lock_entries', lock_entries):
+            leaderboard.record_attempts([QuizAttempt(user_session='a', percentage=80)])
+
+        entry = LeaderboardEntry.objects.get()
+        self.assertEqual(entry.best_percentage, 80)
+        self.assertEqual(leaderboard.participant_count(), 1)
+        self.assertEqual(len(calls), 2)
+
+    def test_leaderboard_endpoints(self):
+        self.submit(session_id='perfect', time_taken=30)
+        self.submit(session_id='wrong', answers=self.answers(0.0), time_taken=30)
+
+        board = self.client.get('/api/leaderboard/?limit=1').json()
+        self.assertEqual(board['total_participants'], 2)
+        self.assertEqual([(row['rank'], row['best_percentage']) for row in board['results']], [(1, 100)])
+        self.assertEqual(self.client.get('/api/leaderboard/?limit=0').status_code, 400)
+
+        me = self.client.get('/api/leaderboard/me/?session_id=wrong').json()
+        self.assertEqual((me['rank'], me['best_percentage'], me['total_participants']), (2, 0, 2))
+        self.assertEqual(self.client.get('/api/leaderboard/me/?session_id=nobody').status_code, 404)
+
+
+class BatchSubmitTests(QuizTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        QuizConfig.objects.create(max_attempts=1)
+        self.client.force_authenticate(User.objects.create_user('centre', password='unused'))
+
+    def submit_batch(self, submissions):
+        return self.client.post('/api/quiz/submit/batch/', {'submissions': submissions}, format='json')
+
+    def test_results_follow_input_order_with_per_item_errors(self):
+        response = self.submit_batch([
+            {'answers': self.answers(), 'session_id': 'a', 'time_taken': 10},
+            {'answers': 'not a mapping', 'session_id': 'b'},
+            {'answers': self.answers(0.0), 'session_id': 'c', 'time_taken': 20},
+            {'answers': self.answers(), 'session_id': 'a'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['accepted'], body['rejected']), (2, 2))
+        results = body['results']
+        self.assertEqual([result['index'] for result in results], [0, 1, 2, 3])
+        self.assertEqual([result['status'] for result in results], ['ok', 'error', 'ok', 'error'])
+        self.assertIn('answers', results[1]['errors'])
+        self.assertEqual(results[3]['error'], 'Maximum number of attempts reached')
+        self.assertEqual((results[0]['percentage'], results[2]['percentage']), (100, 0))
+        self.assertEqual(
+            list(QuizAttempt.objects.order_by('pk').values_list('pk', 'user_session')),
+            [(results[0]['attempt_id'], 'a'), (results[2]['attempt_id'], 'c')],
+        )
+
+    def test_rejects_empty_and_oversized_batches(self):
+        self.assertEqual(self.submit_batch([]).status_code, 400)
+        with override_settings(QUIZ_BATCH_MAX_SIZE=1):
+            self.assertEqual(self.submit_batch([{'answers': {}}, {'answers': {}}]).status_code, 400)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.submit_batch([{'answers': self.answers()}]).status_code, 401)
+
+
+class QuizStatsTests(QuizTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        QuizConfig.objects.create(max_attempts=0)
+
+    def totals(self):
+        return {field: getattr(get_stats(), field) for field in STATS_FIELDS}
+
+    def test_totals_follow_created_and_deleted_attempts(self):
+        QuizAttempt.objects.create(user_session='a', percentage=95, time_taken=10)
+        kept = QuizAttempt.objects.create(user_session='b', percentage=55, time_taken=30)
+        QuizAttempt.objects.create(user_session='c', percentage=20, time_taken=50).delete()
+        self.submit(session_id='d', answers=self.answers(0.0), time_taken=20)
+
+        self.assertEqual(self.totals(), compute_totals())
+        self.assertEqual(get_stats().attempt_count, 3)
+        kept.delete()
+        self.assertEqual(self.totals(), compute_totals())
+
+    def test_rebuild_reports_and_repairs_drift(self):
+        QuizAttempt.objects.create(user_session='a', percentage=80, time_taken=10)
+        QuizStats.objects.filter(pk=STATS_ID).update(attempt_count=5, good_count=0)
+
+        out = io.StringIO()
+        call_command('rebuild_quiz_stats', dry_run=True, stdout=out)
+        self.assertIn('attempt_count: stored 5, actual 1', out.getvalue())
+        self.assertIn('good_count: stored 0, actual 1', out.getvalue())
+        self.assertEqual(get_stats().attempt_count, 5)
+
+        call_command('rebuild_quiz_stats', stdout=io.StringIO())
+        self.assertEqual(self.totals(), compute_totals())
+
+        out = io.StringIO()
+        call_command('rebuild_quiz_stats', stdout=out)
+        self.assertIn('consistent', out.getvalue())
+
+
+class AttemptListingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='unused', is_staff=True))
+        start = timezone.now() - timedelta(days=1)
+        self.expected = []
+        for minute in (0, 1, 1, 1, 2, 3, 4):
+            user = User.objects.create(username=f'student{len(self.expected)}')
+            attempt = QuizAttempt.objects.create(
+                user=user, user_session=f's{len(self.expected)}', completed_at=start + timedelta(minutes=minute)
+            )
+            self.expected.append(attempt.pk)
+        # Newest first; attempts completed at the same time go by id, highest first
+        self.expected.sort(key=lambda pk: (QuizAttempt.objects.get(pk=pk).completed_at, pk), reverse=True)
+
+    def test_cursor_pages_cover_every_attempt_once_in_order(self):
+        seen = []
+        url = '/api/admin/attempts/?limit=2'
+        while url:
+            body = self.client.get(url).json()
+            self.assertLessEqual(len(body['results']), 2)
+            seen.extend(row['id'] for row in body['results'])
+            url = body['next_cursor'] and f"/api/admin/attempts/?limit=2&cursor={body['next_cursor']}"
+
+        self.assertEqual(seen, self.expected)
+
+    def test_page_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as captured:
+            body = self.client.get('/api/admin/attempts/?limit=7').json()
+
+        self.assertEqual(body['results'][0]['username_display'], 'student6')
+        self.assertLessEqual(len(captured), 2)
+
+    def test_invalid_cursor_is_rejected(self):
+        not_a_pair = base64.urlsafe_b64encode(b'[1]').decode()
+        for cursor in ('garbage', not_a_pair, base64.urlsafe_b64encode(b'["yesterday", 1]').decode()):
+            self.assertEqual(self.client.get(f'/api/admin/attempts/?cursor={cursor}').status_code, 400)
+        self.assertEqual(self.client.get('/api/admin/attempts/?limit=0').status_code, 400)
+
+    def test_ndjson_streams_every_attempt(self):
+        response = self.client.get('/api/admin/attempts/?format=ndjson')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], self.expected)
+        self.assertNotIn('outbox_token', rows[0])
+
+
+class AsyncAuthViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student', email='student@example.com', password='old-password')
+
+    def post(self, view, body, **extra):
+        request = RequestFactory().post('/', body, content_type='application/json', **extra)
+        response = async_to_sync(view)(request)
+        return response, json.loads(response.content)
+
+    def test_register_and_login(self):
+        response, body = self.post(
+            async_auth_views.register, {'username': 'new', 'email': 'new@example.com', 'password': 'a-password'}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(body['user']['username'], 'new')
+        self.assertTrue(User.objects.get(username='new').check_password('a-password'))
+
+        response, body = self.post(async_auth_views.login, {'username': 'new', 'password': 'a-password'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(body['tokens']), {'access', 'refresh'})
+
+    def test_register_rejects_duplicates(self):
+        for username, email, error in [
+            ('student', 'other@example.com', 'Username already exists'),
+            ('other', 'student@example.com', 'Email already exists'),
+        ]:
+            response, body = self.post(
+                async_auth_views.register, {'username': username, 'email': email, 'password': 'a-password'}
+            )
+            self.assertEqual((response.status_code, body['error']), (400, error))
+
+    def test_login_rejects_bad_credentials_and_inactive_users(self):
+        self.assertEqual(
+            self.post(async_auth_views.login, {'username': 'student', 'password': 'wrong'})[0].status_code, 401
+        )
+        self.assertEqual(
+            self.post(async_auth_views.login, {'username': 'nobody', 'password': 'wrong'})[0].status_code, 401
+        )
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(
+            self.post(async_auth_views.login, {'username': 'student', 'password': 'old-password'})[0].status_code, 401
+        )
+
+    def test_change_password_needs_a_bearer_token(self):
+        body = {'old_password': 'old-password', 'new_password': 'new-password'}
+        self.assertEqual(self.post(async_auth_views.change_password, body)[0].status_code, 401)
+
+        access = QuizRefreshToken.for_user(self.user).access_token
+        response, _ = self.post(async_auth_views.change_password, body, HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new-password'))
+
+    def test_malformed_body_is_rejected(self):
+        request = RequestFactory().post('/', 'not json', content_type='application/json')
+        self.assertEqual(async_to_sync(async_auth_views.login)(request).status_code, 400)
+
+    def test_saturated_hashing_pool_answers_429(self):
+        _, slots = hashing._pool()
+        taken = 0
+        while slots.acquire(blocking=False):
+            taken += 1
+        try:
+            with override_settings(AUTH_HASHING_RETRY_AFTER=5):
+                response, body = self.post(async_auth_views.login, {'username': 'student', 'password': 'old-password'})
+        finally:
+            for _ in range(taken):
+                slots.release()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertIn('retry', body['error'])
+        # The pool admits requests again once slots free up
+        response, _ = self.post(async_auth_views.login, {'username': 'student', 'password': 'old-password'})
+        self.assertEqual(response.status_code, 200)
+
+
+class AsyncQuizViewTests(QuizTestMixin, TestCase):
+    def get(self, view, path='/', **extra):
+        return async_to_sync(view)(RequestFactory().get(path, **extra))
+
+    def post_submission(self, body, **extra):
+        request = RequestFactory().post('/', body, content_type='application/json', **extra)
+        return async_to_sync(async_views.submit_quiz_answers)(request)
+
+    def test_config_and_questions_match_the_sync_views(self):
+        response = self.get(async_views.get_quiz_config)
+        self.assertEqual(json.loads(response.content), self.client.get('/api/quiz/config/').json())
+
+        response = self.get(async_views.get_quiz_questions)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), self.client.get('/api/quiz/').json())
+
+        revalidated = self.get(async_views.get_quiz_questions, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_subset_is_stored_for_the_issued_session(self):
+        response = self.get(async_views.get_quiz_questions, '/?count=2')
+        body = json.loads(response.content)
+        self.assertEqual((response.status_code, body['count']), (200, 2))
+        self.assertEqual(response['Cache-Control'], 'private, no-store')
+
+        reload = self.get(async_views.get_quiz_questions, f"/?count=4&session_id={body['session_id']}")
+        self.assertEqual(json.loads(reload.content)['questions'], body['questions'])
+
+    def test_submit_grades_and_links_the_bearer_user(self):
+        user = User.objects.create_user('student', password='unused')
+        access = QuizRefreshToken.for_user(user).access_token
+
+        response = self.post_submission(
+            {'answers': self.answers(), 'session_id': 's1', 'time_taken': 12}, HTTP_AUTHORIZATION=f'Bearer {access}'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['percentage'], 100)
+        attempt = QuizAttempt.objects.get()
+        self.assertEqual((attempt.user, attempt.time_taken), (user, 12))
+
+        # The default config allows one attempt per participant
+        response = self.post_submission(
+            {'answers': self.answers(), 'session_id': 's2'}, HTTP_AUTHORIZATION=f'Bearer {access}'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_submit_rejects_bad_bodies_and_tokens(self):
+        request = RequestFactory().post('/', 'not json', content_type='application/json')
+        self.assertEqual(async_to_sync(async_views.submit_quiz_answers)(request).status_code, 400)
+        self.assertEqual(self.post_submission({'answers': 'none'}).status_code, 400)
+        self.assertEqual(self.post_submission({'answers': {}}, HTTP_AUTHORIZATION='Bearer nonsense').status_code, 401)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+
+class RegistrationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user('taken', email='taken@example.com', password='unused')
+
+    def register(self, username, email):
+        return self.client.post(
+            '/api/auth/register/', {'username': username, 'email': email, 'password': 'a-password'}, format='json'
+        )
+
+    def test_register_issues_tokens(self):
+        response = self.register('new', 'new@example.com')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(set(response.json()['tokens']), {'access', 'refresh'})
+        self.assertTrue(User.objects.get(username='new').check_password('a-password'))
+
+    def test_unique_indexes_reject_duplicates_without_a_500(self):
+        for username, email, error in [
+            ('taken', 'other@example.com', 'Username already exists'),
+            ('other', 'taken@example.com', 'Email already exists'),
+        ]:
+            response = self.register(username, email)
+            self.assertEqual((response.status_code, response.json()['error']), (400, error))
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_blank_emails_may_repeat(self):
+        User.objects.create_user('no-email-1')
+        User.objects.create_user('no-email-2')
+        self.assertEqual(User.objects.filter(email='').count(), 2)
+
+
+class ImportUsersTests(TestCase):
+    def import_csv(self, content, **options):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'users.csv')
+        with open(path, 'w', newline='') as f:
+            f.write(content)
+        out = io.StringIO()
+        call_command('import_users', path, workers=1, stdout=out, stderr=io.StringIO(), **options)
+        return out.getvalue()
+
+    def test_imports_new_users_and_skips_the_rest(self):
+        User.objects.create_user('existing', email='existing@example.com')
+        output = self.import_csv(
+            'username,email,password,first_name\n'
+            'alice,Alice@EXAMPLE.com,alice-password,Alice\n'
+            'bob,,,\n'
+            'existing,,pw,\n'
+            'carol,existing@example.com,pw,\n'
+            'alice,other@example.com,pw,\n'
+            ',nobody@example.com,pw,\n'
+        )
+
+        self.assertIn('Imported 2 users', output)
+        self.assertIn('skipped 2 existing, 1 repeated in the file, 1 invalid', output)
+        alice = User.objects.get(username='alice')
+        self.assertEqual((alice.email, alice.first_name), ('Alice@example.com', 'Alice'))
+        self.assertTrue(alice.check_password('alice-password'))
+        self.assertFalse(User.objects.get(username='bob').has_usable_password())
+
+    def test_dry_run_creates_nothing(self):
+        output = self.import_csv('username\nalice\nbob\n', dry_run=True)
+
+        self.assertIn('Would import 2 users', output)
+        self.assertFalse(User.objects.exists())
+
+    def test_rejects_unknown_columns(self):
+        with self.assertRaisesMessage(CommandError, 'Unknown columns: role'):
+            self.import_csv('username,role\nalice,admin\n')
+
+
+class TimeseriesTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teacher', password='unused', is_staff=True))
+        # Monday 6 and Wednesday 8 January 2025
+        for day, percentage, time_taken in [(6, 80, 10), (6, 40, 30), (8, 100, 20), (13, 60, 40)]:
+            QuizAttempt.objects.create(
+                user_session=f's{day}-{percentage}', percentage=percentage, time_taken=time_taken,
+                completed_at=timezone.make_aware(datetime(2025, 1, day, 12)),
+            )
+
+    def series(self, **params):
+        return self.client.get('/api/admin/stats/timeseries/', params)
+
+    def stored_rollups(self):
+        return {
+            row['day']: {field: row[field] for field in ROLLUP_FIELDS}
+            for row in DailyAttemptRollup.objects.values('day', *ROLLUP_FIELDS)
+        }
+
+    def test_days_are_filled_in_between_attempts(self):
+        results = self.series(**{'from': '2025-01-06', 'to': '2025-01-08'}).json()['results']
+
+        self.assertEqual(results, [
+            {'start': '2025-01-06', 'attempts': 2, 'average_score': 60, 'average_time_taken': 20},
+            {'start': '2025-01-07', 'attempts': 0, 'average_score': None, 'average_time_taken': None},
+            {'start': '2025-01-08', 'attempts': 1, 'average_score': 100, 'average_time_taken': 20},
+        ])
+
+    def test_weeks_start_on_monday(self):
+        body = self.series(**{'from': '2025-01-05', 'to': '2025-01-13', 'bucket': 'week'}).json()
+
+        self.assertEqual(
+            [(row['start'], row['attempts']) for row in body['results']],
+            [('2024-12-30', 0), ('2025-01-06', 3), ('2025-01-13', 1)],
+        )
+
+    def test_reads_only_the_rollups(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.series(**{'from': '2025-01-01', 'to': '2025-12-31'})
+
+        self.assertFalse([query for query in captured if 'quiz_api_quizattempt' in query['sql']])
+
+    def test_invalid_ranges_are_rejected(self):
+        with override_settings(QUIZ_TIMESERIES_MAX_DAYS=7):
+            self.assertEqual(self.series(**{'from': '2025-01-01', 'to': '2025-01-07'}).status_code, 200)
+            self.assertEqual(self.series(**{'from': '2025-01-01', 'to': '2025-01-08'}).status_code, 400)
+        self.assertEqual(self.series(**{'from': '2025-01-08', 'to': '2025-01-01'}).status_code, 400)
+        self.assertEqual(self.series(**{'from': '2025-13-01'}).status_code, 400)
+        self.assertEqual(self.series(bucket='month').status_code, 400)
+
+    def test_backfill_restores_missing_and_drifted_days(self):
+        expected = compute_rollups()
+        DailyAttemptRollup.objects.filter(day=date(2025, 1, 6)).delete()
+        DailyAttemptRollup.objects.filter(day=date(2025, 1, 8)).update(attempt_count=7)
+
+        out = io.StringIO()
+        call_command('backfill_daily_rollups', dry_run=True, stdout=out)
+        self.assertIn('1 days drifted, 1 missing', out.getvalue())
+        self.assertEqual(DailyAttemptRollup.objects.count(), 2)
+
+        call_command('backfill_daily_rollups', stdout=io.StringIO())
+        self.assertEqual(self.stored_rollups(), expected)
+
+    def test_backfill_keeps_rows_created_meanwhile(self):
+        DailyAttemptRollup.objects.all().delete()
+        racing_day = date(2025, 1, 8)
+
+        def compute_while_a_submission_commits(start, end):
+            totals = compute_rollups(start, end)
+            DailyAttemptRollup.objects.create(day=racing_day, attempt_count=1, percentage_sum=50, time_taken_sum=5)
+            return totals
+
+        with mock.patch(
+            'quiz_api.management.commands.backfill_daily_rollups.compute_rollups', compute_while_a_submission_commits
+        ):
+            call_command('backfill_daily_rollups', stdout=io.StringIO())
+
+        self.assertEqual(
+            self.stored_rollups()[racing_day], {'attempt_count': 2, 'percentage_sum': 150, 'time_taken_sum': 25}
+        )
+        self.assertEqual(DailyAttemptRollup.objects.count(), 3)
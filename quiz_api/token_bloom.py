@@ -0,0 +1,135 @@
+"""
+In-process Bloom filter over blacklisted refresh token ids.
+
+Every refresh verifies that the token is not blacklisted. The filter
+answers "definitely not blacklisted" for almost every token without a
+query; only possible members (blacklisted tokens and a small false-positive
+fraction) are confirmed against ``BlacklistedToken``.
+
+Each process keeps its own filter. New blacklist rows are pulled in every
+``TOKEN_BLOOM_SYNC_INTERVAL`` seconds with a primary-key range query, and
+the filter is rebuilt from the whole table every
+``TOKEN_BLOOM_REBUILD_INTERVAL`` seconds (or when it outgrows its sizing)
+so purged rows stop costing false positives. Tokens blacklisted by this
+process are added immediately; other workers see them within one sync
+interval.
+
+Ids are allocated before the row commits, so a row can become visible
+after rows with higher ids. Each sync therefore starts from the highest id
+seen ``TOKEN_BLOOM_SYNC_LOOKBACK`` seconds ago rather than the latest one,
+re-reading the last minute or so of rows. A row is only missed by the
+syncs if the transaction inserting it stays open for longer than that;
+the next rebuild picks it up.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    def __init__(self, capacity, false_positive_rate):
+        self.capacity = max(capacity, MIN_CAPACITY)
+        self.size = math.ceil(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        positions = self._positions(item)
+        if all(self.bits[position >> 3] & (1 << (position & 7)) for position in positions):
+            # Already present (or a false positive): re-reading rows must not inflate the count
+            return
+        for position in positions:
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenBlacklistFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._watermark = 0
+        # (monotonic time, watermark) of recent syncs, oldest first
+        self._history = deque()
+        self._built_at = 0.0
+        self._synced_at = 0.0
+
+    def _rebuild(self):
+        rows = BlacklistedToken.objects.order_by('id').values_list('id', 'token__jti')
+        jtis = []
+        watermark = 0
+        for token_id, jti in rows.iterator(chunk_size=10000):
+            jtis.append(jti)
+            watermark = token_id
+        # Room to double before the next rebuild is forced
+        bloom = BloomFilter(len(jtis) * 2, settings.TOKEN_BLOOM_FALSE_POSITIVE_RATE)
+        for jti in jtis:
+            bloom.add(jti)
+        self._filter = bloom
+        self._watermark = watermark
+        self._built_at = self._synced_at = time.monotonic()
+        # Older entries stay: rows still committing during the rebuild are below its watermark
+        self._history.append((self._built_at, watermark))
+
+    def _sync(self):
+        now = time.monotonic()
+        # Start from the newest watermark that is at least the lookback old
+        cutoff = now - settings.TOKEN_BLOOM_SYNC_LOOKBACK
+        while len(self._history) > 1 and self._history[1][0] <= cutoff:
+            self._history.popleft()
+        start = self._history[0][1]
+        rows = BlacklistedToken.objects.filter(id__gt=start).order_by('id')
+        for token_id, jti in rows.values_list('id', 'token__jti'):
+            self._filter.add(jti)
+            self._watermark = max(self._watermark, token_id)
+        self._synced_at = now
+        self._history.append((now, self._watermark))
+
+    def _refresh(self):
+        now = time.monotonic()
+        if (
+            self._filter is None
+            or now - self._built_at >= settings.TOKEN_BLOOM_REBUILD_INTERVAL
+            or self._filter.count > self._filter.capacity
+        ):
+            self._rebuild()
+        elif now - self._synced_at >= settings.TOKEN_BLOOM_SYNC_INTERVAL:
+            self._sync()
+
+    def might_contain(self, jti):
+        """False means the token is definitely not blacklisted"""
+        with self._lock:
+            self._refresh()
+            return jti in self._filter
+
+    def add(self, jti):
+        """Record a token this process just blacklisted"""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+            self._watermark = 0
+            self._history.clear()
+
+
+blacklist_filter = TokenBlacklistFilter()
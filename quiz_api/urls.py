@@ -1,24 +1,36 @@
+from django.conf import settings
 from django.urls import path
-from . import views, auth_views
+from . import views, auth_views, async_auth_views, async_views
+
+# Password-hashing views: async with a bounded hashing pool under ASGI
+hashing_views = async_auth_views if settings.ASYNC_AUTH_VIEWS else auth_views
+# Hot public quiz endpoints: async ORM under ASGI
+quiz_views = async_views if settings.ASYNC_QUIZ_VIEWS else views
 
 urlpatterns = [
     # Authentication endpoints
-    path('auth/register/', auth_views.register),
-    path('auth/login/', auth_views.login),
+    path('auth/register/', hashing_views.register),
+    path('auth/login/', hashing_views.login),
     path('auth/refresh/', auth_views.refresh_token),
     path('auth/logout/', auth_views.logout),
     path('auth/profile/', auth_views.user_profile),
     path('auth/profile/update/', auth_views.update_profile),
-    path('auth/change-password/', auth_views.change_password),
+    path('auth/change-password/', hashing_views.change_password),
     
     # Quiz endpoints (public)
-    path('quiz/config/', views.get_quiz_config),
-    path('quiz/', views.get_quiz_questions),
-    path('quiz/submit/', views.submit_quiz_answers),
+    path('quiz/config/', quiz_views.get_quiz_config),
+    path('quiz/', quiz_views.get_quiz_questions),
+    path('quiz/submit/', quiz_views.submit_quiz_answers),
+    path('quiz/submit/batch/', views.submit_quiz_answers_batch),
+    path('leaderboard/', views.get_leaderboard),
+    path('leaderboard/me/', views.get_my_rank),
     
     # Admin endpoints (require authentication)
     path('quiz/config/update/', views.update_quiz_config),
     path('admin/attempts/', views.get_quiz_attempts),
     path('admin/stats/', views.get_quiz_stats),
+    path('admin/stats/timeseries/', views.get_stats_timeseries),
+    path('admin/stats/distribution/', views.get_stats_distribution),
     path('admin/question-stats/', views.get_question_stats),
+    path('admin/item-analysis/', views.get_item_analysis),
 ]
\ No newline at end of file
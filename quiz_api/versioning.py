@@ -0,0 +1,46 @@
+"""
+Content version stamps kept in the Django cache.
+
+Each stamp is an opaque token that changes whenever the underlying data
+changes. Process-local caches remember the token they were built against
+and rebuild when it no longer matches. Configure a shared cache backend
+(see ``CACHES`` in settings) so every worker sees the same stamps.
+"""
+import uuid
+
+from django.core.cache import cache
+
+KEY_PREFIX = 'quiz:version:'
+
+QUESTIONS = 'questions'
+QUIZ_CONFIG = 'quiz_config'
+
+
+def get_version(name):
+    """Return the current version stamp for ``name``, creating one if missing"""
+    key = KEY_PREFIX + name
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    if version is None:
+        # Dummy cache backend: never reuse anything built against this stamp
+        version = uuid.uuid4().hex
+    return version
+
+
+async def aget_version(name):
+    """Async ``get_version``"""
+    key = KEY_PREFIX + name
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid.uuid4().hex, None)
+        version = await cache.aget(key)
+    if version is None:
+        version = uuid.uuid4().hex
+    return version
+
+
+def bump_version(name):
+    """Replace the version stamp for ``name`` so cached copies are rebuilt"""
+    cache.set(KEY_PREFIX + name, uuid.uuid4().hex, None)
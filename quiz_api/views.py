@@ -1,19 +1,41 @@
-from rest_framework.decorators import api_view, permission_classes
+import base64
+import json
+from datetime import datetime, timedelta
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, renderer_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.settings import api_settings
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import Avg, Count
-from .models import Question, Choice, QuizConfig, QuizAttempt
-from .serializers import QuestionSerializer, QuizConfigSerializer, QuizAttemptSerializer
-from django.db import models
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
+from django.db import transaction
+from django.db.models import Count, Q
+from .models import Question, QuizAttempt, AttemptAnswer, LeaderboardEntry
+from .serializers import QuizConfigSerializer, QuizAttemptSerializer, QuizSubmissionSerializer
+from .answer_key import get_answer_key
+from .authentication import STATELESS_AUTHENTICATION_CLASSES
+from .attempts import build_attempt, attempt_response, save_attempts
+from .payloads import get_questions_payload
+from .stats import get_stats
+from .renderers import NDJSONRenderer
+from .config import get_config, load_config
+from .limits import ANONYMOUS_SESSION, AttemptLimitExceeded, participant_key, reserve_attempt
+from .sampling import (
+    mark_submitted, new_session_id, sample_questions, serialize_questions, serve_questions, served_question_ids,
+    served_quiz,
+)
+from .submissions import record_submission
+from . import distributions, item_analysis, leaderboard, rollups
 
 @api_view(['GET'])
+@authentication_classes(STATELESS_AUTHENTICATION_CLASSES)
 @permission_classes([AllowAny])
 def get_quiz_config(request):
-    config = QuizConfig.objects.first()
-    if not config:
-        config = QuizConfig.objects.create()
+    config = get_config()
     serializer = QuizConfigSerializer(config)
     return Response(serializer.data)
 
@@ -21,10 +43,9 @@ def get_quiz_config(request):
 @permission_classes([IsAuthenticated])
 @staff_member_required
 def update_quiz_config(request):
-    config = QuizConfig.objects.first()
-    if not config:
-        config = QuizConfig.objects.create()
-    
+    # Edit a fresh row, never the shared cached instance
+    config = load_config()
+
     serializer = QuizConfigSerializer(config, data=request.data, partial=True)
     if serializer.is_valid():
         serializer.save()
@@ -32,174 +53,433 @@ def update_quiz_config(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
+@authentication_classes([])
 @permission_classes([AllowAny])
 def get_quiz_questions(request):
-    questions = Question.objects.filter(is_active=True)
-    serializer = QuestionSerializer(questions, many=True)
-    return Response(serializer.data)
+    params = request.query_params
+    if any(params.get(name) for name in ('count', 'category', 'difficulty')):
+        return _get_quiz_question_subset(request)
+    
+    # Served from the pre-rendered payload; a matching If-None-Match needs no database access
+    payload = get_questions_payload()
+    headers = {
+        'ETag': payload.etag,
+        'Cache-Control': settings.QUIZ_QUESTIONS_CACHE_CONTROL,
+    }
+    
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        if '*' in etags or payload.etag in etags:
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return HttpResponse(payload.body, content_type='application/json', headers=headers)
+
+def _get_quiz_question_subset(request):
+    """Random subset of the (filtered) active questions, recorded for grading"""
+    params = request.query_params
+    category = params.get('category') or None
+    difficulty = params.get('difficulty') or None
+    session_id = params.get('session_id')
+    
+    max_count = settings.QUIZ_MAX_QUESTION_COUNT
+    try:
+        count = int(params.get('count') or max_count)
+    except ValueError:
+        count = 0
+    if not 1 <= count <= max_count:
+        return Response({
+            'error': f'count must be between 1 and {max_count}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if difficulty and difficulty not in dict(Question._meta.get_field('difficulty').choices):
+        return Response({'error': 'Invalid difficulty'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if session_id:
+        # Reloads get the stored subset, whatever count or filters they pass
+        served = served_quiz(session_id)
+        if served is None:
+            return Response({
+                'error': 'Unknown session_id; omit it to start a new quiz'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if served.submitted_at is not None:
+            return Response({
+                'error': 'This quiz session has already been submitted; omit session_id to start a new quiz'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        question_ids = served.question_ids
+        questions = serialize_questions(question_ids)
+    else:
+        session_id = new_session_id()
+        question_ids = sample_questions(session_id, count, category=category, difficulty=difficulty)
+        if not question_ids:
+            return Response({
+                'error': 'No active questions match the filters'
+            }, status=status.HTTP_404_NOT_FOUND)
+        questions = serve_questions(session_id, question_ids)
+    
+    # Per-session response: never store it in shared caches
+    return Response({
+        'session_id': session_id,
+        'count': len(questions),
+        'questions': questions
+    }, headers={'Cache-Control': 'private, no-store'})
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def submit_quiz_answers(request):
-    user_answers = request.data.get('answers', {})
-    time_taken = request.data.get('time_taken', 0)
-    user_session = request.data.get('session_id', 'anonymous')
-    username = request.data.get('username', '')
+    # Validated before anything is reserved or spooled, so a queued attempt can always be inserted
+    serializer = QuizSubmissionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    user_answers = serializer.validated_data['answers']
+    time_taken = serializer.validated_data['time_taken']
+    user_session = serializer.validated_data['session_id']
+    username = serializer.validated_data['username']
     
-    score = 0
-    total_points = 0
-    results = []
-    questions = Question.objects.filter(is_active=True)
+    # Sessions that were served a random subset are graded on that subset only
+    question_ids = None
+    if user_session != ANONYMOUS_SESSION:
+        question_ids = served_question_ids([user_session]).get(user_session)
     
-    for question in questions:
-        choice_id = user_answers.get(str(question.id))
-        total_points += question.points
-        
-        try:
-            selected_choice = Choice.objects.get(id=choice_id) if choice_id else None
-            correct_choice = Choice.objects.get(question=question, is_correct=True)
-            
-            is_correct = selected_choice and selected_choice.is_correct
-            if is_correct:
-                score += question.points
-                
-            results.append({
-                'question_id': question.id,
-                'question_text': question.text,
-                'user_answer_id': int(choice_id) if choice_id else None,
-                'user_answer_text': selected_choice.text if selected_choice else "No answer",
-                'correct_answer_id': correct_choice.id,
-                'correct_answer_text': correct_choice.text,
-                'is_correct': is_correct,
-                'points': question.points if is_correct else 0
-            })
-        except (Choice.DoesNotExist, ValueError):
-            results.append({
-                'question_id': question.id,
-                'question_text': question.text,
-                'user_answer_id': None,
-                'user_answer_text': "No answer",
-                'correct_answer_id': None,
-                'correct_answer_text': "Error loading answer",
-                'is_correct': False,
-                'points': 0
-            })
-    
-    percentage = (score / total_points * 100) if total_points > 0 else 0
+    graded = get_answer_key().grade(user_answers, question_ids=question_ids)
     
     # Determine user and username
     user = request.user if request.user.is_authenticated else None
-    display_username = username or (user.username if user else "Anonymous")
     
-    attempt = QuizAttempt.objects.create(
+    attempt = build_attempt(
+        graded,
+        user_answers,
         user=user,
-        username=display_username,
+        username=username,
         user_session=user_session,
-        score=score,
-        total_questions=len(questions),
-        percentage=percentage,
-        time_taken=time_taken,
-        user_answers=user_answers
+        time_taken=time_taken
     )
     
+    try:
+        attempt, queued = record_submission(attempt, get_config().max_attempts)
+    except AttemptLimitExceeded:
+        return Response({
+            'error': 'Maximum number of attempts reached'
+        }, status=status.HTTP_403_FORBIDDEN)
+    if question_ids is not None:
+        mark_submitted([user_session])
+    
+    if queued:
+        return Response({**attempt_response(graded, attempt), 'queued': True})
+    return Response(attempt_response(graded, attempt))
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def submit_quiz_answers_batch(request):
+    """Grade and store many submissions at once, e.g. uploads from offline test centres"""
+    submissions = request.data
+    if isinstance(submissions, dict):
+        submissions = submissions.get('submissions')
+    
+    if not isinstance(submissions, list) or not submissions:
+        return Response({
+            'error': 'Expected a non-empty list of submissions'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    max_size = settings.QUIZ_BATCH_MAX_SIZE
+    if len(submissions) > max_size:
+        return Response({
+            'error': f'A batch may contain at most {max_size} submissions'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Grade everything against one load of the question bank
+    answer_key = get_answer_key()
+    results = [None] * len(submissions)
+    pending = []
+    
+    valid = []
+    for index, submission in enumerate(submissions):
+        serializer = QuizSubmissionSerializer(data=submission)
+        if not serializer.is_valid():
+            results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+            continue
+        valid.append((index, serializer.validated_data))
+    
+    # One lookup for every session that was served a random subset
+    served = served_question_ids({
+        data['session_id'] for _, data in valid if data['session_id'] != ANONYMOUS_SESSION
+    })
+    
+    for index, data in valid:
+        graded = answer_key.grade(data['answers'], question_ids=served.get(data['session_id']))
+        attempt = build_attempt(
+            graded,
+            data['answers'],
+            username=data['username'],
+            user_session=data['session_id'],
+            time_taken=data['time_taken']
+        )
+        pending.append((index, graded, attempt))
+    
+    max_attempts = get_config().max_attempts
+    with transaction.atomic():
+        accepted = []
+        for index, graded, attempt in pending:
+            try:
+                reserve_attempt(attempt, max_attempts)
+            except AttemptLimitExceeded:
+                results[index] = {
+                    'index': index,
+                    'status': 'error',
+                    'error': 'Maximum number of attempts reached'
+                }
+                continue
+            accepted.append((index, graded, attempt))
+        saved = save_attempts([attempt for _, _, attempt in accepted])
+    mark_submitted({attempt.user_session for attempt in saved if attempt.user_session in served})
+    for (index, graded, _), attempt in zip(accepted, saved):
+        results[index] = {'index': index, 'status': 'ok', **attempt_response(graded, attempt)}
+    
     return Response({
-        'score': score,
-        'total_points': total_points,
-        'percentage': round(percentage, 2),
-        'time_taken': time_taken,
-        'attempt_id': attempt.id,
-        'username': display_username,
+        'accepted': len(saved),
+        'rejected': len(submissions) - len(saved),
         'results': results
     })
 
 @api_view(['GET'])
+@authentication_classes(STATELESS_AUTHENTICATION_CLASSES)
+@permission_classes([AllowAny])
+def get_leaderboard(request):
+    """Top participants by best percentage (ties broken by time taken)"""
+    limit = request.query_params.get('limit')
+    try:
+        limit = int(limit) if limit else settings.QUIZ_LEADERBOARD_SIZE
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= settings.QUIZ_LEADERBOARD_MAX_SIZE:
+        return Response({
+            'error': f'limit must be between 1 and {settings.QUIZ_LEADERBOARD_MAX_SIZE}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'total_participants': leaderboard.participant_count(),
+        'results': [
+            {
+                'rank': rank,
+                'username': entry.username,
+                'best_percentage': round(entry.best_percentage, 2),
+                'best_time_taken': entry.best_time_taken,
+                'achieved_at': entry.achieved_at
+            }
+            for rank, entry in leaderboard.top_entries(limit)
+        ]
+    })
+
+@api_view(['GET'])
+@authentication_classes(STATELESS_AUTHENTICATION_CLASSES)
+@permission_classes([AllowAny])
+def get_my_rank(request):
+    """Rank of the current user, or of ?session_id= for anonymous students"""
+    user_id = request.user.pk if request.user.is_authenticated else None
+    participant = participant_key(user_id, request.query_params.get('session_id', ANONYMOUS_SESSION))
+    entry = LeaderboardEntry.objects.filter(participant=participant).first() if participant else None
+    if entry is None:
+        return Response({
+            'error': 'No ranked attempts for this participant'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'username': entry.username,
+        'best_percentage': round(entry.best_percentage, 2),
+        'best_time_taken': entry.best_time_taken,
+        'rank': leaderboard.rank_of(entry),
+        'total_participants': leaderboard.participant_count()
+    })
+
+def _encode_attempt_cursor(attempt):
+    raw = json.dumps([attempt.completed_at.isoformat(), attempt.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_attempt_cursor(cursor):
+    completed_at, attempt_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(completed_at), int(attempt_id)
+
+
+@api_view(['GET'])
+@authentication_classes(STATELESS_AUTHENTICATION_CLASSES)
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer])
 @permission_classes([IsAuthenticated])
 @staff_member_required
 def get_quiz_attempts(request):
-    attempts = QuizAttempt.objects.all().order_by('-completed_at')
-    serializer = QuizAttemptSerializer(attempts, many=True)
-    return Response(serializer.data)
+    """List attempts newest first, paginated by a (completed_at, id) keyset cursor"""
+    attempts = QuizAttempt.objects.select_related('user').order_by('-completed_at', '-id')
+    
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        try:
+            completed_at, attempt_id = _decode_attempt_cursor(cursor)
+        except (ValueError, TypeError):
+            return Response({
+                'error': 'Invalid cursor'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        attempts = attempts.filter(
+            Q(completed_at__lt=completed_at) | Q(completed_at=completed_at, id__lt=attempt_id)
+        )
+    
+    limit = request.query_params.get('limit')
+    try:
+        limit = int(limit) if limit else None
+    except ValueError:
+        limit = 0
+    if limit is not None and limit < 1:
+        return Response({
+            'error': 'limit must be a positive integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if isinstance(request.accepted_renderer, NDJSONRenderer):
+        # Stream everything after the cursor with a server-side cursor; memory stays flat
+        if limit:
+            attempts = attempts[:limit]
+        rows = (
+            QuizAttemptSerializer(attempt).data
+            for attempt in attempts.iterator(chunk_size=settings.QUIZ_ATTEMPTS_STREAM_CHUNK_SIZE)
+        )
+        return StreamingHttpResponse(
+            request.accepted_renderer.stream(rows),
+            content_type=NDJSONRenderer.media_type
+        )
+    
+    limit = min(limit or settings.QUIZ_ATTEMPTS_PAGE_SIZE, settings.QUIZ_ATTEMPTS_MAX_PAGE_SIZE)
+    page = list(attempts[:limit + 1])
+    next_cursor = _encode_attempt_cursor(page[limit - 1]) if len(page) > limit else None
+    serializer = QuizAttemptSerializer(page[:limit], many=True)
+    return Response({
+        'results': serializer.data,
+        'next_cursor': next_cursor
+    })
 
 @api_view(['GET'])
+@authentication_classes(STATELESS_AUTHENTICATION_CLASSES)
 @permission_classes([IsAuthenticated])
 @staff_member_required
 def get_quiz_stats(request):
-    attempts = QuizAttempt.objects.all()
-    total_attempts = attempts.count()
-    avg_score = attempts.aggregate(Avg('percentage'))['percentage__avg'] or 0
-    avg_time = attempts.aggregate(Avg('time_taken'))['time_taken__avg'] or 0
-    
-    # Calculate score distribution
-    score_distribution = attempts.aggregate(
-        excellent=Count('id', filter=models.Q(percentage__gte=90)),
-        good=Count('id', filter=models.Q(percentage__gte=70, percentage__lt=90)),
-        average=Count('id', filter=models.Q(percentage__gte=50, percentage__lt=70)),
-        poor=Count('id', filter=models.Q(percentage__lt=50))
-    )
+    # Running totals are maintained on every insert/delete; this is one primary-key read
+    totals = get_stats()
+    total_attempts = totals.attempt_count
+    avg_score = totals.percentage_sum / total_attempts if total_attempts else 0
+    avg_time = totals.time_taken_sum / total_attempts if total_attempts else 0
     
     return Response({
         'total_attempts': total_attempts,
         'average_score': round(avg_score, 2),
         'average_time_taken': round(avg_time, 2),
-        'total_questions': Question.objects.filter(is_active=True).count(),
-        'score_distribution': score_distribution
+        'total_questions': len(get_answer_key()),
+        'score_distribution': {
+            'excellent': totals.excellent_count,
+            'good': totals.good_count,
+            'average': totals.average_count,
+            'poor': totals.poor_count
+        }
     })
 
 @api_view(['GET'])
+@authentication_classes(STATELESS_AUTHENTICATION_CLASSES)
 @permission_classes([IsAuthenticated])
 @staff_member_required
-def get_question_stats(request):
-    questions = Question.objects.filter(is_active=True).prefetch_related('choices')
-    question_stats = []
+def get_stats_timeseries(request):
+    """Attempts, average score and average time per day or week, read from the daily rollups"""
+    params = request.query_params
+    bucket = params.get('bucket') or 'day'
+    if bucket not in rollups.BUCKETS:
+        return Response({
+            'error': f"bucket must be one of: {', '.join(rollups.BUCKETS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Get total attempts count once
-    total_attempts = QuizAttempt.objects.count()
-    
-    if total_attempts == 0:
-        # If no attempts, return empty stats for all questions
-        for question in questions:
-            question_stats.append({
-                'question_id': question.id,
-                'question_text': question.text,
-                'difficulty': question.difficulty,
-                'total_attempts': 0,
-                'correct_attempts': 0,
-                'accuracy': 0.0
-            })
-        return Response(question_stats)
-    
-    # Get all correct choice IDs for all questions
-    correct_choices = {}
-    for question in questions:
-        correct_choice = question.choices.filter(is_correct=True).first()
-        if correct_choice:
-            correct_choices[question.id] = correct_choice.id
+    try:
+        end = parse_date(params['to']) if params.get('to') else timezone.localdate()
+        start = parse_date(params['from']) if params.get('from') else (
+            end and end - timedelta(days=settings.QUIZ_TIMESERIES_DEFAULT_DAYS - 1)
+        )
+    except ValueError:
+        start = end = None
+    if start is None or end is None:
+        return Response({
+            'error': 'from and to must be dates (YYYY-MM-DD)'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if start > end:
+        return Response({
+            'error': 'from must not be after to'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days + 1 > settings.QUIZ_TIMESERIES_MAX_DAYS:
+        return Response({
+            'error': f'The range may span at most {settings.QUIZ_TIMESERIES_MAX_DAYS} days'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Get all attempts with their user_answers in one query
-    all_attempts = list(QuizAttempt.objects.values('user_answers'))
+    return Response({
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'bucket': bucket,
+        'results': rollups.timeseries(start, end, bucket)
+    })
+
+@api_view(['GET'])
+@authentication_classes(STATELESS_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+@staff_member_required
+def get_stats_distribution(request):
+    """Percentiles and histograms of attempt percentages and times, read from the merged sketches"""
+    # Include this worker's pending counts; other workers' flushers write theirs every flush interval
+    distributions.flush()
+    sketches = distributions.load_sketches()
     
-    # Process each question
+    return Response({
+        'percentage': distributions.summary(sketches['percentage']),
+        'time_taken': distributions.summary(sketches['time_taken'], digits=1)
+    })
+
+@api_view(['GET'])
+@authentication_classes(STATELESS_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+@staff_member_required
+def get_question_stats(request):
+    questions = Question.objects.filter(is_active=True).order_by('id').values('id', 'text', 'difficulty')
+    total_attempts = get_stats().attempt_count
+    
+    # One indexed GROUP BY over the normalized answers
+    correct_counts = dict(
+        AttemptAnswer.objects.filter(is_correct=True)
+        .values('question_id')
+        .annotate(correct=Count('id'))
+        .values_list('question_id', 'correct')
+    )
+    
+    question_stats = []
     for question in questions:
-        correct_attempts = 0
-        
-        if question.id in correct_choices:
-            correct_choice_id = correct_choices[question.id]
-            
-            # Count correct attempts for this question
-            for attempt in all_attempts:
-                user_answer = attempt['user_answers'].get(str(question.id))
-                if user_answer == correct_choice_id:
-                    correct_attempts += 1
-        
+        correct_attempts = correct_counts.get(question['id'], 0)
         accuracy = (correct_attempts / total_attempts * 100) if total_attempts > 0 else 0
         
         question_stats.append({
-            'question_id': question.id,
-            'question_text': question.text,
-            'difficulty': question.difficulty,
+            'question_id': question['id'],
+            'question_text': question['text'],
+            'difficulty': question['difficulty'],
             'total_attempts': total_attempts,
             'correct_attempts': correct_attempts,
             'accuracy': round(accuracy, 2)
         })
     
-    return Response(question_stats)
\ No newline at end of file
+    return Response(question_stats)
+
+@api_view(['GET'])
+@authentication_classes(STATELESS_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+@staff_member_required
+def get_item_analysis(request):
+    """Item analysis stored by the compute_item_analysis command"""
+    # Computing reads every answer row, which is too slow for a request
+    report = item_analysis.get_report()
+    if report is None:
+        return Response({
+            'error': 'Item analysis has not been computed yet; run the compute_item_analysis command'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'computed_at': report.computed_at,
+        'attempt_count': report.attempt_count,
+        'questions': report.questions
+    })
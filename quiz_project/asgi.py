@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quiz_project.settings')
+# Lets settings switch on the async views when served over ASGI
+os.environ.setdefault('QUIZ_ASGI', '1')
 
 application = get_asgi_application()
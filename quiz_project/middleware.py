@@ -0,0 +1,182 @@
+"""
+Project middleware.
+
+``PerformanceMiddleware`` is per-request performance instrumentation,
+enabled with ``PERFORMANCE_INSTRUMENTATION``. For every request it records
+database query count and time, JWT authentication time, view time and
+template/DRF render time. These are sent as a ``Server-Timing`` header and
+a JSON log line on the ``quiz_project.performance`` logger, and fed into the
+per-endpoint latency histograms in ``performance.py``.
+
+Connections are per thread, and async views run their queries in
+``sync_to_async`` threads, so a wrapper around the request thread's
+connection would miss them. Instead every connection gets ``track_query``
+as an execute wrapper when it is opened, and that charges queries to
+``performance.current_timings``, which follows the request into those
+threads.
+
+``StaticFilesMiddleware`` is WhiteNoise made async-capable for ASGI.
+"""
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .performance import current_timings, registry
+
+logger = logging.getLogger('quiz_project.performance')
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.auth_time = 0.0
+        self.view_started = None
+        self.view_finished = None
+        self.render_finished = None
+
+    def track_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_queries += 1
+
+    def mark_rendered(self, response):
+        self.render_finished = time.perf_counter()
+
+
+def track_query(execute, sql, params, many, context):
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.track_query(execute, sql, params, many, context)
+
+
+def install_query_tracker(sender=None, connection=None, **kwargs):
+    # Wrappers outlive reconnects, so a reopened connection already has one
+    if track_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_query)
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_INSTRUMENTATION:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_tracker, dispatch_uid='quiz_project.install_query_tracker')
+        for connection in connections.all(initialized_only=True):
+            install_query_tracker(connection=connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = request._performance_timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, timings, response)
+
+    async def __acall__(self, request):
+        timings = request._performance_timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, timings, response)
+
+    def finish(self, request, timings, response):
+        finished = time.perf_counter()
+        total_ms = (finished - timings.started) * 1000
+        view_ms = render_ms = 0.0
+        if timings.view_started is not None:
+            view_finished = timings.view_finished or finished
+            view_ms = (view_finished - timings.view_started) * 1000
+            if timings.view_finished and timings.render_finished:
+                render_ms = (timings.render_finished - timings.view_finished) * 1000
+        db_ms = timings.db_time * 1000
+        auth_ms = timings.auth_time * 1000
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.2f};desc="{timings.db_queries} queries"',
+            f'auth;dur={auth_ms:.2f}',
+            f'view;dur={view_ms:.2f}',
+            f'render;dur={render_ms:.2f}',
+            f'total;dur={total_ms:.2f}',
+        ])
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = f"{request.method} /{match.route}" if match and match.route else f'{request.method} (unresolved)'
+        registry.observe(endpoint, total_ms)
+        registry.maybe_flush(settings.PERFORMANCE_HISTOGRAM_DIR, settings.PERFORMANCE_HISTOGRAM_FLUSH_INTERVAL)
+
+        logger.info(json.dumps({
+            'event': 'request',
+            'endpoint': endpoint,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'view_ms': round(view_ms, 2),
+            'render_ms': round(render_ms, 2),
+            'auth_ms': round(auth_ms, 2),
+            'db_ms': round(db_ms, 2),
+            'db_queries': timings.db_queries,
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._performance_timings.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook; time that separately
+        timings = request._performance_timings
+        timings.view_finished = time.perf_counter()
+        response.add_post_render_callback(timings.mark_rendered)
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that can sit in an async middleware chain
+
+    WhiteNoise itself is sync-only, which makes Django run every request
+    through a worker thread under ASGI. Static files are served the same
+    way here, and other requests await the rest of the chain directly.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,147 @@
+"""
+In-process latency histograms for the performance middleware.
+
+Each worker keeps fixed-bucket histograms per endpoint and periodically
+writes a snapshot to ``PERFORMANCE_HISTOGRAM_DIR``. Snapshots from every
+worker are merged by the ``dump_latency_histograms`` management command.
+
+``current_timings`` holds the ``RequestTimings`` of the request being
+handled, so code outside the middleware (database wrappers, authentication)
+can add to it. Context variables are copied into ``sync_to_async`` threads,
+so this also works for async views.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds in milliseconds; the last bucket catches everything slower
+BUCKET_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float('inf')]
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+@contextmanager
+def timed_auth():
+    """Add the time spent in the block to the current request's auth time"""
+    timings = current_timings.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.auth_time += time.perf_counter() - start
+
+
+class LatencyHistogram:
+    def __init__(self, counts=None, total_ms=0.0):
+        self.counts = list(counts) if counts else [0] * len(BUCKET_BOUNDS_MS)
+        self.total_ms = total_ms
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, duration_ms):
+        for index, bound in enumerate(BUCKET_BOUNDS_MS):
+            if duration_ms <= bound:
+                self.counts[index] += 1
+                break
+        self.total_ms += duration_ms
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total_ms += other.total_ms
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile"""
+        target = q * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKET_BOUNDS_MS, self.counts):
+            cumulative += bucket_count
+            if bucket_count and cumulative >= target:
+                return bound
+        return 0
+
+    def to_dict(self):
+        return {'counts': self.counts, 'total_ms': self.total_ms}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['counts'], data['total_ms'])
+
+
+class HistogramRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._last_flush = time.monotonic()
+
+    def observe(self, endpoint, duration_ms):
+        with self._lock:
+            histogram = self._histograms.get(endpoint)
+            if histogram is None:
+                histogram = self._histograms[endpoint] = LatencyHistogram()
+            histogram.observe(duration_ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: h.to_dict() for endpoint, h in self._histograms.items()}
+
+    def maybe_flush(self, directory, interval):
+        """Write this worker's snapshot if ``interval`` seconds have passed"""
+        now = time.monotonic()
+        if not directory or now - self._last_flush < interval:
+            return
+        self._last_flush = now
+        write_snapshot(directory, self.snapshot())
+
+
+registry = HistogramRegistry()
+
+
+def write_snapshot(directory, snapshot):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'latency-{os.getpid()}.json')
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'pid': os.getpid(), 'written_at': time.time(), 'endpoints': snapshot}, f)
+    os.replace(tmp_path, path)
+
+
+def snapshot_paths(directory):
+    """Paths of the per-worker snapshot files in ``directory``, ignoring anything else in it"""
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith('latency-') and name.endswith('.json')
+    ]
+
+
+def load_snapshots(directory, max_age=None):
+    """Merge every worker snapshot in ``directory`` into one histogram per endpoint"""
+    merged = {}
+    for path in snapshot_paths(directory):
+        with open(path) as f:
+            data = json.load(f)
+        if max_age is not None and time.time() - data['written_at'] > max_age:
+            continue
+        for endpoint, histogram in data['endpoints'].items():
+            merged.setdefault(endpoint, LatencyHistogram()).merge(LatencyHistogram.from_dict(histogram))
+    return merged
+
+
+def delete_snapshots(directory):
+    """Delete the worker snapshots in ``directory``; returns how many were removed"""
+    deleted = 0
+    for path in snapshot_paths(directory):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        deleted += 1
+    return deleted
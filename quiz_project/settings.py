@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     'quiz_api',
     'drf_spectacular',
@@ -57,8 +58,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', 
+    'quiz_project.middleware.PerformanceMiddleware',  # No-op unless PERFORMANCE_INSTRUMENTATION is set
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # For serving static files on Vercel
+    'quiz_project.middleware.StaticFilesMiddleware',  # WhiteNoise, for serving static files on Vercel
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -118,6 +120,29 @@ except Exception as e:
         }
     }
 
+# Performance instrumentation
+# Server-Timing headers, per-request log lines and per-endpoint latency histograms
+PERFORMANCE_INSTRUMENTATION = config('PERFORMANCE_INSTRUMENTATION', default=False, cast=bool)
+PERFORMANCE_HISTOGRAM_DIR = config('PERFORMANCE_HISTOGRAM_DIR', default=os.path.join(BASE_DIR, 'perf_histograms'))
+PERFORMANCE_HISTOGRAM_FLUSH_INTERVAL = config('PERFORMANCE_HISTOGRAM_FLUSH_INTERVAL', default=10.0, cast=float)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'quiz_project.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -153,16 +178,78 @@ else:
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_ALL_ORIGINS = False
 
+# Cache configuration
+# Version stamps for process-local caches live here; use a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache) when running several workers
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Quiz grading
+# Upper bound (seconds) on how long a worker keeps an answer key without a shared cache
+ANSWER_KEY_MAX_AGE = config('ANSWER_KEY_MAX_AGE', default=300, cast=int)
+# Seconds a worker trusts its cached QuizConfig before checking the shared version stamp
+QUIZ_CONFIG_CHECK_INTERVAL = config('QUIZ_CONFIG_CHECK_INTERVAL', default=5, cast=float)
+# Upper bound (seconds) on how long a worker keeps its QuizConfig without a shared cache
+QUIZ_CONFIG_MAX_AGE = config('QUIZ_CONFIG_MAX_AGE', default=60, cast=float)
+# Upper bound (seconds) on how long the rendered question list and random-subset pools
+# are kept without a shared cache
+QUIZ_QUESTIONS_MAX_AGE = config('QUIZ_QUESTIONS_MAX_AGE', default=300, cast=int)
+# Cache-Control sent with GET /api/quiz/; clients revalidate with If-None-Match
+QUIZ_QUESTIONS_CACHE_CONTROL = config('QUIZ_QUESTIONS_CACHE_CONTROL', default='public, no-cache')
+# Largest ?count= accepted by GET /api/quiz/ when serving a random subset
+QUIZ_MAX_QUESTION_COUNT = config('QUIZ_MAX_QUESTION_COUNT', default=200, cast=int)
+# Days a served random subset is kept for grading before purge_served_quizzes deletes it
+QUIZ_SERVED_QUIZ_RETENTION_DAYS = config('QUIZ_SERVED_QUIZ_RETENTION_DAYS', default=7, cast=int)
+# Largest number of submissions accepted by POST /api/quiz/submit/batch/
+QUIZ_BATCH_MAX_SIZE = config('QUIZ_BATCH_MAX_SIZE', default=500, cast=int)
+
+# Admin attempts listing: default/maximum page size and rows fetched per chunk when streaming
+QUIZ_ATTEMPTS_PAGE_SIZE = config('QUIZ_ATTEMPTS_PAGE_SIZE', default=100, cast=int)
+QUIZ_ATTEMPTS_MAX_PAGE_SIZE = config('QUIZ_ATTEMPTS_MAX_PAGE_SIZE', default=1000, cast=int)
+QUIZ_ATTEMPTS_STREAM_CHUNK_SIZE = config('QUIZ_ATTEMPTS_STREAM_CHUNK_SIZE', default=2000, cast=int)
+
+# Leaderboard: default/maximum number of entries returned by GET /api/leaderboard/
+QUIZ_LEADERBOARD_SIZE = config('QUIZ_LEADERBOARD_SIZE', default=10, cast=int)
+QUIZ_LEADERBOARD_MAX_SIZE = config('QUIZ_LEADERBOARD_MAX_SIZE', default=100, cast=int)
+
+# Time-series analytics: days shown when ?from= is omitted, and the longest range accepted
+QUIZ_TIMESERIES_DEFAULT_DAYS = config('QUIZ_TIMESERIES_DEFAULT_DAYS', default=30, cast=int)
+QUIZ_TIMESERIES_MAX_DAYS = config('QUIZ_TIMESERIES_MAX_DAYS', default=731, cast=int)
+
+# Seconds between a worker's background writes of its percentage/time sketch counts
+QUIZ_DISTRIBUTION_FLUSH_INTERVAL = config('QUIZ_DISTRIBUTION_FLUSH_INTERVAL', default=10.0, cast=float)
+
+# Write-behind mode: spool attempts locally and insert them in batches
+QUIZ_WRITE_BEHIND = config('QUIZ_WRITE_BEHIND', default=False, cast=bool)
+QUIZ_OUTBOX_PATH = config('QUIZ_OUTBOX_PATH', default=os.path.join(BASE_DIR, 'attempt_outbox.sqlite3'))
+QUIZ_OUTBOX_MAX_SIZE = config('QUIZ_OUTBOX_MAX_SIZE', default=10000, cast=int)
+QUIZ_OUTBOX_BATCH_SIZE = config('QUIZ_OUTBOX_BATCH_SIZE', default=500, cast=int)
+QUIZ_OUTBOX_FLUSH_INTERVAL = config('QUIZ_OUTBOX_FLUSH_INTERVAL', default=1.0, cast=float)
+
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'quiz_api.authentication.QuizJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+    # orjson-backed JSON when it is installed, DRF's stdlib JSON otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'quiz_api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'quiz_api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 
@@ -202,6 +289,25 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Async login/register/change_password (quiz_api/async_auth_views.py); defaults to on under asgi.py.
+# Password hashing runs on a bounded pool: workers running, requests allowed to wait,
+# and the Retry-After (seconds) sent with 429 once both are full
+ASYNC_AUTH_VIEWS = config('ASYNC_AUTH_VIEWS', default=os.environ.get('QUIZ_ASGI') == '1', cast=bool)
+AUTH_HASHING_WORKERS = config('AUTH_HASHING_WORKERS', default=2, cast=int)
+AUTH_HASHING_QUEUE = config('AUTH_HASHING_QUEUE', default=32, cast=int)
+AUTH_HASHING_RETRY_AFTER = config('AUTH_HASHING_RETRY_AFTER', default=1, cast=int)
+
+# Async quiz config/questions/submit views (quiz_api/async_views.py); defaults to on under asgi.py
+ASYNC_QUIZ_VIEWS = config('ASYNC_QUIZ_VIEWS', default=os.environ.get('QUIZ_ASGI') == '1', cast=bool)
+
+# Refresh-token blacklist Bloom filter (quiz_api/token_bloom.py): seconds between
+# incremental syncs, seconds of rows each sync re-reads, seconds between full
+# rebuilds, and the target false-positive rate
+TOKEN_BLOOM_SYNC_INTERVAL = config('TOKEN_BLOOM_SYNC_INTERVAL', default=5, cast=float)
+TOKEN_BLOOM_SYNC_LOOKBACK = config('TOKEN_BLOOM_SYNC_LOOKBACK', default=60, cast=float)
+TOKEN_BLOOM_REBUILD_INTERVAL = config('TOKEN_BLOOM_REBUILD_INTERVAL', default=300, cast=float)
+TOKEN_BLOOM_FALSE_POSITIVE_RATE = config('TOKEN_BLOOM_FALSE_POSITIVE_RATE', default=0.001, cast=float)
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 